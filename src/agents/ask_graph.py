@@ -1,16 +1,48 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any
+from collections.abc import Callable
+from typing import Any, Final
 
+from src.core.logging import get_logger
 from src.core.settings import get_settings
+from src.db.executor import run_db
 from src.llm.router import ModelRouter, try_parse_json
-from src.models.graph_state import AgentState
-from src.services.analytics.dynamic_planner import build_hybrid_query_plan
+from src.llm.types import LlmCallResult
+from src.models.graph_state import AgentState, PlannedAnalysis
+from src.services.analytics.changepoint import SERIES_POSTPROCESSORS
+from src.services.analytics.column_matcher import QuestionScan, get_column_matcher
+from src.services.analytics.dynamic_planner import (
+    PlannerCost,
+    abuild_hybrid_query_plan,
+    build_hybrid_query_plan,
+)
+from src.services.analytics.fusion import split_fused_result
+from src.services.analytics.intent_parser import parse_intent_rules
+from src.services.analytics.numpy_engine import compute_pattern_result
 from src.services.analytics.validator import validate_results
-from src.services.answer_service import build_charts, build_drivers, synthesize_narrative
+from src.services.answer_service import (
+    asynthesize_narrative,
+    build_charts,
+    build_drivers,
+    synthesize_narrative,
+)
 from src.services.context_service import retrieve_context
-from src.services.sql.executor import SqlExecutionError, execute_safe_query
+from src.services.sample_service import (
+    dataset_sample,
+    is_scaled_sample_query,
+    reads_table,
+    rewrite_for_sample,
+    sample_error_message,
+)
+from src.services.sql.columnar import ColumnarResult
+from src.services.sql.deadline import QueryDeadline, get_request_deadline
+from src.services.sql.executor import SqlExecutionError, execute_safe_query_columnar
+from src.services.sql.speculative import (
+    release_speculative_queries,
+    start_speculative_queries,
+    take_speculative_result,
+)
 from src.storage.repositories import get_dataset_meta
 
 try:
@@ -19,6 +51,8 @@ except Exception:  # pragma: no cover - fallback in environments without langgra
     END = "__end__"
     StateGraph = None
 
+logger = get_logger(__name__)
+
 
 def _base_cost_trace() -> dict[str, Any]:
     return {
@@ -40,32 +74,73 @@ def _add_cost(
     cost["usd"] += usd
 
 
-def _extract_mentions(question: str, columns: list[str]) -> dict[str, str]:
-    lowered = question.lower()
-    for col in columns:
-        if col.lower() in lowered:
-            return {"column_mention": col}
-    return {}
+def _extract_mentions(scan: QuestionScan) -> dict[str, str]:
+    return {"column_mention": scan.mentions[0]} if scan.mentions else {}
+
+
+_INTENT_SYSTEM_PROMPT = "Extract analysis intent from the question. Return JSON with metric, timeframe, dimensions, top_n."
+
+
+def _apply_rule_intent(state: AgentState) -> dict[str, Any] | None:
+    """Set the rule-based intent when it is confident; otherwise return it for the model to extend."""
+    scan = get_column_matcher(state["dataset_meta"]).scan(state["question"])
+    rule_intent, confidence = parse_intent_rules(state["question"], state["dataset_meta"], scan)
+    if confidence < get_settings().intent_rules_min_confidence:
+        return rule_intent
+
+    rule_intent.update(state.get("intent") or {})
+    rule_intent["raw_question"] = state["question"]
+    state["intent"] = rule_intent
+    state["diagnostics"].append(
+        {
+            "code": "INTENT_PARSED_BY_RULES",
+            "message": f"Intent extracted without a model call (confidence {confidence:.2f}).",
+        }
+    )
+    return None
+
+
+def _apply_llm_intent(state: AgentState, rule_intent: dict[str, Any], llm: LlmCallResult) -> None:
+    parsed = {**rule_intent, **try_parse_json(llm.text)}
+    parsed.update(state.get("intent") or {})
+    parsed["raw_question"] = state["question"]
+    state["intent"] = parsed
+    _add_cost(state, llm.model, llm.prompt_tokens, llm.completion_tokens, llm.usd)
 
 
 def parse_intent_node(state: AgentState) -> AgentState:
+    rule_intent = _apply_rule_intent(state)
+    if rule_intent is None:
+        return state
+
     router = ModelRouter()
-    existing_intent = dict(state.get("intent") or {})
     llm = router.call(
         request_id=state["request_id"],
         app="data-ghost-api",
         task="parse_intent",
-        system_prompt=(
-            "Extract analysis intent from the question. Return JSON with metric, timeframe, dimensions, top_n."
-        ),
+        system_prompt=_INTENT_SYSTEM_PROMPT,
         user_prompt=state["question"],
         prefer_expensive=False,
     )
-    parsed = try_parse_json(llm.text)
-    parsed.update(existing_intent)
-    parsed["raw_question"] = state["question"]
-    state["intent"] = parsed
-    _add_cost(state, llm.model, llm.prompt_tokens, llm.completion_tokens, llm.usd)
+    _apply_llm_intent(state, rule_intent, llm)
+    return state
+
+
+async def aparse_intent_node(state: AgentState) -> AgentState:
+    rule_intent = await run_db(_apply_rule_intent, state)
+    if rule_intent is None:
+        return state
+
+    router = ModelRouter()
+    llm = await router.acall(
+        request_id=state["request_id"],
+        app="data-ghost-api",
+        task="parse_intent",
+        system_prompt=_INTENT_SYSTEM_PROMPT,
+        user_prompt=state["question"],
+        prefer_expensive=False,
+    )
+    _apply_llm_intent(state, rule_intent, llm)
     return state
 
 
@@ -96,8 +171,10 @@ def decide_need_clarification_node(state: AgentState) -> AgentState:
     question = state["question"].lower()
     clarifications = state.get("clarifications", {}) or {}
 
+    scan = get_column_matcher(dataset_meta).scan(state["question"])
+
     numeric_columns = [k for k, v in dataset_meta["schema"].items() if v in {"INTEGER", "REAL"}]
-    mentioned_metric = next((c for c in numeric_columns if c.lower() in question), None)
+    mentioned_metric = next((c for c in scan.mentions if c in numeric_columns), None)
     selected_metric = clarifications.get("metric") or mentioned_metric
 
     time_columns = [
@@ -106,12 +183,12 @@ def decide_need_clarification_node(state: AgentState) -> AgentState:
         if any(token in c.lower() for token in ["date", "time", "week", "day", "month", "year"])
     ]
     selected_time = clarifications.get("time_column") or next(
-        (c for c in time_columns if c.lower() in question), None
+        (c for c in scan.mentions if c in time_columns), None
     )
     if len(time_columns) == 1 and not selected_time:
         selected_time = time_columns[0]
 
-    state["intent"].update(_extract_mentions(state["question"], dataset_meta["columns"]))
+    state["intent"].update(_extract_mentions(scan))
 
     questions: list[dict[str, Any]] = []
     asks_numeric_metric = any(
@@ -163,17 +240,62 @@ def decide_need_clarification_node(state: AgentState) -> AgentState:
     return state
 
 
+def _speculate(state: AgentState, queries: list[dict[str, Any]]) -> None:
+    # Approximate runs rewrite SQL onto the sample and numpy-bound patterns run in process,
+    # so neither would claim a speculative result.
+    if state.get("approximate"):
+        return
+    in_process = get_settings().analytics_engine == "numpy"
+    start_speculative_queries(
+        state["request_id"],
+        [query for query in queries if not (in_process and query.get("binding"))],
+    )
+
+
 def plan_analyses_node(state: AgentState) -> AgentState:
     router = ModelRouter()
-    planned_queries, diagnostics, planner_cost = build_hybrid_query_plan(
-        router=router,
-        request_id=state["request_id"],
-        question=state["question"],
-        dataset_meta=state["dataset_meta"],
-        clarifications=state["clarifications"],
-        intent=state["intent"],
-        max_queries=get_settings().query_max_per_request,
-    )
+    try:
+        planned_queries, diagnostics, planner_cost = build_hybrid_query_plan(
+            router=router,
+            request_id=state["request_id"],
+            question=state["question"],
+            dataset_meta=state["dataset_meta"],
+            clarifications=state["clarifications"],
+            intent=state["intent"],
+            max_queries=get_settings().query_max_per_request,
+            on_deterministic_plan=lambda queries: _speculate(state, queries),
+        )
+    except BaseException:
+        release_speculative_queries(state["request_id"])
+        raise
+    return _store_planned_analyses(state, planned_queries, diagnostics, planner_cost)
+
+
+async def aplan_analyses_node(state: AgentState) -> AgentState:
+    router = ModelRouter()
+    try:
+        planned_queries, diagnostics, planner_cost = await abuild_hybrid_query_plan(
+            router=router,
+            request_id=state["request_id"],
+            question=state["question"],
+            dataset_meta=state["dataset_meta"],
+            clarifications=state["clarifications"],
+            intent=state["intent"],
+            max_queries=get_settings().query_max_per_request,
+            on_deterministic_plan=lambda queries: _speculate(state, queries),
+        )
+    except BaseException:
+        release_speculative_queries(state["request_id"])
+        raise
+    return _store_planned_analyses(state, planned_queries, diagnostics, planner_cost)
+
+
+def _store_planned_analyses(
+    state: AgentState,
+    planned_queries: list[dict[str, Any]],
+    diagnostics: list[dict[str, str]],
+    planner_cost: PlannerCost | None,
+) -> AgentState:
     if planner_cost is not None:
         _add_cost(
             state,
@@ -183,21 +305,71 @@ def plan_analyses_node(state: AgentState) -> AgentState:
             planner_cost.usd,
         )
 
-    state["planned_analyses"] = [
-        {
+    planned_analyses: list[PlannedAnalysis] = []
+    for item in planned_queries:
+        analysis: PlannedAnalysis = {
             "name": item["pattern"],
             "description": item["label"],
             "sql_label": item["label"],
             "sql": item["sql"],
+            "estimated_cost": item.get("estimated_cost"),
         }
-        for item in planned_queries
-    ]
+        if item.get("outputs"):
+            analysis["outputs"] = item["outputs"]
+        if item.get("trusted") or item.get("prevalidated"):
+            analysis["trusted"] = True
+        if item.get("params"):
+            analysis["params"] = item["params"]
+        if item.get("binding"):
+            analysis["binding"] = item["binding"]
+        planned_analyses.append(analysis)
+    state["planned_analyses"] = planned_analyses
     state["diagnostics"].extend(diagnostics)
     return state
 
 
+def _compute_in_process(
+    dataset_meta: dict[str, Any], item: PlannedAnalysis, outputs: list[dict[str, Any]]
+) -> list[ColumnarResult] | None:
+    binding = item.get("binding")
+    if not binding:
+        return None
+    parts: list[ColumnarResult] = []
+    for output in outputs:
+        try:
+            part = compute_pattern_result(
+                dataset_meta,
+                pattern=output["pattern"],
+                label=output["label"],
+                binding=binding,
+                params=item.get("params"),
+            )
+        except (ArithmeticError, LookupError, TypeError, ValueError) as exc:
+            # The SQL path handles whatever the columns hold; use it instead of failing the ask.
+            logger.warning(
+                "In-process analytics failed for %s; falling back to SQL: %s",
+                output["label"],
+                exc,
+            )
+            return None
+        if part is None:
+            return None
+        parts.append(part)
+    return parts
+
+
+def _reduce_series(label: str, result: ColumnarResult) -> ColumnarResult:
+    reduce = SERIES_POSTPROCESSORS.get(label)
+    if reduce is None:
+        return result
+    try:
+        return reduce(result)
+    except ValueError as exc:
+        # e.g. a numeric or free-text time column whose buckets are not ISO dates.
+        raise SqlExecutionError(f"series could not be post-processed: {exc}") from exc
+
+
 def execute_queries_node(state: AgentState) -> AgentState:
-    executed: list[dict[str, Any]] = []
     errors: list[dict[str, str]] = []
     settings = get_settings()
     planned = state["planned_analyses"]
@@ -212,19 +384,126 @@ def execute_queries_node(state: AgentState) -> AgentState:
         planned = planned[: settings.query_max_per_request]
         state["planned_analyses"] = planned
 
-    for item in planned:
-        try:
-            rows = execute_safe_query(item["sql"])
-            executed.append({"label": item["sql_label"], "sql": item["sql"], "rows": rows})
-        except SqlExecutionError as exc:
-            errors.append(
-                {
-                    "code": "SQL_EXECUTION_ERROR",
-                    "message": f"{item['sql_label']}: {exc}",
-                }
+    # Speculative futures started while planning are dropped however this node exits.
+    try:
+        deadline = get_request_deadline(state["request_id"]) or QueryDeadline(
+            settings.query_request_timeout_seconds
+        )
+        deadline.start()
+
+        sample = dataset_sample(state["dataset_meta"]) if state.get("approximate") else None
+        scaled = 0
+        unscaled: list[str] = []
+
+        # Run the cheapest queries first so a shared deadline only cuts the expensive tail,
+        # then report results in plan order.
+        order = sorted(range(len(planned)), key=lambda idx: planned[idx].get("estimated_cost") or 0)
+        results_by_index: dict[tuple[int, int], dict[str, Any]] = {}
+        for position, index in enumerate(order):
+            skipped = len(order) - position
+            if deadline.cancelled:
+                errors.append(
+                    {
+                        "code": "REQUEST_CANCELLED",
+                        "message": f"Client disconnected; skipped {skipped} remaining queries.",
+                    }
+                )
+                break
+            if deadline.expired():
+                errors.append(
+                    {
+                        "code": "QUERY_DEADLINE_EXCEEDED",
+                        "message": (
+                            f"Request query deadline of {settings.query_request_timeout_seconds}s "
+                            f"reached; skipped {skipped} remaining queries."
+                        ),
+                    }
+                )
+                break
+
+            item = planned[index]
+            # Queries over the rollup or sketch tables are exact already and run unchanged.
+            if sample is not None and reads_table(item["sql"], state["dataset_meta"]["table_name"]):
+                sample_sql = rewrite_for_sample(
+                    item["sql"],
+                    table_name=state["dataset_meta"]["table_name"],
+                    sample_table=sample["table"],
+                )
+                if sample_sql is not None:
+                    item = {**item, "sql": sample_sql}
+                    if is_scaled_sample_query(sample_sql):
+                        scaled += 1
+                    else:
+                        unscaled.append(item["sql_label"])
+            outputs = item.get("outputs") or [{"label": item["sql_label"], "pattern": item["name"]}]
+            in_process = (
+                _compute_in_process(state["dataset_meta"], item, outputs)
+                if settings.analytics_engine == "numpy" and sample is None
+                else None
             )
-
+            if in_process is not None:
+                for part_index, (output, part) in enumerate(zip(outputs, in_process, strict=True)):
+                    results_by_index[(index, part_index)] = {
+                        "label": output["label"],
+                        "sql": item["sql"],
+                        **part,
+                    }
+                continue
+
+            speculative = take_speculative_result(
+                state["request_id"], item["sql"], item.get("params")
+            )
+            try:
+                result = (
+                    speculative.result()
+                    if speculative is not None
+                    else execute_safe_query_columnar(
+                        item["sql"],
+                        deadline=deadline,
+                        request_id=state["request_id"],
+                        pattern=item["name"],
+                        label=item["sql_label"],
+                        trusted=item.get("trusted", False),
+                        params=item.get("params"),
+                    )
+                )
+                outputs = item.get("outputs")
+                if outputs:
+                    for part_index, (output, part) in enumerate(
+                        zip(outputs, split_fused_result(result, outputs), strict=True)
+                    ):
+                        results_by_index[(index, part_index)] = {
+                            "label": output["label"],
+                            "sql": item["sql"],
+                            **_reduce_series(output["label"], part),
+                        }
+                else:
+                    results_by_index[(index, 0)] = {
+                        "label": item["sql_label"],
+                        "sql": item["sql"],
+                        **_reduce_series(item["sql_label"], result),
+                    }
+            except SqlExecutionError as exc:
+                errors.append(
+                    {
+                        "code": "SQL_EXECUTION_ERROR",
+                        "message": f"{item['sql_label']}: {exc}",
+                    }
+                )
+    finally:
+        release_speculative_queries(state["request_id"])
+
+    executed = [results_by_index[index] for index in sorted(results_by_index)]
     state["executed_results"] = executed
+    if scaled or unscaled:
+        state["diagnostics"].append(
+            {
+                "code": "APPROXIMATE_RESULT",
+                "message": sample_error_message(
+                    sample, state["intent"].get("metric"), scaled=scaled, unscaled=unscaled
+                ),
+            }
+        )
     if errors:
         state.setdefault("execution_errors", errors)
     return state
@@ -233,7 +512,7 @@ def execute_queries_node(state: AgentState) -> AgentState:
 def validate_results_node(state: AgentState) -> AgentState:
     execution_errors = state.get("execution_errors", [])
     confidence, diagnostics = validate_results(
-        planned_count=len(state["planned_analyses"]),
+        planned_count=sum(len(item.get("outputs") or [item]) for item in state["planned_analyses"]),
         executed_results=state["executed_results"],
         execution_errors=execution_errors,
         prior_diagnostics=state["diagnostics"],
@@ -259,6 +538,26 @@ def synthesize_explanation_node(state: AgentState) -> AgentState:
         confidence=state["confidence"],
         context_citations=state["context_citations"],
     )
+    return _store_answer(state, headline, narrative, final_cost)
+
+
+async def asynthesize_explanation_node(state: AgentState) -> AgentState:
+    router = ModelRouter()
+    headline, narrative, final_cost = await asynthesize_narrative(
+        router=router,
+        request_id=state["request_id"],
+        question=state["question"],
+        executed_results=state["executed_results"],
+        diagnostics=state["diagnostics"],
+        confidence=state["confidence"],
+        context_citations=state["context_citations"],
+    )
+    return _store_answer(state, headline, narrative, final_cost)
+
+
+def _store_answer(
+    state: AgentState, headline: str, narrative: str, final_cost: dict[str, int | float | str]
+) -> AgentState:
     _add_cost(
         state,
         str(final_cost["model"]),
@@ -293,6 +592,7 @@ def synthesize_explanation_node(state: AgentState) -> AgentState:
             "usd": round(state["cost_trace"]["usd"], 8),
         },
         "context_citations": state["context_citations"],
+        "approximate": any(item["code"] == "APPROXIMATE_RESULT" for item in state["diagnostics"]),
     }
     return state
 
@@ -349,20 +649,68 @@ def _fallback_run(initial_state: AgentState) -> AgentState:
     return finalize_response_node(state)
 
 
-def build_ask_graph():
+def _offloaded(node: Callable[[AgentState], AgentState]) -> Callable[..., Any]:
+    """Wrap a blocking node so the async graph runs it on the SQLite executor."""
+
+    async def run(state: AgentState) -> AgentState:
+        return await run_db(node, state)
+
+    run.__name__ = node.__name__
+    return run
+
+
+# Nodes that wait on a model are native coroutines; the rest are SQLite/CPU bound.
+_ASYNC_NODES: Final = {
+    "check_dataset_ready": _offloaded(check_dataset_ready_node),
+    "decide_need_clarification": _offloaded(decide_need_clarification_node),
+    "parse_intent": aparse_intent_node,
+    "plan_analyses": aplan_analyses_node,
+    "execute_queries": _offloaded(execute_queries_node),
+    "validate_results": _offloaded(validate_results_node),
+    "retrieve_context": _offloaded(retrieve_context_node),
+    "synthesize_explanation": asynthesize_explanation_node,
+    "finalize_response": _offloaded(finalize_response_node),
+}
+
+
+async def _afallback_run(initial_state: AgentState) -> AgentState:
+    state = await _ASYNC_NODES["check_dataset_ready"](initial_state)
+    state = await _ASYNC_NODES["decide_need_clarification"](state)
+    if _should_continue(state) == "continue":
+        for name in (
+            "parse_intent",
+            "plan_analyses",
+            "execute_queries",
+            "validate_results",
+            "retrieve_context",
+            "synthesize_explanation",
+        ):
+            state = await _ASYNC_NODES[name](state)
+    return await _ASYNC_NODES["finalize_response"](state)
+
+
+def build_ask_graph(*, use_async: bool = False):
     if StateGraph is None:
         return None
 
+    nodes: dict[str, Callable[..., Any]] = (
+        _ASYNC_NODES
+        if use_async
+        else {
+            "check_dataset_ready": check_dataset_ready_node,
+            "decide_need_clarification": decide_need_clarification_node,
+            "parse_intent": parse_intent_node,
+            "plan_analyses": plan_analyses_node,
+            "execute_queries": execute_queries_node,
+            "validate_results": validate_results_node,
+            "retrieve_context": retrieve_context_node,
+            "synthesize_explanation": synthesize_explanation_node,
+            "finalize_response": finalize_response_node,
+        }
+    )
     graph = StateGraph(AgentState)
-    graph.add_node("parse_intent", parse_intent_node)
-    graph.add_node("check_dataset_ready", check_dataset_ready_node)
-    graph.add_node("decide_need_clarification", decide_need_clarification_node)
-    graph.add_node("plan_analyses", plan_analyses_node)
-    graph.add_node("execute_queries", execute_queries_node)
-    graph.add_node("validate_results", validate_results_node)
-    graph.add_node("retrieve_context", retrieve_context_node)
-    graph.add_node("synthesize_explanation", synthesize_explanation_node)
-    graph.add_node("finalize_response", finalize_response_node)
+    for name, node in nodes.items():
+        graph.add_node(name, node)
 
     graph.set_entry_point("check_dataset_ready")
     graph.add_edge("check_dataset_ready", "decide_need_clarification")
@@ -385,11 +733,12 @@ def build_ask_graph():
     return graph.compile()
 
 
-def run_ask_pipeline(
+def _initial_state(
     question: str,
     conversation_id: str | None,
     clarifications: dict[str, Any] | None,
-    request_id: str | None = None,
+    request_id: str | None,
+    approximate: bool,
 ) -> AgentState:
     state: AgentState = {
         "request_id": request_id or str(uuid.uuid4()),
@@ -413,6 +762,19 @@ def run_ask_pipeline(
         "confidence": {"level": "insufficient", "reasons": []},
         "cost_trace": _base_cost_trace(),
     }
+    if approximate:
+        state["approximate"] = True
+    return state
+
+
+def run_ask_pipeline(
+    question: str,
+    conversation_id: str | None,
+    clarifications: dict[str, Any] | None,
+    request_id: str | None = None,
+    approximate: bool = False,
+) -> AgentState:
+    state = _initial_state(question, conversation_id, clarifications, request_id, approximate)
 
     app = build_ask_graph()
     if app is None:
@@ -420,3 +782,20 @@ def run_ask_pipeline(
 
     result = app.invoke(state)
     return result
+
+
+async def arun_ask_pipeline(
+    question: str,
+    conversation_id: str | None,
+    clarifications: dict[str, Any] | None,
+    request_id: str | None = None,
+    approximate: bool = False,
+) -> AgentState:
+    """Async ``run_ask_pipeline``: model calls are awaited, SQLite work runs on the db executor."""
+    state = _initial_state(question, conversation_id, clarifications, request_id, approximate)
+
+    app = build_ask_graph(use_async=True)
+    if app is None:
+        return await _afallback_run(state)
+
+    return await app.ainvoke(state)
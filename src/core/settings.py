@@ -77,6 +77,7 @@ class Settings(BaseSettings):
     data_dir: Path = Path("data")
     docs_dir: Path = Path("docs")
     db_path: Path = Path("data/data_ghost.db")
+    db_executor_workers: int = 8
 
     llm_provider: str = Field(default="mock", alias="LLM_PROVIDER")
     llm_default_model: str = Field(default="mock-default", alias="LLM_DEFAULT_MODEL")
@@ -93,18 +94,38 @@ class Settings(BaseSettings):
         default=600, alias="LLM_ESTIMATED_COMPLETION_TOKENS"
     )
 
+    llm_prompt_max_columns: int = Field(default=30, alias="LLM_PROMPT_MAX_COLUMNS")
+    llm_prompt_sample_values: int = Field(default=3, alias="LLM_PROMPT_SAMPLE_VALUES")
+    llm_synthesis_max_rows: int = Field(default=20, alias="LLM_SYNTHESIS_MAX_ROWS")
     llm_price_prompt_per_1k: float = 0.001
     llm_price_completion_per_1k: float = 0.002
 
     query_timeout_seconds: float = 5.0
+    query_request_timeout_seconds: float = 15.0
     query_max_rows: int = 5000
     query_max_per_request: int = 10
+    query_max_estimated_cost: float = 50_000_000.0
+    query_max_request_cost: float = 200_000_000.0
+    query_speculative_workers: int = 4
+    query_stats_enabled: bool = True
+    query_stats_batch_size: int = 50
+    query_stats_max_rows: int = 100_000
+    query_stats_flush_seconds: float = 5.0
+    query_slow_log_ms: float = 1000.0
+
+    analytics_engine: str = Field(default="sql", alias="ANALYTICS_ENGINE")
+    trend_break_mode: str = Field(default="window", alias="TREND_BREAK_MODE")
+
+    admin_api_token: str | None = Field(default=None, alias="ADMIN_API_TOKEN")
 
     rag_chunk_size: int = 800
     rag_chunk_overlap: int = 100
     rag_top_k: int = 5
 
     ask_cache_ttl_seconds: int = Field(default=600, alias="ASK_CACHE_TTL_SECONDS")
+    plan_cache_ttl_seconds: int = Field(default=604800, alias="PLAN_CACHE_TTL_SECONDS")
+    plan_reuse_min_similarity: float = Field(default=0.9, alias="PLAN_REUSE_MIN_SIMILARITY")
+    intent_rules_min_confidence: float = Field(default=0.8, alias="INTENT_RULES_MIN_CONFIDENCE")
     ask_rate_limit_per_minute: int = Field(default=30, alias="ASK_RATE_LIMIT_PER_MINUTE")
     ask_rate_limit_per_hour: int = Field(default=300, alias="ASK_RATE_LIMIT_PER_HOUR")
     voice_rate_limit_per_minute: int = Field(default=20, alias="VOICE_RATE_LIMIT_PER_MINUTE")
@@ -122,6 +143,9 @@ class Settings(BaseSettings):
     context_max_upload_mb: int = Field(default=10, alias="CONTEXT_MAX_UPLOAD_MB")
     dataset_max_rows: int = Field(default=10000, alias="DATASET_MAX_ROWS")
     dataset_max_columns: int = Field(default=150, alias="DATASET_MAX_COLUMNS")
+    cube_max_dimension_cardinality: int = Field(default=50, alias="CUBE_MAX_DIMENSION_CARDINALITY")
+    sample_target_rows: int = Field(default=2000, alias="SAMPLE_TARGET_ROWS")
+    sketch_heavy_hitters_capacity: int = Field(default=100, alias="SKETCH_HEAVY_HITTERS_CAPACITY")
 
     max_upload_mb: int = 20
     cors_allow_origins: list[str] = Field(
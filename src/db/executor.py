@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Final, TypeVar
+
+from src.core.settings import get_settings
+
+T = TypeVar("T")
+
+_LOCK: Final = threading.Lock()
+_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(get_settings().db_executor_workers, 1),
+                thread_name_prefix="sqlite",
+            )
+        return _EXECUTOR
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking SQLite (or other CPU-bound) work off the event loop on a dedicated pool.
+
+    Kept apart from the default executor, so database work cannot starve or be starved by
+    other threads while many requests wait on LLM calls. Context variables (the logging
+    request id) are carried over, as ``run_in_threadpool`` does.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _db_executor(), partial(context.run, partial(fn, *args, **kwargs))
+    )
@@ -12,7 +12,8 @@ DDL = [
         rows INTEGER NOT NULL,
         columns_json TEXT NOT NULL,
         schema_json TEXT NOT NULL,
-        created_at TEXT NOT NULL
+        created_at TEXT NOT NULL,
+        profile_json TEXT
     )
     """,
     """
@@ -64,6 +65,46 @@ DDL = [
         metadata_json TEXT NOT NULL
     )
     """,
+    """
+    CREATE TABLE IF NOT EXISTS query_stats (
+        id TEXT PRIMARY KEY,
+        request_id TEXT,
+        pattern TEXT,
+        label TEXT,
+        sql_hash TEXT NOT NULL,
+        sql TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        row_count INTEGER NOT NULL,
+        vm_steps INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_query_stats_sql_hash ON query_stats(sql_hash)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS llm_plan_cache (
+        cache_key TEXT PRIMARY KEY,
+        schema_fingerprint TEXT NOT NULL,
+        question TEXT NOT NULL,
+        queries_json TEXT NOT NULL,
+        hits INTEGER NOT NULL,
+        stored_at REAL NOT NULL,
+        last_used_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_llm_plan_cache_schema ON llm_plan_cache(schema_fingerprint)
+    """,
+]
+
+
+# Columns added after a table first shipped: (table, column, column DDL).
+COLUMN_MIGRATIONS = [
+    ("dataset_meta", "profile_json", "TEXT"),
+    ("llm_plan_cache", "clarifications_json", "TEXT"),
+    ("llm_plan_cache", "embedding_json", "TEXT"),
 ]
 
 
@@ -71,3 +112,7 @@ def init_db() -> None:
     with get_connection() as conn:
         for ddl in DDL:
             conn.execute(ddl)
+        for table, column, column_ddl in COLUMN_MIGRATIONS:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_ddl}")
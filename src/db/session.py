@@ -7,6 +7,27 @@ from typing import Iterator
 
 from src.core.settings import get_settings
 
+# Actions a read-only analytics query may need; anything else (writes, DDL, ATTACH, PRAGMA,
+# transactions) is denied by SQLite itself, independent of SQL parsing.
+_READ_ONLY_ACTIONS = frozenset(
+    {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+)
+_DENIED_FUNCTIONS = frozenset({"load_extension"})
+
+
+def _read_only_authorizer(
+    action: int,
+    arg1: str | None,
+    arg2: str | None,
+    db_name: str | None,
+    trigger: str | None,
+) -> int:
+    if action not in _READ_ONLY_ACTIONS:
+        return sqlite3.SQLITE_DENY
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in _DENIED_FUNCTIONS:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
 
 def _configure_connection(conn: sqlite3.Connection) -> None:
     conn.row_factory = sqlite3.Row
@@ -33,3 +54,17 @@ def get_connection_no_context() -> sqlite3.Connection:
     conn = sqlite3.connect(Path(settings.db_path))
     _configure_connection(conn)
     return conn
+
+
+@contextmanager
+def get_read_only_connection() -> Iterator[sqlite3.Connection]:
+    """Open the database in read-only mode with an authorizer that denies non-SELECT actions."""
+    settings = get_settings()
+    uri = f"{Path(settings.db_path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = sqlite3.Row
+    conn.set_authorizer(_read_only_authorizer)
+    try:
+        yield conn
+    finally:
+        conn.close()
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import json
+import threading
 import uuid
 from dataclasses import dataclass
+from typing import Any, Final
 
-from src.core.settings import get_settings
+from src.core.logging import get_logger
+from src.core.settings import Settings, get_settings
 from src.llm.types import LlmCallResult
 from src.storage.repositories import insert_cost_ledger
 from src.utils.time import utc_now_iso
 
+logger = get_logger(__name__)
+
 
 class LlmProviderConfigurationError(Exception):
     pass
@@ -21,19 +26,59 @@ class LlmPrompt:
 
 
 class BaseProvider:
+    """One instance per backend and key is shared process-wide (see :func:`get_provider`).
+
+    Chat clients are built once per model and reused, so their HTTP connection pools are
+    kept across requests. Connections are still opened lazily, by the first call per model.
+    """
+
     provider_name = "base"
 
     def __init__(self) -> None:
-        self.settings = get_settings()
+        self._clients: dict[str, Any] = {}
+        self._clients_lock = threading.Lock()
+
+    @property
+    def settings(self) -> Settings:
+        return get_settings()
+
+    def _build_client(self, model: str) -> Any:
+        return None
+
+    def _client(self, model: str) -> Any:
+        with self._clients_lock:
+            client = self._clients.get(model)
+            if client is None:
+                client = self._clients[model] = self._build_client(model)
+            return client
+
+    def prebuild_clients(self, models: set[str]) -> None:
+        for model in models:
+            self._client(model)
 
     def _estimate_price(self, prompt_tokens: int, completion_tokens: int) -> float:
         prompt = (prompt_tokens / 1000) * self.settings.llm_price_prompt_per_1k
         completion = (completion_tokens / 1000) * self.settings.llm_price_completion_per_1k
         return round(prompt + completion, 8)
 
+    def _result(self, model: str, prompt: LlmPrompt, text: str) -> LlmCallResult:
+        prompt_tokens = len((prompt.system + "\n" + prompt.user).split())
+        completion_tokens = len(text.split())
+        return LlmCallResult(
+            text=text,
+            model=model,
+            provider=self.provider_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            usd=self._estimate_price(prompt_tokens, completion_tokens),
+        )
+
     def call(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
         raise NotImplementedError
 
+    async def acall(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        raise NotImplementedError
+
 
 class MockProvider(BaseProvider):
     provider_name = "mock"
@@ -44,17 +89,10 @@ class MockProvider(BaseProvider):
             "summary": user_text[:300],
             "note": "mock-provider-response",
         }
-        prompt_tokens = len((prompt.system + "\n" + prompt.user).split())
-        completion_tokens = len(json.dumps(response).split())
-        usd = self._estimate_price(prompt_tokens, completion_tokens)
-        return LlmCallResult(
-            text=json.dumps(response),
-            model=model,
-            provider=self.provider_name,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            usd=usd,
-        )
+        return self._result(model, prompt, json.dumps(response))
+
+    async def acall(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        return self.call(model, prompt)
 
 
 class OpenAIProvider(BaseProvider):
@@ -68,31 +106,31 @@ class OpenAIProvider(BaseProvider):
             raise RuntimeError("OpenAI provider requires langchain-openai") from exc
         self._chat_class = ChatOpenAI
 
-    def call(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+    def _build_client(self, model: str) -> Any:
+        if not self.settings.llm_openai_api_key:
+            return None
+        return self._chat_class(
+            model=model, api_key=self.settings.llm_openai_api_key, temperature=0
+        )
+
+    def _messages(self, prompt: LlmPrompt) -> list[Any]:
         from langchain_core.messages import HumanMessage, SystemMessage
 
         if not self.settings.llm_openai_api_key:
             raise LlmProviderConfigurationError(
                 "OpenAI provider is selected but OPENAI_API_KEY is not configured."
             )
-        chat = self._chat_class(
-            model=model, api_key=self.settings.llm_openai_api_key, temperature=0
-        )
-        output = chat.invoke(
-            [SystemMessage(content=prompt.system), HumanMessage(content=prompt.user)]
-        )
-        text = str(output.content)
-        prompt_tokens = len((prompt.system + "\n" + prompt.user).split())
-        completion_tokens = len(text.split())
-        usd = self._estimate_price(prompt_tokens, completion_tokens)
-        return LlmCallResult(
-            text=text,
-            model=model,
-            provider=self.provider_name,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            usd=usd,
-        )
+        return [SystemMessage(content=prompt.system), HumanMessage(content=prompt.user)]
+
+    def call(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        messages = self._messages(prompt)
+        output = self._client(model).invoke(messages)
+        return self._result(model, prompt, str(output.content))
+
+    async def acall(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        messages = self._messages(prompt)
+        output = await self._client(model).ainvoke(messages)
+        return self._result(model, prompt, str(output.content))
 
 
 class AnthropicProvider(BaseProvider):
@@ -106,31 +144,31 @@ class AnthropicProvider(BaseProvider):
             raise RuntimeError("Anthropic provider requires langchain-anthropic") from exc
         self._chat_class = ChatAnthropic
 
-    def call(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+    def _build_client(self, model: str) -> Any:
+        if not self.settings.llm_anthropic_api_key:
+            return None
+        return self._chat_class(
+            model=model, api_key=self.settings.llm_anthropic_api_key, temperature=0
+        )
+
+    def _messages(self, prompt: LlmPrompt) -> list[Any]:
         from langchain_core.messages import HumanMessage, SystemMessage
 
         if not self.settings.llm_anthropic_api_key:
             raise LlmProviderConfigurationError(
                 "Anthropic provider is selected but ANTHROPIC_API_KEY is not configured."
             )
-        chat = self._chat_class(
-            model=model, api_key=self.settings.llm_anthropic_api_key, temperature=0
-        )
-        output = chat.invoke(
-            [SystemMessage(content=prompt.system), HumanMessage(content=prompt.user)]
-        )
-        text = str(output.content)
-        prompt_tokens = len((prompt.system + "\n" + prompt.user).split())
-        completion_tokens = len(text.split())
-        usd = self._estimate_price(prompt_tokens, completion_tokens)
-        return LlmCallResult(
-            text=text,
-            model=model,
-            provider=self.provider_name,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            usd=usd,
-        )
+        return [SystemMessage(content=prompt.system), HumanMessage(content=prompt.user)]
+
+    def call(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        messages = self._messages(prompt)
+        output = self._client(model).invoke(messages)
+        return self._result(model, prompt, str(output.content))
+
+    async def acall(self, model: str, prompt: LlmPrompt) -> LlmCallResult:
+        messages = self._messages(prompt)
+        output = await self._client(model).ainvoke(messages)
+        return self._result(model, prompt, str(output.content))
 
 
 def provider_from_env() -> BaseProvider:
@@ -142,6 +180,53 @@ def provider_from_env() -> BaseProvider:
     return MockProvider()
 
 
+_LOCK: Final = threading.Lock()
+_PROVIDERS: dict[tuple[str, str | None], BaseProvider] = {}
+
+
+def _provider_key(settings: Settings) -> tuple[str, str | None]:
+    provider = settings.llm_provider.lower()
+    if provider == "openai":
+        return provider, settings.llm_openai_api_key
+    if provider == "anthropic":
+        return provider, settings.llm_anthropic_api_key
+    return "mock", None
+
+
+def get_provider() -> BaseProvider:
+    """Return the process-wide provider for the configured backend and key, creating it once."""
+    key = _provider_key(get_settings())
+    with _LOCK:
+        provider = _PROVIDERS.get(key)
+    if provider is not None:
+        return provider
+    provider = provider_from_env()
+    with _LOCK:
+        return _PROVIDERS.setdefault(key, provider)
+
+
+def clear_provider_pool() -> None:
+    with _LOCK:
+        _PROVIDERS.clear()
+
+
+def prebuild_provider_clients() -> None:
+    """Build the configured provider and its per-model clients at startup.
+
+    This moves SDK import and client construction off the first request; no connection or
+    TLS handshake happens until a model is actually called.
+    """
+    settings = get_settings()
+    if not settings.llm_enabled:
+        return
+    models = {settings.llm_cheap_model, settings.llm_default_model, settings.llm_expensive_model}
+    try:
+        get_provider().prebuild_clients(models)
+    except (RuntimeError, ValueError) as exc:
+        # Misconfiguration still surfaces per request as a provider error; startup goes on.
+        logger.warning("LLM provider client setup failed", extra={"error": str(exc)})
+
+
 def persist_ledger(
     *,
     request_id: str | None,
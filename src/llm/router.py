@@ -4,11 +4,12 @@ from datetime import UTC, datetime
 import json
 
 from src.core.settings import get_settings
+from src.db.executor import run_db
 from src.llm.providers import (
     LlmPrompt,
     LlmProviderConfigurationError,
+    get_provider,
     persist_ledger,
-    provider_from_env,
 )
 from src.llm.types import LlmCallResult
 from src.storage.repositories import get_global_spend_usd_since, get_request_spend_usd
@@ -56,16 +57,16 @@ class ModelRouter:
                 f"${self.settings.llm_max_usd_per_day:.4f}"
             )
 
-    def call(
+    def _prepare(
         self,
         *,
         request_id: str,
-        app: str,
         task: str,
         system_prompt: str,
         user_prompt: str,
-        prefer_expensive: bool = False,
-    ) -> LlmCallResult:
+        prefer_expensive: bool,
+    ) -> str:
+        """Pick the model and enforce the kill switch and budgets before a provider call."""
         model = (
             self.settings.llm_expensive_model if prefer_expensive else self.settings.llm_cheap_model
         )
@@ -84,10 +85,49 @@ class ModelRouter:
 
         if self.provider is None:
             try:
-                self.provider = provider_from_env()
+                self.provider = get_provider()
             except Exception as exc:
                 raise LlmProviderError(f"Failed to initialize LLM provider: {exc}") from exc
+        return model
 
+    def _record(
+        self,
+        *,
+        request_id: str,
+        app: str,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        result: LlmCallResult,
+    ) -> None:
+        persist_ledger(
+            request_id=request_id,
+            app=app,
+            result=result,
+            metadata={
+                "task": task,
+                "system_prompt_preview": system_prompt[:160],
+                "user_prompt_preview": user_prompt[:160],
+            },
+        )
+
+    def call(
+        self,
+        *,
+        request_id: str,
+        app: str,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        prefer_expensive: bool = False,
+    ) -> LlmCallResult:
+        model = self._prepare(
+            request_id=request_id,
+            task=task,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            prefer_expensive=prefer_expensive,
+        )
         try:
             result = self.provider.call(
                 model=model, prompt=LlmPrompt(system=system_prompt, user=user_prompt)
@@ -97,15 +137,52 @@ class ModelRouter:
         except Exception as exc:
             raise LlmProviderError(f"LLM provider call failed: {exc}") from exc
 
-        persist_ledger(
+        self._record(
             request_id=request_id,
             app=app,
+            task=task,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            result=result,
+        )
+        return result
+
+    async def acall(
+        self,
+        *,
+        request_id: str,
+        app: str,
+        task: str,
+        system_prompt: str,
+        user_prompt: str,
+        prefer_expensive: bool = False,
+    ) -> LlmCallResult:
+        """Async ``call``: the provider is awaited; budget and ledger reads run on the db pool."""
+        model = await run_db(
+            self._prepare,
+            request_id=request_id,
+            task=task,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            prefer_expensive=prefer_expensive,
+        )
+        try:
+            result = await self.provider.acall(
+                model=model, prompt=LlmPrompt(system=system_prompt, user=user_prompt)
+            )
+        except LlmProviderConfigurationError as exc:
+            raise LlmProviderError(str(exc)) from exc
+        except Exception as exc:
+            raise LlmProviderError(f"LLM provider call failed: {exc}") from exc
+
+        await run_db(
+            self._record,
+            request_id=request_id,
+            app=app,
+            task=task,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
             result=result,
-            metadata={
-                "task": task,
-                "system_prompt_preview": system_prompt[:160],
-                "user_prompt_preview": user_prompt[:160],
-            },
         )
         return result
 
@@ -1,23 +1,62 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.core.logging import configure_logging
+from src.core.logging import configure_logging, get_logger
 from src.core.middleware import RequestIdMiddleware
 from src.core.settings import get_settings
+from src.db.executor import run_db
 from src.db.init_db import init_db
+from src.llm.providers import prebuild_provider_clients
+from src.routers.admin import router as admin_router
 from src.routers.ask import router as ask_router
 from src.routers.dataset import router as dataset_router
 from src.routers.health import router as health_router
 from src.routers.upload import router as upload_router
 from src.routers.voice import router as voice_router
+from src.services.query_stats_service import flush_query_stats
 
 settings = get_settings()
 configure_logging()
 init_db()
+prebuild_provider_clients()
+
+
+logger = get_logger(__name__)
+
+
+async def _flush_query_stats_every(seconds: float) -> None:
+    while True:
+        await asyncio.sleep(seconds)
+        try:
+            await run_db(flush_query_stats)
+        except Exception:
+            logger.exception("Periodic query stats flush failed")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Buffered query stats reach the table on a timer and at shutdown, so a quiet worker
+    # does not sit on them until its batch fills.
+    interval = get_settings().query_stats_flush_seconds
+    flusher = asyncio.create_task(_flush_query_stats_every(interval)) if interval > 0 else None
+    try:
+        yield
+    finally:
+        if flusher is not None:
+            flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await flusher
+        flush_query_stats()
+
 
-app = FastAPI(title=settings.app_name)
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 app.add_middleware(RequestIdMiddleware)
 app.add_middleware(
     CORSMiddleware,
@@ -40,3 +79,4 @@ app.include_router(upload_router)
 app.include_router(dataset_router)
 app.include_router(ask_router)
 app.include_router(voice_router)
+app.include_router(admin_router)
@@ -3,17 +3,30 @@ from __future__ import annotations
 from typing import Any, Literal, NotRequired, TypedDict
 
 
+class FusedOutput(TypedDict):
+    label: str
+    pattern: str
+    columns: list[str]
+
+
 class PlannedAnalysis(TypedDict):
     name: str
     description: str
     sql_label: str
     sql: str
+    estimated_cost: NotRequired[float | None]
+    outputs: NotRequired[list[FusedOutput]]
+    trusted: NotRequired[bool]
+    params: NotRequired[dict[str, Any]]
+    binding: NotRequired[dict[str, Any]]
 
 
 class ExecutedResult(TypedDict):
     label: str
     sql: str
-    rows: list[dict[str, Any]]
+    columns: list[str]
+    values: list[list[Any]]
+    row_count: int
 
 
 class ValidationOutcome(TypedDict):
@@ -55,3 +68,4 @@ class AgentState(TypedDict):
     confidence: dict[str, Any]
     cost_trace: CostTrace
     status: NotRequired[str]
+    approximate: NotRequired[bool]
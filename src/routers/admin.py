@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, Query
+
+from src.core.settings import get_settings
+from src.schemas.api import QueryStatsResponse, QueryStatSummary
+from src.services.query_stats_service import top_query_offenders
+from src.storage.repositories import QUERY_STAT_ORDERINGS
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _require_admin(token: str | None) -> None:
+    expected = get_settings().admin_api_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/query-stats", response_model=QueryStatsResponse)
+def query_stats(
+    limit: int = Query(default=20, ge=1, le=200),
+    order_by: str = Query(default="total_duration_ms"),
+    x_admin_token: str | None = Header(default=None),
+) -> QueryStatsResponse:
+    """Most expensive recorded queries.
+
+    Stats are buffered per worker process and written every ``QUERY_STATS_FLUSH_SECONDS``.
+    With several workers, only the serving worker's buffer is flushed first, so the last
+    interval of the other workers' queries may be missing; a crashed worker loses its buffer.
+    """
+    _require_admin(x_admin_token)
+    if order_by not in QUERY_STAT_ORDERINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"order_by must be one of: {', '.join(sorted(QUERY_STAT_ORDERINGS))}",
+        )
+
+    offenders = top_query_offenders(limit=limit, order_by=order_by)
+    return QueryStatsResponse(
+        order_by=order_by,
+        queries=[QueryStatSummary.model_validate(item) for item in offenders],
+    )
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import uuid
 
 from fastapi import APIRouter, HTTPException, Request
 
-from src.agents.ask_graph import run_ask_pipeline
+from src.agents.ask_graph import arun_ask_pipeline
 from src.core.logging import get_logger
 from src.core.settings import get_settings
+from src.db.executor import run_db
 from src.llm.router import LlmBudgetExceededError, LlmDisabledError, LlmProviderError
 from src.schemas.api import AskRequest, AskResponse
 from src.services.ask_cache_service import (
@@ -20,14 +23,33 @@ from src.services.rate_limit_service import (
     get_request_client_ip,
 )
 from src.services.request_log_service import log_ask_request
+from src.services.sql.deadline import (
+    cancel_request_deadline,
+    release_request_deadline,
+    start_request_deadline,
+)
 from src.storage.repositories import get_dataset_meta
 
 router = APIRouter(tags=["ask"])
 logger = get_logger(__name__)
 
+_DISCONNECT_POLL_SECONDS = 0.25
+
+
+async def _cancel_on_disconnect(request: Request, request_id: str, done: asyncio.Event) -> None:
+    # Stopped via ``done`` rather than task.cancel(): is_disconnected() runs inside an anyio
+    # cancel scope that can swallow an outside cancellation and leave the watcher polling.
+    while not done.is_set():
+        if await request.is_disconnected():
+            logger.info("Client disconnected; cancelling queries", extra={"request_id": request_id})
+            cancel_request_deadline(request_id)
+            return
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(done.wait(), timeout=_DISCONNECT_POLL_SECONDS)
+
 
 @router.post("/ask", response_model=AskResponse)
-def ask(payload: AskRequest, request: Request) -> AskResponse:
+async def ask(payload: AskRequest, request: Request) -> AskResponse:
     settings = get_settings()
     client_ip = get_request_client_ip(request)
     try:
@@ -51,22 +73,37 @@ def ask(payload: AskRequest, request: Request) -> AskResponse:
         ) from exc
 
     request_id = getattr(request.state, "request_id", None) or str(uuid.uuid4())
-    dataset_meta = get_dataset_meta()
+    start_request_deadline(request_id, settings.query_request_timeout_seconds)
+    done = asyncio.Event()
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, request_id, done))
+    try:
+        return await _answer_question(payload, request_id)
+    finally:
+        done.set()
+        await watcher
+        release_request_deadline(request_id)
+
+
+async def _answer_question(payload: AskRequest, request_id: str) -> AskResponse:
+    settings = get_settings()
+    dataset_meta = await run_db(get_dataset_meta)
     cache_key = build_ask_cache_key(
         question=payload.question,
         dataset_id=dataset_meta["dataset_id"] if dataset_meta else None,
         clarifications=payload.clarifications,
+        approximate=payload.approximate,
     )
-    cached_response = get_cached_ask_response(cache_key)
+    cached_response = await run_db(get_cached_ask_response, cache_key)
     if cached_response is not None:
         return AskResponse.model_validate(cached_response)
 
     try:
-        result = run_ask_pipeline(
+        result = await arun_ask_pipeline(
             question=payload.question,
             conversation_id=payload.conversation_id,
             clarifications=payload.clarifications,
             request_id=request_id,
+            approximate=payload.approximate,
         )
     except LlmBudgetExceededError as exc:
         raise HTTPException(status_code=429, detail=str(exc)) from exc
@@ -92,7 +129,8 @@ def ask(payload: AskRequest, request: Request) -> AskResponse:
         answer=response_answer,
     )
 
-    log_ask_request(
+    await run_db(
+        log_ask_request,
         request_id=result["request_id"],
         conversation_id=result["conversation_id"],
         question=payload.question,
@@ -103,7 +141,8 @@ def ask(payload: AskRequest, request: Request) -> AskResponse:
     )
 
     if not needs_clarification and response.answer is not None:
-        set_cached_ask_response(
+        await run_db(
+            set_cached_ask_response,
             cache_key=cache_key,
             payload=response.model_dump(mode="json"),
             ttl_seconds=settings.ask_cache_ttl_seconds,
@@ -54,6 +54,7 @@ class AnswerPayload(BaseModel):
     confidence: Confidence
     diagnostics: list[Diagnostic] = Field(default_factory=list)
     cost: CostSummary
+    approximate: bool = False
 
 
 class ClarificationQuestion(BaseModel):
@@ -67,6 +68,7 @@ class AskRequest(BaseModel):
     question: str
     conversation_id: str | None = None
     clarifications: dict[str, Any] | None = None
+    approximate: bool = False
 
 
 class AskResponse(BaseModel):
@@ -139,3 +141,23 @@ class RequestRecord(BaseModel):
     diagnostics: list[dict[str, Any]]
     response: dict[str, Any] | None
     created_at: datetime
+
+
+class QueryStatSummary(BaseModel):
+    sql_hash: str
+    pattern: str | None = None
+    label: str | None = None
+    sql: str
+    executions: int
+    failures: int
+    total_duration_ms: float
+    avg_duration_ms: float
+    max_duration_ms: float
+    avg_row_count: float
+    max_vm_steps: int
+    last_seen_at: datetime
+
+
+class QueryStatsResponse(BaseModel):
+    order_by: str
+    queries: list[QueryStatSummary] = Field(default_factory=list)
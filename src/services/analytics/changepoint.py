@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from src.services.sql.columnar import ColumnarResult, columnar_from_tuples
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - fallback in environments without numpy
+    np = None
+
+CHANGE_POINT_COLUMNS = [
+    "dt",
+    "level_before",
+    "level_after",
+    "magnitude",
+    "slope_before",
+    "slope_after",
+]
+MIN_SEGMENT_DAYS = 7
+MAX_CHANGE_POINTS = 20
+
+
+class _PrefixSums:
+    """Prefix sums of 1, x, y, x², xy, y² so any segment's least-squares line is O(1)."""
+
+    def __init__(self, x: Any, y: Any) -> None:
+        stacked = np.vstack([np.ones_like(x), x, y, x * x, x * y, y * y])
+        self.sums = np.concatenate([np.zeros((6, 1)), np.cumsum(stacked, axis=1)], axis=1)
+
+    def segment(self, start: Any, end: Any) -> Any:
+        return self.sums[:, end] - self.sums[:, start]
+
+
+def _fit(stats: Any) -> tuple[Any, Any, Any]:
+    """Slope, intercept and residual sum of squares of the least-squares line per segment."""
+    n, sx, sy, sxx, sxy, syy = stats
+    var_x = sxx - sx * sx / n
+    cov = sxy - sx * sy / n
+    var_y = syy - sy * sy / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(var_x > 0, cov / var_x, 0.0)
+        sse = np.where(var_x > 0, var_y - cov * slope, var_y)
+    intercept = (sy - slope * sx) / n
+    return slope, intercept, np.maximum(sse, 0.0)
+
+
+def _noise_variance(y: Any) -> float:
+    # Second differences cancel any piecewise-linear trend; for white noise their variance is
+    # 6σ², and the MAD keeps the few differences spanning a break from inflating it.
+    curvature = np.diff(y, n=2)
+    if curvature.size == 0:
+        return 0.0
+    mad = np.median(np.abs(curvature - np.median(curvature)))
+    return float((1.4826 * mad) ** 2 / 6)
+
+
+def detect_change_points(
+    x: Any,
+    y: Any,
+    *,
+    min_size: int = MIN_SEGMENT_DAYS,
+    max_points: int = MAX_CHANGE_POINTS,
+) -> list[int]:
+    """Binary segmentation of a piecewise-linear series; returns sorted break indices.
+
+    Every candidate split of a segment is scored in one vectorized pass over prefix sums, so
+    a series of n points costs O(n log n). A split is kept when it lowers the residual sum
+    of squares by more than a BIC-style penalty of ``4 σ² log n`` (level and slope change).
+    """
+    n = len(y)
+    if n < 2 * min_size:
+        return []
+    sums = _PrefixSums(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    penalty = 4 * _noise_variance(np.asarray(y, dtype=np.float64)) * np.log(n)
+
+    def best_split(start: int, end: int) -> tuple[float, int] | None:
+        if end - start < 2 * min_size:
+            return None
+        splits = np.arange(start + min_size, end - min_size + 1)
+        whole = _fit(sums.segment(np.array([start]), np.array([end])))[2][0]
+        left = _fit(sums.segment(np.full(splits.size, start), splits))[2]
+        right = _fit(sums.segment(splits, np.full(splits.size, end)))[2]
+        gains = whole - left - right
+        pick = int(np.argmax(gains))
+        return float(gains[pick]), int(splits[pick])
+
+    breaks: list[int] = []
+    candidates = {(0, n): best_split(0, n)}
+    while len(breaks) < max_points:
+        # Split the segment with the largest gain first, so ``max_points`` keeps the strongest.
+        scored = [(found, segment) for segment, found in candidates.items() if found is not None]
+        if not scored:
+            break
+        (gain, split), (start, end) = max(scored, key=lambda item: item[0][0])
+        if gain <= max(penalty, 1e-12):
+            break
+        del candidates[(start, end)]
+        candidates[(start, split)] = best_split(start, split)
+        candidates[(split, end)] = best_split(split, end)
+        breaks.append(split)
+    return sorted(breaks)
+
+
+def change_point_rows(days: Any, values: Any) -> ColumnarResult:
+    """Describe every detected break by the fitted lines on either side of it."""
+    present = ~np.isnan(values)
+    days, values = days[present], values[present]
+    if days.size == 0:
+        return columnar_from_tuples(CHANGE_POINT_COLUMNS, [])
+    x = (days - days[0]).astype(np.float64)
+    breaks = detect_change_points(x, values)
+    sums = _PrefixSums(x, values)
+    bounds = [0, *breaks, len(values)]
+    slopes, intercepts, _ = _fit(sums.segment(np.array(bounds[:-1]), np.array(bounds[1:])))
+
+    rows = []
+    for position, split in enumerate(breaks):
+        at = x[split]
+        before = slopes[position] * at + intercepts[position]
+        after = slopes[position + 1] * at + intercepts[position + 1]
+        rows.append(
+            (
+                date.fromordinal(int(days[split])).isoformat(),
+                float(before),
+                float(after),
+                float(after - before),
+                float(slopes[position]),
+                float(slopes[position + 1]),
+            )
+        )
+    return columnar_from_tuples(CHANGE_POINT_COLUMNS, rows)
+
+
+def change_points_from_series(result: ColumnarResult) -> ColumnarResult:
+    """Turn a ``(dt, metric_value)`` daily series result into its change points."""
+    columns = result["columns"]
+    dts = result["values"][columns.index("dt")]
+    metric = result["values"][columns.index("metric_value")]
+    days = np.array([date.fromisoformat(str(value)[:10]).toordinal() for value in dts])
+    values = np.array([np.nan if value is None else value for value in metric], dtype=np.float64)
+    order = np.argsort(days, kind="stable")
+    return change_point_rows(days[order], values[order])
+
+
+def change_points_available() -> bool:
+    return np is not None
+
+
+# Results of these labels are raw series that are reduced in-process after execution.
+SERIES_POSTPROCESSORS: dict[str, Any] = {"Trend change points": change_points_from_series}
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Final
+
+WORD_RE = re.compile(r"[a-zA-Z0-9_]+")
+
+_LOCK: Final = threading.Lock()
+_MATCHERS: dict[str, ColumnMatcher] = {}
+
+# Key marking the end of an alias in the token trie.
+_END = ""
+
+
+def question_tokens(text: str) -> list[str]:
+    return [token.lower() for token in WORD_RE.findall(text)]
+
+
+def build_column_aliases(columns: list[str]) -> dict[str, str]:
+    """Map every spelling a question may use for a column to the column.
+
+    Aliases are space-separated token phrases: the slug itself (``order_value``) and its
+    de-slugified words (``order value``). The first column claiming an alias keeps it.
+    """
+    aliases: dict[str, str] = {}
+    for column in columns:
+        lowered = column.lower()
+        for alias in (lowered, " ".join(part for part in lowered.split("_") if part)):
+            if alias:
+                aliases.setdefault(alias, column)
+    return aliases
+
+
+@dataclass(frozen=True)
+class QuestionScan:
+    tokens: tuple[str, ...]
+    mentions: tuple[str, ...]
+
+    @property
+    def token_set(self) -> frozenset[str]:
+        return frozenset(self.tokens)
+
+
+class ColumnMatcher:
+    """Token trie over column aliases; one left-to-right pass finds every mention.
+
+    At each token the longest alias starting there wins, so ``order value`` beats ``order``
+    and mentions never match inside a word (``update`` does not mention ``date``).
+    """
+
+    def __init__(self, aliases: dict[str, str]) -> None:
+        self._trie: dict[str, Any] = {}
+        for alias, column in aliases.items():
+            node = self._trie
+            for token in alias.split(" "):
+                node = node.setdefault(token, {})
+            node[_END] = column
+        # Graph nodes and planners scan the same question several times per request.
+        self.scan = lru_cache(maxsize=64)(self._scan)
+
+    def _scan(self, question: str) -> QuestionScan:
+        tokens = question_tokens(question)
+        mentions: list[str] = []
+        position = 0
+        while position < len(tokens):
+            node = self._trie
+            match: tuple[str, int] | None = None
+            for offset in range(position, len(tokens)):
+                node = node.get(tokens[offset])
+                if node is None:
+                    break
+                if _END in node:
+                    match = (node[_END], offset + 1)
+            if match is None:
+                position += 1
+                continue
+            column, position = match
+            if column not in mentions:
+                mentions.append(column)
+        return QuestionScan(tokens=tuple(tokens), mentions=tuple(mentions))
+
+
+def clear_column_matchers() -> None:
+    with _LOCK:
+        _MATCHERS.clear()
+
+
+def get_column_matcher(dataset_meta: dict[str, Any]) -> ColumnMatcher:
+    """Return the dataset's matcher, built from the aliases stored at ingest on first use."""
+    dataset_id = dataset_meta.get("dataset_id")
+    with _LOCK:
+        matcher = _MATCHERS.get(dataset_id) if dataset_id else None
+    if matcher is not None:
+        return matcher
+
+    aliases = (dataset_meta.get("profile") or {}).get("column_aliases")
+    matcher = ColumnMatcher(aliases or build_column_aliases(dataset_meta["columns"]))
+    if dataset_id:
+        with _LOCK:
+            for stale in [existing for existing in _MATCHERS if existing != dataset_id]:
+                del _MATCHERS[stale]
+            _MATCHERS[dataset_id] = matcher
+    return matcher
@@ -1,17 +1,29 @@
 from __future__ import annotations
 
 import json
-import re
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
 
+from src.core.settings import get_settings
+from src.db.executor import run_db
 from src.llm.router import ModelRouter, try_parse_json
+from src.llm.types import LlmCallResult
+from src.services.analytics.column_matcher import get_column_matcher
 from src.services.analytics.helpers import pick_metric_column, pick_time_column
 from src.services.analytics.planner import plan_analyses
+from src.services.analytics.schema_prompt import compact_schema
+from src.services.analytics.structured_queries import (
+    STRUCTURED_PATTERNS,
+    build_structured_query,
+)
+from src.services.dataset_service import derived_reference_tables, derived_row_counts
+from src.services.plan_cache_service import get_cached_plan, store_plan
+from src.services.rollup_service import CUBE_COLUMNS, dataset_cube
+from src.services.sketch_service import dataset_sketches
+from src.services.sql.cost import estimate_query_cost
 from src.services.sql.validator import validate_safe_select, validate_sql_references
 
-WORD_RE = re.compile(r"[a-zA-Z0-9_]+")
-
 
 @dataclass
 class PlannerCost:
@@ -21,15 +33,6 @@ class PlannerCost:
     usd: float
 
 
-def _tokenize(text: str) -> set[str]:
-    return {token.lower() for token in WORD_RE.findall(text.lower())}
-
-
-def _mentioned_columns(question: str, columns: list[str]) -> list[str]:
-    lowered = question.lower()
-    return [column for column in columns if column.lower() in lowered]
-
-
 def _build_frequency_query(table_name: str, column: str, limit: int = 20) -> dict[str, str]:
     sql = f"""
 SELECT
@@ -57,13 +60,53 @@ def _build_numeric_aggregate_query(table_name: str, column: str, aggregate: str)
     }
 
 
-def build_heuristic_queries(question: str, dataset_meta: dict[str, Any]) -> list[dict[str, str]]:
+def _build_sketch_frequency_query(
+    sketches: dict[str, Any], column: str, limit: int = 20
+) -> dict[str, str]:
+    sql = f"""
+SELECT value, frequency, max_error
+FROM "{sketches["heavy_hitters_table"]}"
+WHERE column_name = '{column}'
+ORDER BY frequency DESC, value ASC
+LIMIT {limit}
+""".strip()
+    return {
+        "label": f"Most common values for {column}",
+        "sql": sql,
+        "pattern": "heuristic_frequency",
+    }
+
+
+def _build_distinct_count_query(
+    table_name: str, column: str, sketches: dict[str, Any] | None
+) -> dict[str, str]:
+    if sketches and column in sketches["columns"]:
+        sql = (
+            f'SELECT distinct_estimate AS distinct_values, distinct_exact FROM "{sketches["table"]}" '
+            f"WHERE column_name = '{column}'"
+        )
+    else:
+        sql = f'SELECT COUNT(DISTINCT "{column}") AS distinct_values FROM "{table_name}"'
+    return {
+        "label": f"Distinct values of {column}",
+        "sql": sql,
+        "pattern": "heuristic_distinct",
+    }
+
+
+def build_heuristic_queries(question: str, dataset_meta: dict[str, Any]) -> list[dict[str, Any]]:
     table_name = dataset_meta["table_name"]
-    columns = dataset_meta["columns"]
     schema = dataset_meta["schema"]
 
-    tokens = _tokenize(question)
-    mentioned = _mentioned_columns(question, columns)
+    structured = build_structured_query(question, dataset_meta)
+    if structured is not None:
+        return [structured]
+
+    sketches = dataset_sketches(dataset_meta)
+
+    scan = get_column_matcher(dataset_meta).scan(question)
+    tokens = scan.token_set
+    mentioned = list(scan.mentions)
 
     text_columns = [column for column, kind in schema.items() if kind == "TEXT"]
     numeric_columns = [column for column, kind in schema.items() if kind in {"INTEGER", "REAL"}]
@@ -81,8 +124,17 @@ def build_heuristic_queries(question: str, dataset_meta: dict[str, Any]) -> list
         if target is None and len(text_columns) == 1:
             target = text_columns[0]
         if target is not None:
+            if sketches and target in sketches["columns"]:
+                return [_build_sketch_frequency_query(sketches, target)]
             return [_build_frequency_query(table_name, target)]
 
+    if tokens.intersection({"distinct", "unique", "cardinality"}):
+        target = mentioned[0] if mentioned else None
+        if target is None and len(text_columns) == 1:
+            target = text_columns[0]
+        if target is not None:
+            return [_build_distinct_count_query(table_name, target, sketches)]
+
     agg_map = {
         "average": "avg",
         "mean": "avg",
@@ -114,32 +166,51 @@ def build_heuristic_queries(question: str, dataset_meta: dict[str, Any]) -> list
     return []
 
 
-def _question_needs_advanced_planning(question: str) -> bool:
-    lowered = question.lower()
-    advanced_markers = [
-        " by ",
-        " over ",
-        " trend",
-        "compare",
-        "versus",
-        " vs ",
-        "breakdown",
-        "why",
-        "driver",
-    ]
-    return any(marker in lowered for marker in advanced_markers)
+_ADVANCED_TOKENS = frozenset({"versus", "vs", "why"})
+_ADVANCED_PREFIXES = ("compar", "driver")
+# Grouping and series wording that a structured heuristic query already answers.
+_STRUCTURAL_TOKENS = frozenset({"by", "over"})
+_STRUCTURAL_PREFIXES = ("trend", "breakdown")
+
+
+def _question_needs_advanced_planning(tokens: tuple[str, ...], *, structured: bool = False) -> bool:
+    if any(token in _ADVANCED_TOKENS or token.startswith(_ADVANCED_PREFIXES) for token in tokens):
+        return True
+    return not structured and any(
+        token in _STRUCTURAL_TOKENS or token.startswith(_STRUCTURAL_PREFIXES) for token in tokens
+    )
 
 
 def _build_llm_prompt_payload(
     question: str, dataset_meta: dict[str, Any], clarifications: dict[str, Any]
 ) -> dict[str, Any]:
-    return {
+    settings = get_settings()
+    payload = {
         "question": question,
         "table_name": dataset_meta["table_name"],
-        "columns": dataset_meta["columns"],
-        "schema": dataset_meta["schema"],
+        **compact_schema(
+            dataset_meta,
+            get_column_matcher(dataset_meta).scan(question),
+            max_columns=settings.llm_prompt_max_columns,
+            sample_values=settings.llm_prompt_sample_values,
+        ),
         "clarifications": clarifications,
     }
+    cube = dataset_cube(dataset_meta)
+    if cube:
+        payload["rollup_table"] = {
+            "table_name": cube["table"],
+            "columns": CUBE_COLUMNS,
+            "time_column": cube["time_column"],
+            "grains": cube["grains"],
+            "dimensions": cube["dimensions"],
+            "metrics": cube["metrics"],
+            "notes": (
+                "One row per (grain, bucket, dimension, segment, metric); bucket is the period "
+                "start date. dimension = segment = '(all)' holds totals."
+            ),
+        }
+    return payload
 
 
 def _extract_llm_queries(parsed: dict[str, Any]) -> list[dict[str, str]]:
@@ -159,9 +230,9 @@ def _extract_llm_queries(parsed: dict[str, Any]) -> list[dict[str, str]]:
     return output
 
 
-def _dedupe_queries(queries: list[dict[str, str]]) -> list[dict[str, str]]:
+def _dedupe_queries(queries: list[dict[str, Any]]) -> list[dict[str, Any]]:
     seen: set[str] = set()
-    output: list[dict[str, str]] = []
+    output: list[dict[str, Any]] = []
     for query in queries:
         normalized = " ".join(query["sql"].split()).strip().lower()
         if normalized in seen:
@@ -171,18 +242,37 @@ def _dedupe_queries(queries: list[dict[str, str]]) -> list[dict[str, str]]:
     return output
 
 
+def _cost_exceeded_diagnostic(label: str, cost: float, max_cost: float) -> dict[str, str]:
+    return {
+        "code": "QUERY_COST_EXCEEDED",
+        "message": f"{label}: estimated {cost:,.0f} row visits exceeds the {max_cost:,.0f} budget.",
+    }
+
+
 def _validate_queries(
-    queries: list[dict[str, str]],
+    queries: list[dict[str, Any]],
     *,
     table_name: str,
     columns: list[str],
-) -> tuple[list[dict[str, str]], list[dict[str, str]]]:
-    valid: list[dict[str, str]] = []
+    row_counts: dict[str, int],
+    extra_tables: dict[str, list[str]] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]]]:
+    max_cost = get_settings().query_max_estimated_cost
+    valid: list[dict[str, Any]] = []
     diagnostics: list[dict[str, str]] = []
 
     for query in queries:
-        safe = validate_safe_select(query["sql"])
-        if not safe.is_valid:
+        if query.get("prevalidated"):
+            # Compiled pattern templates were validated and costed once per schema binding.
+            cost = query.get("estimated_cost")
+            if cost is not None and cost > max_cost:
+                diagnostics.append(_cost_exceeded_diagnostic(query["label"], cost, max_cost))
+            else:
+                valid.append(query)
+            continue
+
+        safe = validate_safe_select(query["sql"]) if not query.get("trusted") else None
+        if safe is not None and not safe.is_valid:
             diagnostics.append(
                 {
                     "code": "UNSAFE_SQL_PLAN",
@@ -191,7 +281,12 @@ def _validate_queries(
             )
             continue
 
-        refs = validate_sql_references(query["sql"], table_name=table_name, allowed_columns=columns)
+        refs = validate_sql_references(
+            query["sql"],
+            table_name=table_name,
+            allowed_columns=columns,
+            extra_tables=extra_tables,
+        )
         if not refs.is_valid:
             diagnostics.append(
                 {
@@ -201,11 +296,46 @@ def _validate_queries(
             )
             continue
 
-        valid.append(query)
+        estimate = estimate_query_cost(
+            query["sql"], row_counts=row_counts, params=query.get("params")
+        )
+        if estimate.cost is not None and estimate.cost > max_cost:
+            diagnostics.append(_cost_exceeded_diagnostic(query["label"], estimate.cost, max_cost))
+            continue
+
+        valid.append({**query, "estimated_cost": estimate.cost})
 
     return valid, diagnostics
 
 
+def _validate_for_dataset(
+    queries: list[dict[str, Any]], dataset_meta: dict[str, Any]
+) -> tuple[list[dict[str, Any]], list[dict[str, str]]]:
+    return _validate_queries(
+        queries,
+        table_name=dataset_meta["table_name"],
+        columns=dataset_meta["columns"],
+        row_counts={
+            dataset_meta["table_name"]: int(dataset_meta.get("rows") or 0),
+            **derived_row_counts(dataset_meta),
+        },
+        extra_tables=derived_reference_tables(dataset_meta),
+    )
+
+
+def _cost_summary_diagnostic(queries: list[dict[str, Any]]) -> dict[str, str] | None:
+    costs = [query["estimated_cost"] for query in queries if query.get("estimated_cost")]
+    if not costs:
+        return None
+    return {
+        "code": "QUERY_COST_ESTIMATE",
+        "message": (
+            f"Estimated plan cost: {sum(costs):,.0f} row visits across {len(costs)} queries "
+            f"(max {max(costs):,.0f})."
+        ),
+    }
+
+
 def _include_prebuilt_patterns(question: str) -> bool:
     lowered = question.lower()
     markers = [
@@ -224,22 +354,42 @@ def _include_prebuilt_patterns(question: str) -> bool:
     return any(marker in lowered for marker in markers)
 
 
-def build_hybrid_query_plan(
+_PLANNER_SYSTEM_PROMPT = (
+    "You are a SQL planning assistant for SQLite. Given a user question and a table schema, "
+    'return JSON: {"queries":[{"label":string,"sql":string}]}. '
+    "Rules: use ONLY SELECT/CTE statements; use ONLY provided table and columns; "
+    "prefer 1-3 queries; include aggregation/grouping when needed; quote identifiers with double quotes; "
+    "for raw rows include LIMIT <= 200. schema maps the most relevant columns to their "
+    "type, with example values for categorical columns. When a rollup_table is "
+    "provided, prefer it for day/week/month aggregates instead of scanning the raw table."
+)
+
+
+@dataclass
+class _PlanDraft:
+    """Deterministic part of a plan; ``user_prompt`` is set when the LLM planner must run."""
+
+    planned: list[dict[str, Any]]
+    diagnostics: list[dict[str, str]]
+    llm_queries: list[dict[str, str]]
+    user_prompt: str | None = None
+
+
+def _draft_plan(
     *,
-    router: ModelRouter,
-    request_id: str,
     question: str,
     dataset_meta: dict[str, Any],
     clarifications: dict[str, Any],
     intent: dict[str, Any],
     max_queries: int,
-) -> tuple[list[dict[str, str]], list[dict[str, str]], PlannerCost | None]:
+) -> _PlanDraft:
     diagnostics: list[dict[str, str]] = []
-    planned: list[dict[str, str]] = []
-    planner_cost: PlannerCost | None = None
+    planned: list[dict[str, Any]] = []
 
+    # Heuristic and pattern SQL is generated here from ingest-slugified identifiers, so it is
+    # marked trusted and skips the parser-based safety walk (the read-only engine guard remains).
     heuristic_queries = build_heuristic_queries(question, dataset_meta)
-    planned.extend(heuristic_queries)
+    planned.extend({**query, "trusted": True} for query in heuristic_queries)
 
     if _include_prebuilt_patterns(question):
         normalized_intent = dict(intent)
@@ -251,55 +401,114 @@ def build_hybrid_query_plan(
             normalized_intent["time_column"] = pick_time_column(
                 dataset_meta["columns"], clarifications.get("time_column")
             )
-        pattern_queries, pattern_diagnostics, _ = plan_analyses(dataset_meta, normalized_intent)
-        planned.extend(pattern_queries)
+        pattern_queries, pattern_diagnostics, _ = plan_analyses(
+            dataset_meta,
+            normalized_intent,
+            max_queries=max(max_queries - len(planned), 0),
+        )
+        planned.extend({**query, "trusted": True} for query in pattern_queries)
         diagnostics.extend(pattern_diagnostics)
 
-    should_use_llm = _question_needs_advanced_planning(question) or not planned
-    if should_use_llm:
-        llm = router.call(
-            request_id=request_id,
-            app="data-ghost-api",
-            task="plan_sql_queries",
-            system_prompt=(
-                "You are a SQL planning assistant for SQLite. Given a user question and a table schema, "
-                'return JSON: {"queries":[{"label":string,"sql":string}]}. '
-                "Rules: use ONLY SELECT/CTE statements; use ONLY provided table and columns; "
-                "prefer 1-3 queries; include aggregation/grouping when needed; quote identifiers with double quotes; "
-                "for raw rows include LIMIT <= 200."
-            ),
-            user_prompt=json.dumps(
-                _build_llm_prompt_payload(question, dataset_meta, clarifications)
-            ),
-            prefer_expensive=False,
+    scan = get_column_matcher(dataset_meta).scan(question)
+    structured = any(query["pattern"] in STRUCTURED_PATTERNS for query in heuristic_queries)
+    should_use_llm = (
+        _question_needs_advanced_planning(scan.tokens, structured=structured) or not planned
+    )
+    if not should_use_llm:
+        return _PlanDraft(planned, diagnostics, [])
+
+    settings = get_settings()
+    cached_plan = get_cached_plan(
+        dataset_meta=dataset_meta,
+        question=question,
+        clarifications=clarifications,
+        ttl_seconds=settings.plan_cache_ttl_seconds,
+        min_similarity=settings.plan_reuse_min_similarity,
+    )
+    if cached_plan is None:
+        # Validate and cost the deterministic SQL now, so only queries within the cost budget
+        # are handed out for speculative execution; the final pass only re-checks their cost.
+        valid, plan_diagnostics = _validate_for_dataset(
+            _dedupe_queries(planned)[:max_queries], dataset_meta
+        )
+        diagnostics.extend(plan_diagnostics)
+        user_prompt = json.dumps(
+            _build_llm_prompt_payload(question, dataset_meta, clarifications),
+            separators=(",", ":"),
         )
-        planner_cost = PlannerCost(
-            model=llm.model,
-            prompt_tokens=llm.prompt_tokens,
-            completion_tokens=llm.completion_tokens,
-            usd=llm.usd,
+        return _PlanDraft(
+            [{**query, "prevalidated": True} for query in valid],
+            diagnostics,
+            [],
+            user_prompt=user_prompt,
         )
 
-        parsed = try_parse_json(llm.text)
-        llm_queries = _extract_llm_queries(parsed)
-        if not llm_queries:
-            diagnostics.append(
-                {
-                    "code": "LLM_PLAN_EMPTY",
-                    "message": "Dynamic SQL planner returned no usable queries.",
-                }
-            )
-        planned.extend(llm_queries)
+    # Reused SQL goes through the same validation as a fresh LLM plan.
+    planned.extend(cached_plan.queries)
+    if cached_plan.exact:
+        diagnostics.append(
+            {
+                "code": "PLAN_CACHE_HIT",
+                "message": "Reused a validated SQL plan for this schema and question.",
+            }
+        )
+    else:
+        diagnostics.append(
+            {
+                "code": "PLAN_REUSED",
+                "message": (
+                    f"Reused the validated SQL plan for a similar question "
+                    f"({cached_plan.question!r}, similarity {cached_plan.similarity:.2f})."
+                ),
+            }
+        )
+    return _PlanDraft(planned, diagnostics, cached_plan.queries)
 
-    planned = _dedupe_queries(planned)
-    planned = planned[:max_queries]
 
-    valid, plan_diagnostics = _validate_queries(
-        planned,
-        table_name=dataset_meta["table_name"],
-        columns=dataset_meta["columns"],
+def _apply_llm_plan(draft: _PlanDraft, llm: LlmCallResult) -> PlannerCost:
+    draft.llm_queries = _extract_llm_queries(try_parse_json(llm.text))
+    if not draft.llm_queries:
+        draft.diagnostics.append(
+            {
+                "code": "LLM_PLAN_EMPTY",
+                "message": "Dynamic SQL planner returned no usable queries.",
+            }
+        )
+    draft.planned.extend(draft.llm_queries)
+    return PlannerCost(
+        model=llm.model,
+        prompt_tokens=llm.prompt_tokens,
+        completion_tokens=llm.completion_tokens,
+        usd=llm.usd,
     )
+
+
+def _finalize_plan(
+    draft: _PlanDraft,
+    *,
+    question: str,
+    dataset_meta: dict[str, Any],
+    clarifications: dict[str, Any],
+    max_queries: int,
+    planner_cost: PlannerCost | None,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]], PlannerCost | None]:
+    diagnostics = draft.diagnostics
+    planned = _dedupe_queries(draft.planned)[:max_queries]
+
+    valid, plan_diagnostics = _validate_for_dataset(planned, dataset_meta)
     diagnostics.extend(plan_diagnostics)
+    if planner_cost is not None:
+        valid_llm = [query for query in valid if query["pattern"] == "llm_dynamic"]
+        if valid_llm and len(valid_llm) == len(draft.llm_queries):
+            store_plan(
+                dataset_meta=dataset_meta,
+                question=question,
+                clarifications=clarifications,
+                queries=valid_llm,
+            )
+    cost_summary = _cost_summary_diagnostic(valid)
+    if cost_summary is not None:
+        diagnostics.append(cost_summary)
 
     if not valid:
         diagnostics.append(
@@ -310,3 +519,92 @@ def build_hybrid_query_plan(
         )
 
     return valid, diagnostics, planner_cost
+
+
+def build_hybrid_query_plan(
+    *,
+    router: ModelRouter,
+    request_id: str,
+    question: str,
+    dataset_meta: dict[str, Any],
+    clarifications: dict[str, Any],
+    intent: dict[str, Any],
+    max_queries: int,
+    on_deterministic_plan: Callable[[list[dict[str, Any]]], None] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]], PlannerCost | None]:
+    draft = _draft_plan(
+        question=question,
+        dataset_meta=dataset_meta,
+        clarifications=clarifications,
+        intent=intent,
+        max_queries=max_queries,
+    )
+    planner_cost: PlannerCost | None = None
+    if draft.user_prompt is not None:
+        # Hand the heuristic and pattern SQL out before the model round-trip, so the caller
+        # can start executing it while the LLM plans.
+        if on_deterministic_plan is not None and draft.planned:
+            on_deterministic_plan(draft.planned)
+        llm = router.call(
+            request_id=request_id,
+            app="data-ghost-api",
+            task="plan_sql_queries",
+            system_prompt=_PLANNER_SYSTEM_PROMPT,
+            user_prompt=draft.user_prompt,
+            prefer_expensive=False,
+        )
+        planner_cost = _apply_llm_plan(draft, llm)
+
+    return _finalize_plan(
+        draft,
+        question=question,
+        dataset_meta=dataset_meta,
+        clarifications=clarifications,
+        max_queries=max_queries,
+        planner_cost=planner_cost,
+    )
+
+
+async def abuild_hybrid_query_plan(
+    *,
+    router: ModelRouter,
+    request_id: str,
+    question: str,
+    dataset_meta: dict[str, Any],
+    clarifications: dict[str, Any],
+    intent: dict[str, Any],
+    max_queries: int,
+    on_deterministic_plan: Callable[[list[dict[str, Any]]], None] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]], PlannerCost | None]:
+    """Async ``build_hybrid_query_plan``: SQLite phases run on the db pool, the LLM is awaited."""
+    draft = await run_db(
+        _draft_plan,
+        question=question,
+        dataset_meta=dataset_meta,
+        clarifications=clarifications,
+        intent=intent,
+        max_queries=max_queries,
+    )
+    planner_cost: PlannerCost | None = None
+    if draft.user_prompt is not None:
+        if on_deterministic_plan is not None and draft.planned:
+            on_deterministic_plan(draft.planned)
+        llm = await router.acall(
+            request_id=request_id,
+            app="data-ghost-api",
+            task="plan_sql_queries",
+            system_prompt=_PLANNER_SYSTEM_PROMPT,
+            user_prompt=draft.user_prompt,
+            prefer_expensive=False,
+        )
+        planner_cost = _apply_llm_plan(draft, llm)
+
+    return await run_db(
+        _finalize_plan,
+        draft,
+        question=question,
+        dataset_meta=dataset_meta,
+        clarifications=clarifications,
+        max_queries=max_queries,
+        planner_cost=planner_cost,
+    )
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.services.analytics.patterns.types import render_with
+from src.services.sql.columnar import ColumnarResult
+
+OUTPUT_INDEX_COLUMN = "output_index"
+OUTPUT_RANK_COLUMN = "output_rank"
+
+
+def _output_column(position: int, column: str) -> str:
+    return f"o{position}_{column}"
+
+
+def _fuse_group(members: list[dict[str, Any]]) -> dict[str, Any]:
+    ctes = list(members[0]["shared_ctes"])
+    for member in members:
+        ctes.extend(member["ctes"])
+    ctes.extend((f"fused_out_{pos}", member["body"]) for pos, member in enumerate(members, 1))
+
+    # UNION ALL does not preserve each arm's ORDER BY, so every row carries its rank within
+    # its own output and the outer query orders by (output, rank).
+    arms: list[str] = []
+    for pos, member in enumerate(members, 1):
+        window = f"ORDER BY {member['order_by']}" if member.get("order_by") else ""
+        projections = [
+            f"{pos} AS {OUTPUT_INDEX_COLUMN}",
+            f"ROW_NUMBER() OVER ({window}) AS {OUTPUT_RANK_COLUMN}",
+        ]
+        for other_pos, other in enumerate(members, 1):
+            for column in other["columns"]:
+                source = f'"{column}"' if other_pos == pos else "NULL"
+                projections.append(f'{source} AS "{_output_column(other_pos, column)}"')
+        arms.append(f"  SELECT {', '.join(projections)}\n  FROM fused_out_{pos}")
+
+    body = (
+        "SELECT * FROM (\n"
+        + "\n  UNION ALL\n".join(arms)
+        + f"\n)\nORDER BY {OUTPUT_INDEX_COLUMN}, {OUTPUT_RANK_COLUMN}"
+    )
+    patterns = list(dict.fromkeys(member["pattern"] for member in members))
+    params: dict[str, Any] = {}
+    for member in members:
+        params.update(member.get("params") or {})
+    return {
+        "label": " + ".join(member["label"] for member in members),
+        "sql": render_with(ctes, body),
+        "pattern": "+".join(patterns),
+        "params": params,
+        "outputs": [
+            {"label": member["label"], "pattern": member["pattern"], "columns": member["columns"]}
+            for member in members
+        ],
+    }
+
+
+def fuse_shared_queries(queries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge pattern queries declaring identical shared CTEs into one query evaluated once.
+
+    The fused query tags each row with ``output_index`` and its ``output_rank`` within that
+    output, and prefixes every output column, so ``split_fused_result`` can hand each original
+    label its own result in order.
+    """
+    groups: dict[tuple[tuple[str, str], ...], list[dict[str, Any]]] = {}
+    for query in queries:
+        if query.get("shared_ctes"):
+            groups.setdefault(tuple(query["shared_ctes"]), []).append(query)
+
+    fused_by_first: dict[int, dict[str, Any]] = {}
+    absorbed: set[int] = set()
+    for shared, candidates in groups.items():
+        members: list[dict[str, Any]] = []
+        names = {name for name, _ in shared}
+        for candidate in candidates:
+            private = {name for name, _ in candidate["ctes"]}
+            if private & names:
+                continue
+            names |= private
+            members.append(candidate)
+        if len(members) < 2:
+            continue
+        fused_by_first[id(members[0])] = _fuse_group(members)
+        absorbed.update(id(member) for member in members)
+
+    output: list[dict[str, Any]] = []
+    for query in queries:
+        if id(query) in fused_by_first:
+            output.append(fused_by_first[id(query)])
+        elif id(query) not in absorbed:
+            output.append(
+                {
+                    "label": query["label"],
+                    "sql": query["sql"],
+                    "pattern": query["pattern"],
+                    "params": dict(query.get("params") or {}),
+                }
+            )
+    return output
+
+
+def split_fused_result(
+    result: ColumnarResult, outputs: list[dict[str, Any]]
+) -> list[ColumnarResult]:
+    columns = result["columns"]
+    values = result["values"]
+    tags = values[columns.index(OUTPUT_INDEX_COLUMN)] if result["row_count"] else []
+    ranks = (
+        values[columns.index(OUTPUT_RANK_COLUMN)]
+        if result["row_count"] and OUTPUT_RANK_COLUMN in columns
+        else [0] * len(tags)
+    )
+
+    parts: list[ColumnarResult] = []
+    for pos, output in enumerate(outputs, 1):
+        rows = sorted(
+            (row_idx for row_idx, tag in enumerate(tags) if tag == pos),
+            key=lambda row_idx: ranks[row_idx],
+        )
+        part_values = [
+            [values[columns.index(_output_column(pos, column))][row_idx] for row_idx in rows]
+            for column in output["columns"]
+        ]
+        parts.append(
+            {"columns": list(output["columns"]), "values": part_values, "row_count": len(rows)}
+        )
+    return parts
@@ -32,3 +32,12 @@ def infer_top_n(intent: dict[str, Any], default: int = 5) -> int:
         return int(intent.get("top_n", default))
     except Exception:
         return default
+
+
+def infer_time_grain(intent: dict[str, Any]) -> str:
+    text = (intent.get("raw_question") or "").lower()
+    if "month" in text:
+        return "month"
+    if "week" in text:
+        return "week"
+    return "day"
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from src.services.analytics.column_matcher import QuestionScan
+from src.services.analytics.helpers import pick_time_column
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "twenty": 20, "thirty": 30, "fifty": 50, "hundred": 100,
+}  # fmt: skip
+_NUMBER = r"(\d+|" + "|".join(_NUMBER_WORDS) + r")"
+_UNIT = r"(day|week|month|quarter|year)s?"
+
+_RELATIVE_RE = re.compile(rf"\b(last|past|previous|prior|trailing)\s+(?:{_NUMBER}\s+)?{_UNIT}\b")
+_CURRENT_RE = re.compile(rf"\b(this|current)\s+{_UNIT}\b")
+_TO_DATE_RE = re.compile(r"\b(year|month|quarter|week) to date\b|\b(ytd|mtd|qtd|wtd)\b")
+_DAY_RE = re.compile(r"\b(today|yesterday)\b")
+_TOP_RE = re.compile(rf"\b(?:top|bottom)\s+{_NUMBER}\b")
+_RANKED_RE = re.compile(rf"\b{_NUMBER}\s+(largest|biggest|highest|lowest|smallest|best|worst)\b")
+
+_TO_DATE_UNITS = {"ytd": "year", "mtd": "month", "qtd": "quarter", "wtd": "week"}
+
+# Words the rules account for; any other non-column token is meaning they may have missed.
+KNOWN_WORDS = frozenset(
+    {
+        "a", "about", "across", "all", "an", "and", "any", "are", "as", "at", "average", "avg",
+        "be", "between", "biggest", "bottom", "breakdown", "by", "can", "change", "changed",
+        "compare", "compared", "count", "current", "daily", "data", "dataset", "date", "day",
+        "days", "decline", "decrease", "did", "do", "does", "drop", "during", "each", "fall",
+        "for", "from", "give", "go", "has", "have", "highest", "how", "in", "increase", "is",
+        "it", "largest", "last", "list", "lowest", "many", "max", "maximum", "me", "mean",
+        "median", "min", "minimum", "month", "monthly", "months", "much", "my", "number", "of",
+        "on", "our", "over", "past", "per", "previous", "prior", "quarter", "quarters", "rank",
+        "rise", "rows", "show", "since", "smallest", "so", "sum", "tell", "than", "the",
+        "this", "time", "to", "today", "top", "total", "trailing", "trend", "trends", "under",
+        "value", "values", "versus", "vs", "was", "we", "week", "weekly", "weeks", "were",
+        "what", "when", "where", "which", "why", "with", "year", "yearly", "years", "ytd",
+        "mtd", "qtd", "wtd", "yesterday", "most", "least", "grouped", "split",
+    }
+)  # fmt: skip
+
+
+def _number(text: str | None) -> int | None:
+    if text is None:
+        return None
+    return int(text) if text.isdigit() else _NUMBER_WORDS.get(text)
+
+
+def _timeframe(question: str) -> dict[str, Any] | None:
+    match = _RELATIVE_RE.search(question)
+    if match:
+        count = _number(match.group(2)) or 1
+        return {"text": match.group(0), "anchor": "last", "unit": match.group(3), "count": count}
+    match = _CURRENT_RE.search(question)
+    if match:
+        return {"text": match.group(0), "anchor": "current", "unit": match.group(2), "count": 1}
+    match = _TO_DATE_RE.search(question)
+    if match:
+        unit = match.group(1) or _TO_DATE_UNITS[match.group(2)]
+        return {"text": match.group(0), "anchor": "to_date", "unit": unit, "count": 1}
+    match = _DAY_RE.search(question)
+    if match:
+        anchor = "current" if match.group(1) == "today" else "last"
+        return {"text": match.group(0), "anchor": anchor, "unit": "day", "count": 1}
+    return None
+
+
+def unexplained_tokens(
+    tokens: tuple[str, ...],
+    columns: list[str],
+    *,
+    vocabulary: frozenset[str] = KNOWN_WORDS,
+    numbers: bool = True,
+) -> list[str]:
+    """Tokens that are not vocabulary words, column names or parts (plurals too) or numbers.
+
+    With ``numbers=False`` numbers count as unexplained, for callers that must consume them.
+    """
+    column_words = {column.lower() for column in columns} | {
+        part for column in columns for part in column.lower().split("_")
+    }
+    return [
+        token
+        for token in tokens
+        if token not in vocabulary
+        and token not in column_words
+        and not (token.endswith("s") and token[:-1] in column_words)
+        and not (numbers and (token.isdigit() or token in _NUMBER_WORDS))
+    ]
+
+
+def top_n_token(question: str) -> str | None:
+    """The number word or digits giving the "top N" count, as written in the question."""
+    match = _TOP_RE.search(question) or _RANKED_RE.search(question)
+    return match.group(1) if match else None
+
+
+def parse_top_n(question: str) -> int | None:
+    return _number(top_n_token(question))
+
+
+def parse_intent_rules(
+    question: str, dataset_meta: dict[str, Any], scan: QuestionScan
+) -> tuple[dict[str, Any], float]:
+    """Extract metric, timeframe, dimensions and top_n without a model call.
+
+    Confidence is the share of question tokens the rules account for (known analysis words,
+    column names, numbers), capped at 0.5 when no metric resolves.
+    """
+    schema = dataset_meta["schema"]
+    lowered = question.lower()
+    numeric = [name for name, kind in schema.items() if kind in {"INTEGER", "REAL"}]
+    time_column = pick_time_column(dataset_meta["columns"])
+
+    intent: dict[str, Any] = {}
+    metric = next((column for column in scan.mentions if column in numeric), None)
+    if metric is None and len(numeric) == 1:
+        metric = numeric[0]
+    if metric:
+        intent["metric"] = metric
+    timeframe = _timeframe(lowered)
+    if timeframe:
+        intent["timeframe"] = timeframe
+    intent["dimensions"] = [
+        column for column in scan.mentions if schema.get(column) == "TEXT" and column != time_column
+    ]
+    top_n = parse_top_n(lowered)
+    if top_n:
+        intent["top_n"] = top_n
+
+    if not scan.tokens:
+        return intent, 0.0
+    unexplained = unexplained_tokens(scan.tokens, dataset_meta["columns"])
+    confidence = 1 - len(unexplained) / len(scan.tokens)
+    if metric is None:
+        confidence = min(confidence, 0.5)
+    return intent, round(confidence, 3)
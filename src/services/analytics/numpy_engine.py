@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from datetime import date
+from typing import Any, Final
+
+from src.db.session import get_read_only_connection
+from src.services.analytics.changepoint import change_point_rows
+from src.services.sql.columnar import ColumnarResult, columnar_from_tuples
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - fallback in environments without numpy
+    np = None
+
+# Sentinel ordinal for values SQLite's DATE() would turn into NULL.
+_MISSING_DAY = -1
+
+_LOCK: Final = threading.Lock()
+_COLUMNS: dict[tuple[str, str, str], Any] = {}
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def clear_column_cache() -> None:
+    with _LOCK:
+        _COLUMNS.clear()
+
+
+def _day_ordinal(value: Any) -> int:
+    if not isinstance(value, str):
+        return _MISSING_DAY
+    try:
+        return date.fromisoformat(value.strip()[:10]).toordinal()
+    except ValueError:
+        return _MISSING_DAY
+
+
+def _load_column(dataset_meta: dict[str, Any], column: str, kind: str) -> Any:
+    """Load one column as an array, cached per dataset version.
+
+    ``kind`` is ``day`` (date ordinals), ``metric`` (float with NaN for NULL) or ``dimension``
+    (a ``(labels, codes)`` pair mirroring ``COALESCE(CAST(col AS TEXT), '(unknown)')``).
+    """
+    dataset_id = dataset_meta["dataset_id"]
+    key = (dataset_id, column, kind)
+    with _LOCK:
+        cached = _COLUMNS.get(key)
+    if cached is not None:
+        return cached
+
+    with get_read_only_connection() as conn:
+        raw = [
+            row[0] for row in conn.execute(f'SELECT "{column}" FROM "{dataset_meta["table_name"]}"')
+        ]
+
+    if kind == "day":
+        loaded: Any = np.fromiter((_day_ordinal(value) for value in raw), dtype=np.int64)
+    elif kind == "metric":
+        loaded = np.array([np.nan if value is None else value for value in raw], dtype=np.float64)
+    else:
+        labels, codes = np.unique(
+            np.array(["(unknown)" if value is None else str(value) for value in raw], dtype=object),
+            return_inverse=True,
+        )
+        loaded = (labels, codes)
+
+    with _LOCK:
+        for stale in [existing for existing in _COLUMNS if existing[0] != dataset_id]:
+            del _COLUMNS[stale]
+        _COLUMNS[key] = loaded
+    return loaded
+
+
+def _nullable(value: Any) -> float | None:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _group_sum(codes: Any, metric: Any, size: int) -> Any:
+    """SQL ``SUM`` per group: NULLs are skipped and an all-NULL group sums to NULL (NaN)."""
+    present = ~np.isnan(metric)
+    totals = np.bincount(codes[present], weights=metric[present], minlength=size)
+    counts = np.bincount(codes[present], minlength=size)
+    return np.where(counts > 0, totals, np.nan)
+
+
+def _daily_series(days: Any, metric: Any) -> tuple[Any, Any]:
+    valid = days != _MISSING_DAY
+    unique_days, codes = np.unique(days[valid], return_inverse=True)
+    return unique_days, _group_sum(codes, metric[valid], len(unique_days))
+
+
+def _change_windows(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], dimension: str
+) -> tuple[Any, Any, Any] | None:
+    days = _load_column(dataset_meta, binding["time_column"], "day")
+    metric = _load_column(dataset_meta, binding["metric"], "metric")
+    labels, codes = _load_column(dataset_meta, dimension, "dimension")
+
+    valid_days = days[days != _MISSING_DAY]
+    if valid_days.size == 0:
+        return None
+    max_day = valid_days.max()
+    current_mask = days > max_day - 6
+    prior_mask = (days > max_day - 13) & ~current_mask
+
+    in_window = current_mask | prior_mask
+    present = np.unique(codes[in_window])
+    current = np.nan_to_num(_group_sum(codes[current_mask], metric[current_mask], len(labels)))
+    prior = np.nan_to_num(_group_sum(codes[prior_mask], metric[prior_mask], len(labels)))
+    return labels[present], current[present], prior[present]
+
+
+def _top_by_magnitude(values: Any, top_n: int) -> Any:
+    return np.argsort(-np.abs(values), kind="stable")[: max(top_n, 0)]
+
+
+def _metric_change_decomposition(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    columns = [
+        "dimension",
+        "segment",
+        "current_value",
+        "prior_value",
+        "contribution",
+        "dimension_power",
+    ]
+    parts: list[tuple[Any, ...]] = []
+    for dimension in binding["dimensions"]:
+        windows = _change_windows(dataset_meta, binding, dimension)
+        if windows is None:
+            return columnar_from_tuples(columns, [])
+        segments, current, prior = windows
+        contribution = current - prior
+        magnitude = np.abs(contribution)
+        if len(segments) > 1:
+            total = magnitude.sum()
+            power = magnitude.max() / total if total else np.nan
+        else:
+            power = 0.0
+        parts.append(
+            (
+                np.full(len(segments), dimension, dtype=object),
+                segments,
+                current,
+                prior,
+                contribution,
+                np.full(len(segments), power, dtype=np.float64),
+            )
+        )
+
+    dimension_col, segment_col, current, prior, contribution, power = (
+        np.concatenate(arrays) for arrays in zip(*parts, strict=True)
+    )
+    # ORDER BY COALESCE(dimension_power, 0) = 0, ABS(contribution) DESC,
+    # dimension_power DESC (NULL power sorts last), dimension, segment.
+    order = np.lexsort(
+        (
+            segment_col.astype(str),
+            dimension_col.astype(str),
+            -np.nan_to_num(power, nan=-np.inf),
+            -np.abs(contribution),
+            np.nan_to_num(power, nan=0.0) == 0,
+        )
+    )
+    order = order[: max(int(params.get("top_n", 5)), 0)]
+    return {
+        "columns": columns,
+        "values": [
+            dimension_col[order].tolist(),
+            segment_col[order].tolist(),
+            current[order].tolist(),
+            prior[order].tolist(),
+            contribution[order].tolist(),
+            [_nullable(value) for value in power[order]],
+        ],
+        "row_count": len(order),
+    }
+
+
+def _segment_contribution(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    columns = ["segment", "delta", "contribution_share"]
+    windows = _change_windows(dataset_meta, binding, binding["dimension"])
+    if windows is None:
+        return columnar_from_tuples(columns, [])
+    segments, current, prior = windows
+    delta = current - prior
+    total = float(delta.sum())
+    share = np.zeros_like(delta) if total == 0 else delta / total
+    order = _top_by_magnitude(delta, int(params.get("top_n", 5)))
+    return {
+        "columns": columns,
+        "values": [segments[order].tolist(), delta[order].tolist(), share[order].tolist()],
+        "row_count": len(order),
+    }
+
+
+def _anomaly_noise(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    columns = ["dt", "latest_delta", "avg_abs_delta", "signal"]
+    days = _load_column(dataset_meta, binding["time_column"], "day")
+    metric = _load_column(dataset_meta, binding["metric"], "metric")
+    unique_days, daily = _daily_series(days, metric)
+    if unique_days.size == 0:
+        return columnar_from_tuples(columns, [])
+
+    deltas = np.concatenate(([np.nan], np.diff(daily)))
+    history = np.abs(deltas[:-1])
+    history = history[~np.isnan(history)]
+    avg_abs_delta = float(history.mean()) if history.size else None
+    latest_delta = _nullable(deltas[-1])
+
+    if avg_abs_delta is None or avg_abs_delta == 0:
+        signal = "insufficient"
+    elif latest_delta is not None and abs(latest_delta) >= 2 * avg_abs_delta:
+        signal = "likely_anomaly"
+    else:
+        signal = "likely_noise"
+
+    latest_day = date.fromordinal(int(unique_days[-1])).isoformat()
+    return columnar_from_tuples(columns, [(latest_day, latest_delta, avg_abs_delta, signal)])
+
+
+def _trend_break(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    days = _load_column(dataset_meta, binding["time_column"], "day")
+    metric = _load_column(dataset_meta, binding["metric"], "metric")
+    _, daily = _daily_series(days, metric)
+    newest_first = daily[::-1]
+
+    def _avg(values: Any) -> float | None:
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if values.size else None
+
+    recent_avg = _avg(newest_first[:7])
+    baseline_avg = _avg(newest_first[7:28])
+    avg_delta = (
+        recent_avg - baseline_avg if recent_avg is not None and baseline_avg is not None else None
+    )
+    if baseline_avg is None:
+        signal = "insufficient"
+    elif avg_delta is not None and abs(avg_delta) >= 0.15 * abs(baseline_avg):
+        signal = "trend_break"
+    else:
+        signal = "stable"
+    return columnar_from_tuples(
+        ["recent_avg", "baseline_avg", "avg_delta", "trend_signal"],
+        [(recent_avg, baseline_avg, avg_delta, signal)],
+    )
+
+
+def _trend_series(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    days = _load_column(dataset_meta, binding["time_column"], "day")
+    metric = _load_column(dataset_meta, binding["metric"], "metric")
+    unique_days, daily = _daily_series(days, metric)
+    rows = [
+        (date.fromordinal(int(day)).isoformat(), _nullable(value))
+        for day, value in zip(unique_days[::-1][:30], daily[::-1][:30], strict=True)
+    ]
+    return columnar_from_tuples(["x", "y"], rows)
+
+
+def _trend_change_points(
+    dataset_meta: dict[str, Any], binding: dict[str, Any], params: dict[str, Any]
+) -> ColumnarResult:
+    days = _load_column(dataset_meta, binding["time_column"], "day")
+    metric = _load_column(dataset_meta, binding["metric"], "metric")
+    unique_days, daily = _daily_series(days, metric)
+    return change_point_rows(unique_days, daily)
+
+
+PatternFn = Callable[[dict[str, Any], dict[str, Any], dict[str, Any]], ColumnarResult]
+
+# Keyed by (pattern name, query label) as emitted by the SQL pattern builders.
+_PATTERNS: dict[tuple[str, str], tuple[PatternFn, tuple[str, ...]]] = {
+    ("metric_change_decomposition", "Metric change decomposition"): (
+        _metric_change_decomposition,
+        ("metric", "time_column", "dimensions"),
+    ),
+    ("segment_contribution", "Segment contribution analysis"): (
+        _segment_contribution,
+        ("metric", "time_column", "dimension"),
+    ),
+    ("anomaly_noise_check", "Anomaly vs noise"): (_anomaly_noise, ("metric", "time_column")),
+    ("trend_break_detection", "Trend break detection"): (_trend_break, ("metric", "time_column")),
+    ("trend_break_detection", "Trend series"): (_trend_series, ("metric", "time_column")),
+    ("trend_break_detection", "Trend change points"): (
+        _trend_change_points,
+        ("metric", "time_column"),
+    ),
+}
+
+
+def compute_pattern_result(
+    dataset_meta: dict[str, Any],
+    *,
+    pattern: str,
+    label: str,
+    binding: dict[str, Any],
+    params: dict[str, Any] | None = None,
+) -> ColumnarResult | None:
+    """Compute a prebuilt pattern output in-process; ``None`` means run its SQL instead."""
+    if np is None or not dataset_meta.get("dataset_id"):
+        return None
+    entry = _PATTERNS.get((pattern, label))
+    if entry is None:
+        return None
+    compute, required = entry
+    if any(not binding.get(name) for name in required):
+        return None
+    if label == "Trend series" and binding.get("grain", "day") != "day":
+        return None
+    # DATE() over numeric columns yields Julian-day dates; leave those to SQLite.
+    if dataset_meta["schema"].get(binding["time_column"]) != "TEXT":
+        return None
+    return compute(dataset_meta, binding, params or {})
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from src.services.analytics.helpers import pick_metric_column, pick_time_column
+from src.services.analytics.patterns.shared import cube_series_source
 from src.services.analytics.patterns.types import PatternPlan
 
 
@@ -25,11 +26,19 @@ def build_anomaly_noise_check(
         )
         return plan
 
-    sql = f"""
-WITH daily AS (
+    daily = (
+        cube_series_source(intent.get("rollup_cube"), metric=metric, time_col=time_col)
+        or f"""
   SELECT DATE("{time_col}") AS dt, SUM(CAST("{metric}" AS REAL)) AS metric_value
   FROM "{table_name}"
   GROUP BY dt
+""".strip(
+            "\n"
+        )
+    )
+    sql = f"""
+WITH daily AS (
+{daily}
   ORDER BY dt
 ),
 deltas AS (
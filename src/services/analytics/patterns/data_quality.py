@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from src.services.analytics.helpers import pick_time_column
 from src.services.analytics.patterns.types import PatternPlan
+from src.services.duplicates_service import duplicate_count_column
 
 
 def build_data_quality_checks(
@@ -38,19 +39,29 @@ FROM "{table_name}"
 
     plan.queries.append({"label": "Data quality missingness", "query": summary_sql})
 
-    if len(columns) >= 2:
+    duplicates = intent.get("duplicates")
+    count_column = duplicate_count_column(columns)
+    if duplicates:
+        # Full-row hashes are grouped at ingest; this reads the indexed summary table.
+        duplicate_sql = f"""
+SELECT *
+FROM "{duplicates["table"]}"
+ORDER BY "{duplicates.get("count_column", count_column)}" DESC
+LIMIT 20
+""".strip()
+    else:
+        quoted = ", ".join(f'"{column}"' for column in columns)
         duplicate_sql = f"""
 SELECT
-  "{columns[0]}" AS key_1,
-  "{columns[1]}" AS key_2,
-  COUNT(*) AS duplicate_count
+  {quoted},
+  COUNT(*) AS "{count_column}"
 FROM "{table_name}"
-GROUP BY "{columns[0]}", "{columns[1]}"
+GROUP BY {quoted}
 HAVING COUNT(*) > 1
-ORDER BY duplicate_count DESC
+ORDER BY "{count_column}" DESC
 LIMIT 20
 """.strip()
-        plan.queries.append({"label": "Data quality duplicate keys", "query": duplicate_sql})
+    plan.queries.append({"label": "Data quality duplicate rows", "query": duplicate_sql})
 
     time_col = pick_time_column(columns)
     if time_col:
@@ -6,7 +6,12 @@ from src.services.analytics.helpers import (
     pick_metric_column,
     pick_time_column,
 )
-from src.services.analytics.patterns.types import PatternPlan
+from src.services.analytics.patterns.shared import (
+    MAX_CHANGE_DIMENSIONS,
+    change_window_ctes,
+    change_window_segment,
+)
+from src.services.analytics.patterns.types import PatternPlan, pattern_query
 
 
 def build_metric_change_decomposition(
@@ -17,7 +22,9 @@ def build_metric_change_decomposition(
 ) -> PatternPlan:
     metric = pick_metric_column(schema, intent.get("metric"))
     time_col = pick_time_column(columns, intent.get("time_column"))
-    dimensions = pick_dimension_columns(schema, exclude={time_col} if time_col else set())
+    dimensions = intent.get("dimensions") or pick_dimension_columns(
+        schema, exclude={time_col} if time_col else set()
+    )
     top_n = infer_top_n(intent)
 
     plan = PatternPlan(name="metric_change_decomposition")
@@ -37,46 +44,72 @@ def build_metric_change_decomposition(
         )
         return plan
 
-    dimension = dimensions[0]
-    sql = f"""
-WITH max_date AS (
-  SELECT MAX(DATE("{time_col}")) AS max_dt FROM "{table_name}"
-),
-windowed AS (
-  SELECT
-    COALESCE(CAST("{dimension}" AS TEXT), '(unknown)') AS segment,
-    CASE
-      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-6 day') THEN 'current'
-      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day') THEN 'prior'
-      ELSE NULL
-    END AS period,
-    SUM(CAST("{metric}" AS REAL)) AS metric_sum
-  FROM "{table_name}"
-  WHERE DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day')
-  GROUP BY segment, period
-),
-pivoted AS (
-  SELECT
-    segment,
+    # The planner passes dimensions picked by cardinality; direct callers get the first few.
+    dimensions = dimensions[:MAX_CHANGE_DIMENSIONS]
+    rollups = "\n  UNION ALL\n".join(
+        f"""  SELECT
+    '{dimension}' AS dimension,
+    {change_window_segment(idx)} AS segment,
     SUM(CASE WHEN period = 'current' THEN metric_sum ELSE 0 END) AS current_value,
     SUM(CASE WHEN period = 'prior' THEN metric_sum ELSE 0 END) AS prior_value
   FROM windowed
-  GROUP BY segment
-)
+  GROUP BY {change_window_segment(idx)}"""
+        for idx, dimension in enumerate(dimensions)
+    )
+    # Explanatory power: share of a dimension's absolute change carried by its top segment.
+    # Single-segment dimensions explain nothing and score 0.
+    scored = """
+  SELECT
+    dimension,
+    segment,
+    current_value,
+    prior_value,
+    current_value - prior_value AS contribution,
+    CASE
+      WHEN COUNT(*) OVER (PARTITION BY dimension) > 1
+        THEN MAX(ABS(current_value - prior_value)) OVER (PARTITION BY dimension)
+          / NULLIF(SUM(ABS(current_value - prior_value)) OVER (PARTITION BY dimension), 0)
+      ELSE 0
+    END AS dimension_power
+  FROM by_dimension
+""".strip(
+        "\n"
+    )
+    # The largest contributions come first; power only breaks ties. Segments of dimensions
+    # that explain nothing (one segment, or no change) go last.
+    order_by = (
+        "COALESCE(dimension_power, 0) = 0, ABS(contribution) DESC, dimension_power DESC, "
+        "dimension ASC, segment ASC"
+    )
+    body = f"""
 SELECT
+  dimension,
   segment,
   current_value,
   prior_value,
-  (current_value - prior_value) AS contribution
-FROM pivoted
-ORDER BY ABS(contribution) DESC
-LIMIT {top_n}
+  contribution,
+  dimension_power
+FROM scored
+ORDER BY {order_by}
+LIMIT :top_n
 """.strip()
 
     plan.queries.append(
-        {
-            "label": "Metric change decomposition",
-            "query": sql,
-        }
+        pattern_query(
+            "Metric change decomposition",
+            body=body,
+            columns=[
+                "dimension",
+                "segment",
+                "current_value",
+                "prior_value",
+                "contribution",
+                "dimension_power",
+            ],
+            shared_ctes=change_window_ctes(table_name, time_col, metric, dimensions),
+            ctes=[("by_dimension", rollups), ("scored", scored)],
+            params={"top_n": top_n},
+            order_by=order_by,
+        )
     )
     return plan
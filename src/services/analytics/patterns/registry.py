@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from src.services.analytics.patterns.anomaly_noise import build_anomaly_noise_check
+from src.services.analytics.patterns.data_quality import build_data_quality_checks
+from src.services.analytics.patterns.metric_change_decomposition import (
+    build_metric_change_decomposition,
+)
+from src.services.analytics.patterns.segment_contribution import (
+    build_segment_contribution,
+)
+from src.services.analytics.patterns.trend_break import build_trend_break_detection
+from src.services.analytics.patterns.types import PatternPlan
+
+PatternBuilder = Callable[..., PatternPlan]
+
+_MISSING = {
+    "metric": {"code": "MISSING_METRIC", "message": "No numeric metric column found"},
+    "time_column": {"code": "MISSING_TIME_COLUMN", "message": "No time-like column found"},
+    "dimension": {"code": "MISSING_DIMENSION", "message": "No segment dimension available"},
+}
+
+
+@dataclass(frozen=True)
+class PatternSpec:
+    """A prebuilt analysis pattern and what the scheduler needs to know to pick it.
+
+    ``requires`` names binding keys that must be set before the builder is worth calling.
+    ``value`` is the pattern's baseline usefulness; each keyword found in the question adds
+    ``keyword_boost``. The cost comes from the compiled query plans.
+    """
+
+    name: str
+    build: PatternBuilder
+    requires: tuple[str, ...]
+    value: float
+    keywords: tuple[str, ...] = ()
+    keyword_boost: float = 2.0
+    quality: bool = False
+
+    def missing(self, binding: dict[str, Any]) -> list[dict[str, str]]:
+        return [dict(_MISSING[key]) for key in self.requires if not binding.get(key)][:1]
+
+    def value_for(self, question: str) -> float:
+        lowered = question.lower()
+        hits = sum(1 for keyword in self.keywords if keyword in lowered)
+        return self.value + self.keyword_boost * hits
+
+
+PATTERN_REGISTRY: tuple[PatternSpec, ...] = (
+    PatternSpec(
+        name="metric_change_decomposition",
+        build=build_metric_change_decomposition,
+        requires=("metric", "time_column", "dimension"),
+        value=3.0,
+        keywords=("why", "change", "driver", "drop", "increase", "decrease"),
+    ),
+    PatternSpec(
+        name="segment_contribution",
+        build=build_segment_contribution,
+        requires=("metric", "time_column", "dimension"),
+        value=2.0,
+        keywords=("segment", "contribut", "share", "driver"),
+    ),
+    PatternSpec(
+        name="anomaly_noise_check",
+        build=build_anomaly_noise_check,
+        requires=("metric", "time_column"),
+        value=1.5,
+        keywords=("anomal", "noise", "spike", "outlier", "unusual"),
+    ),
+    PatternSpec(
+        name="trend_break_detection",
+        build=build_trend_break_detection,
+        requires=("metric", "time_column"),
+        value=2.0,
+        keywords=("trend", "break", "over time", "week", "month"),
+    ),
+    PatternSpec(
+        name="data_quality_checks",
+        build=build_data_quality_checks,
+        requires=(),
+        value=0.5,
+        keywords=("quality", "missing", "duplicate", "null"),
+        quality=True,
+    ),
+)
+
+PATTERN_SPECS = {spec.name: spec for spec in PATTERN_REGISTRY}
+
+
+def query_values(queries: list[dict[str, Any]], question: str) -> list[float]:
+    """Value of each (possibly fused) query: its patterns' values, split across their queries."""
+    names = [query["pattern"].split("+") for query in queries]
+    per_pattern = Counter(name for query_names in names for name in query_names)
+    return [
+        sum(
+            PATTERN_SPECS[name].value_for(question) / per_pattern[name]
+            for name in query_names
+            if name in PATTERN_SPECS
+        )
+        for query_names in names
+    ]
+
+
+def schedule_queries(
+    queries: list[dict[str, Any]],
+    *,
+    question: str,
+    max_queries: int,
+    max_cost: float,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Pick the most valuable queries per unit of estimated cost within both budgets.
+
+    Greedy by value density, keeping the single most valuable affordable query instead when
+    it alone beats the greedy pick. Returns ``(selected, deferred)`` in plan order.
+    """
+    values = query_values(queries, question)
+    costs = [max(float(query.get("estimated_cost") or 0.0), 1.0) for query in queries]
+
+    chosen: list[int] = []
+    spent = 0.0
+    for idx in sorted(range(len(queries)), key=lambda idx: values[idx] / costs[idx], reverse=True):
+        if len(chosen) >= max_queries:
+            break
+        if spent + costs[idx] <= max_cost:
+            chosen.append(idx)
+            spent += costs[idx]
+
+    affordable = [idx for idx in range(len(queries)) if costs[idx] <= max_cost]
+    if affordable and max_queries > 0:
+        best = max(affordable, key=lambda idx: values[idx])
+        if values[best] > sum(values[idx] for idx in chosen):
+            chosen = [best]
+
+    selected = set(chosen)
+    return (
+        [query for idx, query in enumerate(queries) if idx in selected],
+        [query for idx, query in enumerate(queries) if idx not in selected],
+    )
@@ -6,7 +6,11 @@ from src.services.analytics.helpers import (
     pick_metric_column,
     pick_time_column,
 )
-from src.services.analytics.patterns.types import PatternPlan
+from src.services.analytics.patterns.shared import (
+    MAX_CHANGE_DIMENSIONS,
+    change_window_ctes,
+)
+from src.services.analytics.patterns.types import PatternPlan, pattern_query
 
 
 def build_segment_contribution(
@@ -17,7 +21,9 @@ def build_segment_contribution(
 ) -> PatternPlan:
     metric = pick_metric_column(schema, intent.get("metric"))
     time_col = pick_time_column(columns, intent.get("time_column"))
-    dimensions = pick_dimension_columns(schema, exclude={time_col} if time_col else set())
+    dimensions = intent.get("dimensions") or pick_dimension_columns(
+        schema, exclude={time_col} if time_col else set()
+    )
     top_n = infer_top_n(intent)
 
     plan = PatternPlan(name="segment_contribution")
@@ -37,36 +43,22 @@ def build_segment_contribution(
         )
         return plan
 
-    dimension = dimensions[0]
-    sql = f"""
-WITH max_date AS (
-  SELECT MAX(DATE("{time_col}")) AS max_dt FROM "{table_name}"
-),
-windowed AS (
-  SELECT
-    COALESCE(CAST("{dimension}" AS TEXT), '(unknown)') AS segment,
-    CASE
-      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-6 day') THEN 'current'
-      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day') THEN 'prior'
-      ELSE NULL
-    END AS period,
-    SUM(CAST("{metric}" AS REAL)) AS metric_sum
-  FROM "{table_name}"
-  WHERE DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day')
-  GROUP BY segment, period
-),
-seg AS (
+    # The planner passes dimensions picked by cardinality; direct callers get the first few.
+    dimensions = dimensions[:MAX_CHANGE_DIMENSIONS]
+    seg = """
   SELECT
-    segment,
+    seg_0 AS segment,
     SUM(CASE WHEN period = 'current' THEN metric_sum ELSE 0 END) AS current_value,
     SUM(CASE WHEN period = 'prior' THEN metric_sum ELSE 0 END) AS prior_value,
     SUM(CASE WHEN period = 'current' THEN metric_sum ELSE 0 END) - SUM(CASE WHEN period = 'prior' THEN metric_sum ELSE 0 END) AS delta
   FROM windowed
-  GROUP BY segment
-),
-tot AS (
-  SELECT SUM(delta) AS total_delta FROM seg
-)
+  GROUP BY seg_0
+""".strip(
+        "\n"
+    )
+    tot = "  SELECT SUM(delta) AS total_delta FROM seg"
+    order_by = "ABS(delta) DESC, segment ASC"
+    body = f"""
 SELECT
   seg.segment,
   seg.delta,
@@ -75,14 +67,19 @@ SELECT
     ELSE seg.delta / tot.total_delta
   END AS contribution_share
 FROM seg, tot
-ORDER BY ABS(seg.delta) DESC
-LIMIT {top_n}
+ORDER BY {order_by}
+LIMIT :top_n
 """.strip()
 
     plan.queries.append(
-        {
-            "label": "Segment contribution analysis",
-            "query": sql,
-        }
+        pattern_query(
+            "Segment contribution analysis",
+            body=body,
+            columns=["segment", "delta", "contribution_share"],
+            shared_ctes=change_window_ctes(table_name, time_col, metric, dimensions),
+            ctes=[("seg", seg), ("tot", tot)],
+            params={"top_n": top_n},
+            order_by=order_by,
+        )
     )
     return plan
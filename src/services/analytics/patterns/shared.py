@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.services.analytics.patterns.types import CteDefinition
+
+# Upper bound on dimensions grouped together in the shared change window; each extra
+# dimension multiplies the number of windowed groups, not the number of table scans.
+MAX_CHANGE_DIMENSIONS = 4
+# Upper bound on the product of the grouped dimensions' distinct counts.
+MAX_CHANGE_WINDOW_GROUPS = 10_000
+
+# Bucket start date per grain; ISO weeks start on Monday.
+GRAIN_BUCKETS = {
+    "day": 'DATE("{time_col}")',
+    "week": "DATE(\"{time_col}\", 'weekday 0', '-6 days')",
+    "month": "DATE(\"{time_col}\", 'start of month')",
+}
+
+
+def pick_change_dimensions(dimensions: list[str], distinct: dict[str, int]) -> list[str]:
+    """Dimensions to group together in the change window, kept in schema order.
+
+    The primary (first) dimension is always kept. Others are added from the lowest sketched
+    cardinality up, while the combined group count stays within ``MAX_CHANGE_WINDOW_GROUPS``.
+    Without sketches the first ``MAX_CHANGE_DIMENSIONS`` are used.
+    """
+    if not dimensions or not distinct:
+        return dimensions[:MAX_CHANGE_DIMENSIONS]
+    chosen = {dimensions[0]}
+    groups = max(distinct.get(dimensions[0], 1), 1)
+    candidates = sorted(
+        (column for column in dimensions[1:] if column in distinct), key=distinct.__getitem__
+    )
+    for column in candidates:
+        cardinality = max(distinct[column], 1)
+        if len(chosen) >= MAX_CHANGE_DIMENSIONS or groups * cardinality > MAX_CHANGE_WINDOW_GROUPS:
+            break
+        chosen.add(column)
+        groups *= cardinality
+    return [column for column in dimensions if column in chosen]
+
+
+def change_window_segment(index: int) -> str:
+    return f"seg_{index}"
+
+
+def change_window_ctes(
+    table_name: str, time_col: str, metric: str, dimensions: list[str]
+) -> list[CteDefinition]:
+    """Metric sums per dimension combination for the latest 7 days ('current') and the 7 before.
+
+    Grouping by every dimension at once lets each consumer roll up any single dimension
+    (``seg_<i>``) from one scan of the table, in the spirit of GROUPING SETS.
+    """
+    max_date = f'  SELECT MAX(DATE("{time_col}")) AS max_dt FROM "{table_name}"'
+    segments = [change_window_segment(idx) for idx in range(len(dimensions))]
+    segment_terms = "\n".join(
+        f"    COALESCE(CAST(\"{dimension}\" AS TEXT), '(unknown)') AS {segment},"
+        for dimension, segment in zip(dimensions, segments, strict=True)
+    )
+    windowed = f"""
+  SELECT
+{segment_terms}
+    CASE
+      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-6 day') THEN 'current'
+      WHEN DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day') THEN 'prior'
+      ELSE NULL
+    END AS period,
+    SUM(CAST("{metric}" AS REAL)) AS metric_sum
+  FROM "{table_name}"
+  WHERE DATE("{time_col}") > DATE((SELECT max_dt FROM max_date), '-13 day')
+  GROUP BY {", ".join(segments)}, period
+""".strip(
+        "\n"
+    )
+    return [("max_date", max_date), ("windowed", windowed)]
+
+
+def cube_series_source(
+    cube: dict[str, Any] | None, *, metric: str, time_col: str, grain: str = "day"
+) -> str | None:
+    """SELECT of ``(dt, metric_value)`` per ``grain`` bucket from the rollup cube, if it applies."""
+    if not cube or cube.get("time_column") != time_col or metric not in cube.get("metrics", []):
+        return None
+    if grain not in cube.get("grains", []):
+        return None
+    return f"""
+  SELECT bucket AS dt, metric_sum AS metric_value
+  FROM "{cube['table']}"
+  WHERE grain = '{grain}' AND dimension = '(all)' AND metric = '{metric}'
+""".strip(
+        "\n"
+    )
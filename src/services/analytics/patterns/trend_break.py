@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from src.services.analytics.helpers import pick_metric_column, pick_time_column
+from src.services.analytics.patterns.shared import GRAIN_BUCKETS, cube_series_source
 from src.services.analytics.patterns.types import PatternPlan
 
 
@@ -25,11 +26,20 @@ def build_trend_break_detection(
         )
         return plan
 
-    signal_sql = f"""
-WITH daily AS (
+    cube = intent.get("rollup_cube")
+    daily = (
+        cube_series_source(cube, metric=metric, time_col=time_col)
+        or f"""
   SELECT DATE("{time_col}") AS dt, SUM(CAST("{metric}" AS REAL)) AS metric_value
   FROM "{table_name}"
   GROUP BY dt
+""".strip(
+            "\n"
+        )
+    )
+    signal_sql = f"""
+WITH daily AS (
+{daily}
 ),
 ranked AS (
   SELECT dt, metric_value, ROW_NUMBER() OVER (ORDER BY dt DESC) AS rn
@@ -52,16 +62,42 @@ SELECT
   END AS trend_signal
 """.strip()
 
+    grain = intent.get("grain") or "day"
+    series = cube_series_source(cube, metric=metric, time_col=time_col, grain=grain)
+    if series is None:
+        series = f"""
+  SELECT {GRAIN_BUCKETS.get(grain, GRAIN_BUCKETS["day"]).format(time_col=time_col)} AS dt,
+    SUM(CAST("{metric}" AS REAL)) AS metric_value
+  FROM "{table_name}"
+  GROUP BY dt
+""".strip(
+            "\n"
+        )
     series_sql = f"""
+WITH series AS (
+{series}
+)
 SELECT
-  DATE("{time_col}") AS x,
-  SUM(CAST("{metric}" AS REAL)) AS y
-FROM "{table_name}"
-GROUP BY x
+  dt AS x,
+  metric_value AS y
+FROM series
 ORDER BY x DESC
 LIMIT 30
 """.strip()
 
-    plan.queries.append({"label": "Trend break detection", "query": signal_sql})
+    if intent.get("trend_break_mode") == "changepoint":
+        # The whole daily series is pulled once and segmented in-process (changepoint.py).
+        change_points_sql = f"""
+WITH daily AS (
+{daily}
+)
+SELECT dt, metric_value
+FROM daily
+WHERE dt IS NOT NULL
+ORDER BY dt
+""".strip()
+        plan.queries.append({"label": "Trend change points", "query": change_points_sql})
+    else:
+        plan.queries.append({"label": "Trend break detection", "query": signal_sql})
     plan.queries.append({"label": "Trend series", "query": series_sql})
     return plan
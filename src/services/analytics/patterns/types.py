@@ -1,10 +1,49 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass, field
+from typing import Any
+
+CteDefinition = tuple[str, str]
 
 
 @dataclass
 class PatternPlan:
     name: str
-    queries: list[dict[str, str]] = field(default_factory=list)
+    queries: list[dict[str, Any]] = field(default_factory=list)
     diagnostics: list[dict[str, str]] = field(default_factory=list)
+
+
+def render_with(ctes: Sequence[CteDefinition], body: str) -> str:
+    if not ctes:
+        return body
+    clauses = ",\n".join(f"{name} AS (\n{sql}\n)" for name, sql in ctes)
+    return f"WITH {clauses}\n{body}"
+
+
+def pattern_query(
+    label: str,
+    *,
+    body: str,
+    columns: list[str],
+    shared_ctes: Sequence[CteDefinition] = (),
+    ctes: Sequence[CteDefinition] = (),
+    params: dict[str, Any] | None = None,
+    order_by: str | None = None,
+) -> dict[str, Any]:
+    """Build a pattern query whose shared CTEs the planner may evaluate once across patterns.
+
+    ``params`` holds defaults for the named placeholders (``:top_n``) the SQL is bound with.
+    ``order_by`` repeats the body's ordering over its output columns, so a fused query can
+    rank the rows explicitly.
+    """
+    return {
+        "label": label,
+        "query": render_with([*shared_ctes, *ctes], body),
+        "shared_ctes": list(shared_ctes),
+        "ctes": list(ctes),
+        "body": body,
+        "columns": columns,
+        "params": dict(params or {}),
+        "order_by": order_by,
+    }
@@ -1,42 +1,80 @@
 from __future__ import annotations
 
-from src.services.analytics.patterns.anomaly_noise import build_anomaly_noise_check
-from src.services.analytics.patterns.data_quality import build_data_quality_checks
-from src.services.analytics.patterns.metric_change_decomposition import (
-    build_metric_change_decomposition,
+import threading
+from dataclasses import dataclass
+from typing import Any, Final
+
+from src.core.settings import get_settings
+from src.services.analytics.changepoint import change_points_available
+from src.services.analytics.fusion import fuse_shared_queries
+from src.services.analytics.helpers import (
+    infer_time_grain,
+    infer_top_n,
+    pick_dimension_columns,
+    pick_metric_column,
+    pick_time_column,
 )
-from src.services.analytics.patterns.segment_contribution import build_segment_contribution
-from src.services.analytics.patterns.trend_break import build_trend_break_detection
+from src.services.analytics.patterns.registry import PATTERN_REGISTRY, schedule_queries
+from src.services.analytics.patterns.shared import pick_change_dimensions
+from src.services.dataset_service import derived_reference_tables, derived_row_counts
+from src.services.duplicates_service import dataset_duplicates
+from src.services.rollup_service import dataset_cube
+from src.services.sketch_service import dataset_sketches
+from src.services.sql.cost import estimate_query_cost
+from src.services.sql.validator import validate_safe_select, validate_sql_references
 
+TemplateKey = tuple[str | None, str, str | None, str | None, str | None, str, str, bool]
 
-def plan_analyses(
-    dataset_meta: dict, intent: dict
-) -> tuple[list[dict[str, str]], list[dict[str, str]], list[str]]:
+
+@dataclass(frozen=True)
+class CompiledPatterns:
+    queries: tuple[dict[str, Any], ...]
+    diagnostics: tuple[dict[str, str], ...]
+
+
+_LOCK: Final = threading.Lock()
+_TEMPLATES: dict[TemplateKey, CompiledPatterns] = {}
+
+
+def _distinct_counts(dataset_meta: dict) -> dict[str, int]:
+    column_stats = (dataset_sketches(dataset_meta) or {}).get("column_stats") or {}
+    return {column: int(stats["distinct"]) for column, stats in column_stats.items()}
+
+
+def clear_pattern_templates() -> None:
+    with _LOCK:
+        _TEMPLATES.clear()
+
+
+def _compile_patterns(
+    dataset_meta: dict, binding: dict[str, Any], request_quality: bool
+) -> CompiledPatterns:
+    """Render, fuse, validate and cost the query of every registered pattern whose column
+    requirements the binding meets; patterns missing a column are not built at all."""
     table_name = dataset_meta["table_name"]
     columns = dataset_meta["columns"]
     schema = dataset_meta["schema"]
 
-    keyword_text = (intent.get("raw_question") or "").lower()
-    request_quality = any(token in keyword_text for token in ["quality", "missing", "duplicate"])
-
-    builders = [
-        build_metric_change_decomposition,
-        build_segment_contribution,
-        build_anomaly_noise_check,
-        build_trend_break_detection,
-        build_data_quality_checks,
-    ]
-
-    if request_quality:
-        builders = [build_data_quality_checks]
+    specs = [spec for spec in PATTERN_REGISTRY if spec.quality or not request_quality]
 
-    planned_queries: list[dict[str, str]] = []
+    planned_queries: list[dict[str, Any]] = []
     diagnostics: list[dict[str, str]] = []
-    selected_patterns: list[str] = []
 
-    for build in builders:
-        planned = build(table_name=table_name, columns=columns, schema=schema, intent=intent)
-        selected_patterns.append(planned.name)
+    intent = {
+        "metric": binding["metric"],
+        "time_column": binding["time_column"],
+        "grain": binding["grain"],
+        "dimensions": binding["dimensions"],
+        "rollup_cube": dataset_cube(dataset_meta),
+        "trend_break_mode": binding["trend_break_mode"],
+        "duplicates": dataset_duplicates(dataset_meta),
+    }
+    for spec in specs:
+        missing = spec.missing(binding)
+        if missing:
+            diagnostics.extend(missing)
+            continue
+        planned = spec.build(table_name=table_name, columns=columns, schema=schema, intent=intent)
         diagnostics.extend(planned.diagnostics)
         for query in planned.queries:
             planned_queries.append(
@@ -44,7 +82,137 @@ def plan_analyses(
                     "label": query["label"],
                     "sql": query["query"],
                     "pattern": planned.name,
+                    "shared_ctes": query.get("shared_ctes") or [],
+                    "ctes": query.get("ctes") or [],
+                    "body": query.get("body"),
+                    "columns": query.get("columns") or [],
+                    "params": query.get("params") or {},
+                    "order_by": query.get("order_by"),
+                }
+            )
+
+    row_counts = {
+        table_name: int(dataset_meta.get("rows") or 0),
+        **derived_row_counts(dataset_meta),
+    }
+    extra_tables = derived_reference_tables(dataset_meta)
+    compiled: list[dict[str, Any]] = []
+    for query in fuse_shared_queries(planned_queries):
+        safe = validate_safe_select(query["sql"])
+        refs = validate_sql_references(
+            query["sql"],
+            table_name=table_name,
+            allowed_columns=columns,
+            extra_tables=extra_tables,
+        )
+        if not safe.is_valid or not refs.is_valid:
+            diagnostics.append(
+                {
+                    "code": "INVALID_PATTERN_SQL",
+                    "message": f"{query['label']}: {safe.reason or refs.reason}",
                 }
             )
+            continue
+        estimate = estimate_query_cost(query["sql"], row_counts=row_counts, params=query["params"])
+        compiled.append(
+            {
+                **query,
+                "prevalidated": True,
+                "estimated_cost": estimate.cost,
+                "binding": dict(binding),
+            }
+        )
+
+    return CompiledPatterns(queries=tuple(compiled), diagnostics=tuple(diagnostics))
+
 
-    return planned_queries, diagnostics, selected_patterns
+def plan_analyses(
+    dataset_meta: dict,
+    intent: dict,
+    *,
+    max_queries: int | None = None,
+    max_cost: float | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, str]], list[str]]:
+    """Look up (compiling on first use) the pattern templates for this dataset binding, then
+    schedule the most valuable ones for this question within the query and cost budgets.
+
+    Templates are keyed by dataset version, metric, time column, dimension, time grain, trend
+    break mode and whether only quality checks were requested; per-request values such as
+    ``top_n`` are bound as params. Returns ``(queries, diagnostics, selected pattern names)``.
+    """
+    settings = get_settings()
+    columns = dataset_meta["columns"]
+    schema = dataset_meta["schema"]
+
+    keyword_text = (intent.get("raw_question") or "").lower()
+    request_quality = any(token in keyword_text for token in ["quality", "missing", "duplicate"])
+
+    metric = pick_metric_column(schema, intent.get("metric"))
+    time_col = pick_time_column(columns, intent.get("time_column"))
+    dimensions = pick_dimension_columns(schema, exclude={time_col} if time_col else set())
+    grain = infer_time_grain(intent)
+    trend_break_mode = (
+        "changepoint"
+        if settings.trend_break_mode == "changepoint" and change_points_available()
+        else "window"
+    )
+    dataset_id = dataset_meta.get("dataset_id")
+    key: TemplateKey = (
+        dataset_id,
+        dataset_meta["table_name"],
+        metric,
+        time_col,
+        dimensions[0] if dimensions else None,
+        grain,
+        trend_break_mode,
+        request_quality,
+    )
+
+    with _LOCK:
+        compiled = _TEMPLATES.get(key)
+    if compiled is None:
+        binding = {
+            "metric": metric,
+            "time_column": time_col,
+            "dimension": key[4],
+            "dimensions": pick_change_dimensions(dimensions, _distinct_counts(dataset_meta)),
+            "grain": grain,
+            "trend_break_mode": trend_break_mode,
+        }
+        compiled = _compile_patterns(dataset_meta, binding, request_quality)
+        with _LOCK:
+            for stale in [existing for existing in _TEMPLATES if existing[0] != dataset_id]:
+                del _TEMPLATES[stale]
+            _TEMPLATES[key] = compiled
+
+    selected, deferred = schedule_queries(
+        list(compiled.queries),
+        question=keyword_text,
+        max_queries=settings.query_max_per_request if max_queries is None else max_queries,
+        max_cost=settings.query_max_request_cost if max_cost is None else max_cost,
+    )
+    diagnostics = list(compiled.diagnostics)
+    if deferred:
+        diagnostics.append(
+            {
+                "code": "PATTERNS_DEFERRED",
+                "message": (
+                    "Skipped lower-value analyses to stay within the request budget: "
+                    + ", ".join(query["label"] for query in deferred)
+                    + "."
+                ),
+            }
+        )
+
+    request_params = {"top_n": infer_top_n(intent)}
+    queries = [
+        {
+            **query,
+            "params": {
+                name: request_params.get(name, value) for name, value in query["params"].items()
+            },
+        }
+        for query in selected
+    ]
+    patterns = [name for query in selected for name in query["pattern"].split("+")]
+    return queries, diagnostics, list(dict.fromkeys(patterns))
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.services.analytics.column_matcher import QuestionScan
+from src.services.analytics.helpers import pick_time_column
+from src.services.sketch_service import dataset_sketches
+
+# Text columns with at most this many distinct values read as groupable dimensions.
+DIMENSION_MAX_DISTINCT = 50
+
+
+def _column_stats(dataset_meta: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return (dataset_sketches(dataset_meta) or {}).get("column_stats") or {}
+
+
+def _column_score(
+    column: str,
+    kind: str,
+    stats: dict[str, Any] | None,
+    *,
+    rows: int,
+    mention_rank: dict[str, int],
+    time_column: str | None,
+) -> float:
+    score = 0.0
+    if column in mention_rank:
+        score += 100.0 - mention_rank[column]
+    if column == time_column:
+        score += 20.0
+    if kind in {"INTEGER", "REAL"}:
+        score += 10.0
+    if stats is None:
+        return score
+    distinct = int(stats.get("distinct") or 0)
+    if kind == "TEXT" and 1 < distinct <= DIMENSION_MAX_DISTINCT:
+        score += 8.0
+    elif kind == "TEXT" and rows and distinct >= 0.9 * rows:
+        score -= 5.0  # identifier-like, rarely grouped or aggregated
+    if rows and int(stats.get("nulls") or 0) >= rows:
+        score -= 20.0
+    return score
+
+
+def rank_columns(dataset_meta: dict[str, Any], scan: QuestionScan) -> list[str]:
+    """Order columns by likely relevance: mentions, then time, metrics and dimensions."""
+    schema = dataset_meta["schema"]
+    column_stats = _column_stats(dataset_meta)
+    rows = int(dataset_meta.get("rows") or 0)
+    mention_rank = {column: index for index, column in enumerate(scan.mentions)}
+    time_column = pick_time_column(dataset_meta["columns"])
+    position = {column: index for index, column in enumerate(dataset_meta["columns"])}
+    scores = {
+        column: _column_score(
+            column,
+            schema.get(column, "TEXT"),
+            column_stats.get(column),
+            rows=rows,
+            mention_rank=mention_rank,
+            time_column=time_column,
+        )
+        for column in dataset_meta["columns"]
+    }
+    return sorted(dataset_meta["columns"], key=lambda column: (-scores[column], position[column]))
+
+
+def compact_schema(
+    dataset_meta: dict[str, Any], scan: QuestionScan, *, max_columns: int, sample_values: int
+) -> dict[str, Any]:
+    """Typed schema of the top-ranked columns, e.g. ``{"region": "TEXT e.g. north|south"}``.
+
+    Each column is named once; low-cardinality text columns carry their most frequent
+    values so the model can write filters without a lookup.
+    """
+    schema = dataset_meta["schema"]
+    column_stats = _column_stats(dataset_meta) if sample_values > 0 else {}
+    ranked = rank_columns(dataset_meta, scan)
+    kept = ranked[: max(max_columns, 1)]
+    compact: dict[str, str] = {}
+    for column in kept:
+        kind = schema.get(column, "TEXT")
+        stats = column_stats.get(column) or {}
+        values = stats.get("top_values") or []
+        low_cardinality = int(stats.get("distinct") or 0) <= DIMENSION_MAX_DISTINCT
+        compact[column] = (
+            f"{kind} e.g. {'|'.join(values[:sample_values])}"
+            if kind == "TEXT" and values and low_cardinality
+            else kind
+        )
+    payload: dict[str, Any] = {"schema": compact}
+    if len(ranked) > len(kept):
+        payload["omitted_columns"] = len(ranked) - len(kept)
+    return payload
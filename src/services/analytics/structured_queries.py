@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.services.analytics.column_matcher import get_column_matcher
+from src.services.analytics.helpers import pick_time_column
+from src.services.analytics.intent_parser import (
+    KNOWN_WORDS,
+    parse_top_n,
+    top_n_token,
+    unexplained_tokens,
+)
+from src.services.analytics.patterns.shared import GRAIN_BUCKETS, cube_series_source
+from src.services.rollup_service import dataset_cube
+from src.services.sketch_service import match_frequent_values
+
+STRUCTURED_PATTERNS = frozenset(
+    {"heuristic_group_by", "heuristic_time_series", "heuristic_filtered_aggregate"}
+)
+
+_GROUP_MARKERS = frozenset({"by", "per", "across", "each"})
+_AGGREGATES = {
+    "average": "AVG",
+    "mean": "AVG",
+    "avg": "AVG",
+    "sum": "SUM",
+    "total": "SUM",
+    "max": "MAX",
+    "maximum": "MAX",
+    "min": "MIN",
+    "minimum": "MIN",
+}
+_DESCENDING = frozenset({"top", "highest", "largest", "biggest", "most", "best"})
+_ASCENDING = frozenset({"bottom", "lowest", "smallest", "least", "worst"})
+_GRAIN_WORDS = {
+    "day": "day",
+    "days": "day",
+    "daily": "day",
+    "date": "day",
+    "week": "week",
+    "weeks": "week",
+    "weekly": "week",
+    "month": "month",
+    "months": "month",
+    "monthly": "month",
+}
+# Change, comparison and timeframe wording needs logic beyond one aggregate; questions that
+# use it are left to the prebuilt patterns and the LLM planner.
+_VOCABULARY = KNOWN_WORDS - {
+    "between", "change", "changed", "compare", "compared", "current", "decline", "decrease",
+    "drop", "during", "fall", "increase", "last", "mtd", "past", "previous", "prior", "qtd",
+    "rise", "since", "than", "this", "today", "trailing", "under", "versus", "vs", "why",
+    "wtd", "yesterday", "ytd",
+}  # fmt: skip
+DEFAULT_GROUP_LIMIT = 50
+SERIES_LIMIT = 500
+# More unknown words than this are not treated as column values to filter on.
+MAX_FILTER_WORDS = 4
+
+
+def _singularize(tokens: tuple[str, ...], columns: list[str]) -> list[str]:
+    words = {column.lower() for column in columns} | {
+        part for column in columns for part in column.lower().split("_")
+    }
+    return [
+        token[:-1] if token.endswith("s") and token not in words and token[:-1] in words else token
+        for token in tokens
+    ]
+
+
+def _match_filters(
+    dataset_meta: dict[str, Any], words: list[str], leftover: set[str], text_columns: list[str]
+) -> tuple[dict[str, str], set[int]]:
+    """Resolve leftover words (and adjacent pairs) to frequent values of text columns."""
+    if not leftover:
+        return {}, set()
+    spans: dict[str, tuple[int, ...]] = {}
+    for index, word in enumerate(words):
+        if word in leftover:
+            spans.setdefault(word, (index,))
+            if index + 1 < len(words) and words[index + 1] in leftover:
+                spans.setdefault(f"{word} {words[index + 1]}", (index, index + 1))
+    matches = match_frequent_values(dataset_meta, list(spans), text_columns)
+
+    filters: dict[str, str] = {}
+    covered: set[int] = set()
+    # Longer phrases first, so "new york" wins over "new".
+    for phrase in sorted(matches, key=lambda item: -len(spans[item])):
+        column, value = matches[phrase]
+        if column in filters or covered.intersection(spans[phrase]):
+            continue
+        filters[column] = value
+        covered.update(spans[phrase])
+    return filters, covered
+
+
+def build_structured_query(question: str, dataset_meta: dict[str, Any]) -> dict[str, Any] | None:
+    """Plan group-by, time-series, top-N and filtered aggregates without a model call.
+
+    Returns ``None`` unless every word of the question is understood (vocabulary, column
+    names, numbers or frequent column values) and it asks for one of those shapes.
+    """
+    table_name = dataset_meta["table_name"]
+    columns = dataset_meta["columns"]
+    schema = dataset_meta["schema"]
+    matcher = get_column_matcher(dataset_meta)
+    words = _singularize(matcher.scan(question).tokens, columns)
+    if not words:
+        return None
+    mentions = matcher.scan(" ".join(words)).mentions
+
+    numeric = [column for column, kind in schema.items() if kind in {"INTEGER", "REAL"}]
+    text_columns = [column for column, kind in schema.items() if kind == "TEXT"]
+    time_column = pick_time_column(columns)
+
+    # Numbers are only understood when the query uses them: the top-N count or a filter value.
+    # Years and thresholds ("in 2024", "over 1000") would otherwise be silently dropped.
+    count_token = top_n_token(question.lower())
+    consumed = {words.index(count_token)} if count_token in words else set()
+    leftover = set(
+        unexplained_tokens(
+            tuple(word for index, word in enumerate(words) if index not in consumed),
+            columns,
+            vocabulary=_VOCABULARY,
+            numbers=False,
+        )
+    )
+    if leftover & KNOWN_WORDS or len(leftover) > MAX_FILTER_WORDS:
+        return None
+    filters, filtered_words = _match_filters(dataset_meta, words, leftover, text_columns)
+    remaining = [word for index, word in enumerate(words) if index not in filtered_words | consumed]
+    if unexplained_tokens(tuple(remaining), columns, vocabulary=_VOCABULARY, numbers=False):
+        return None
+
+    aggregate = next((_AGGREGATES[word] for word in words if word in _AGGREGATES), None)
+    if "count" in words or "number" in words or ("how" in words and "many" in words):
+        aggregate = aggregate or "COUNT"
+    metric = next((column for column in mentions if column in numeric), None)
+    if metric is None and len(numeric) == 1 and aggregate not in {None, "COUNT"}:
+        metric = numeric[0]
+    if aggregate is None:
+        aggregate = "SUM" if metric else "COUNT"
+    if aggregate != "COUNT" and metric is None:
+        return None
+
+    grain = next((_GRAIN_WORDS[word] for word in words if word in _GRAIN_WORDS), None)
+    series = (
+        grain is not None
+        or "trend" in words
+        or "trends" in words
+        or ("over" in words and "time" in words)
+        or (time_column is not None and time_column in mentions)
+    )
+    if series and time_column is None:
+        return None
+    grain = grain or "day"
+
+    dimension = next(
+        (
+            column
+            for column in mentions
+            if column in text_columns and column != time_column and column not in filters
+        ),
+        None,
+    )
+    grouped = dimension is not None and any(word in _GROUP_MARKERS for word in words)
+    if dimension is not None and not grouped and not series:
+        # "top 5 regions" names the grouping without a marker.
+        grouped = any(word in _DESCENDING or word in _ASCENDING for word in words)
+    if not grouped:
+        dimension = None
+
+    descending = not any(word in _ASCENDING for word in words)
+    ranked = any(word in _DESCENDING or word in _ASCENDING for word in words)
+    top_n = parse_top_n(question.lower())
+    if ranked and top_n is None:
+        top_n = 10 if "top" in words or "bottom" in words else 1
+    if ranked and (dimension is None or series):
+        return None
+    if dimension is None and not series and not filters:
+        return None
+
+    return _compile(
+        table_name=table_name,
+        dataset_meta=dataset_meta,
+        aggregate=aggregate,
+        metric=metric if aggregate != "COUNT" else None,
+        dimension=dimension,
+        time_column=time_column if series else None,
+        grain=grain,
+        filters=filters,
+        top_n=top_n if ranked else None,
+        descending=descending,
+    )
+
+
+def _compile(
+    *,
+    table_name: str,
+    dataset_meta: dict[str, Any],
+    aggregate: str,
+    metric: str | None,
+    dimension: str | None,
+    time_column: str | None,
+    grain: str,
+    filters: dict[str, str],
+    top_n: int | None,
+    descending: bool,
+) -> dict[str, Any]:
+    measure = "Row count" if metric is None else f"{aggregate} of {metric}"
+    label = measure
+    if dimension:
+        label += f" by {dimension}"
+    if time_column:
+        label += f" per {grain}"
+    if filters:
+        label += " where " + ", ".join(f"{column} = {value}" for column, value in filters.items())
+    if top_n is not None:
+        label = f"{'Top' if descending else 'Bottom'} {top_n}: {label}"
+
+    params = {f"filter_{index}": value for index, value in enumerate(filters.values())}
+    if time_column and metric and aggregate == "SUM" and not dimension and not filters:
+        cube_series = cube_series_source(
+            dataset_cube(dataset_meta), metric=metric, time_col=time_column, grain=grain
+        )
+        if cube_series is not None:
+            sql = f"""
+WITH series AS (
+{cube_series}
+)
+SELECT dt AS bucket, metric_value AS value
+FROM series
+ORDER BY bucket
+LIMIT {SERIES_LIMIT}
+""".strip()
+            return {"label": label, "sql": sql, "pattern": "heuristic_time_series"}
+
+    value = "COUNT(*)" if metric is None else f'{aggregate}(CAST("{metric}" AS REAL))'
+    select: list[str] = []
+    group_by: list[str] = []
+    conditions = [f'"{column}" = :filter_{index}' for index, column in enumerate(filters)]
+    if time_column:
+        bucket = GRAIN_BUCKETS[grain].format(time_col=time_column)
+        select.append(f"{bucket} AS bucket")
+        group_by.append("bucket")
+        conditions.append(f"{bucket} IS NOT NULL")
+    if dimension:
+        select.append(f'"{dimension}"')
+        group_by.append(f'"{dimension}"')
+    select.append(f"{value} AS value")
+
+    sql = f'SELECT {", ".join(select)}\nFROM "{table_name}"'
+    if conditions:
+        sql += "\nWHERE " + " AND ".join(conditions)
+    if group_by:
+        sql += "\nGROUP BY " + ", ".join(group_by)
+    if time_column:
+        sql += "\nORDER BY " + ", ".join(group_by) + f"\nLIMIT {top_n or SERIES_LIMIT}"
+        pattern = "heuristic_time_series"
+    elif dimension:
+        direction = "DESC" if descending else "ASC"
+        sql += (
+            f'\nORDER BY value {direction}, "{dimension}" ASC\nLIMIT {top_n or DEFAULT_GROUP_LIMIT}'
+        )
+        pattern = "heuristic_group_by"
+    else:
+        pattern = "heuristic_filtered_aggregate"
+
+    query: dict[str, Any] = {"label": label, "sql": sql, "pattern": pattern}
+    if params:
+        query["params"] = params
+    return query
@@ -14,7 +14,7 @@ def validate_results(
     diagnostics.extend(execution_errors)
 
     executed_count = len(executed_results)
-    non_empty = sum(1 for item in executed_results if item.get("rows"))
+    non_empty = sum(1 for item in executed_results if item.get("row_count"))
 
     if planned_count == 0:
         diagnostics.append(
@@ -52,6 +52,8 @@ def validate_results(
         "MISSING_DIMENSION",
         "SQL_EXECUTION_ERROR",
         "QUERY_BUDGET_EXCEEDED",
+        "QUERY_DEADLINE_EXCEEDED",
+        "REQUEST_CANCELLED",
         "EMPTY_RESULTS",
     }
     has_partial_failure = any(item.get("code") in partial_failure_codes for item in diagnostics)
@@ -3,7 +3,12 @@ from __future__ import annotations
 import json
 from typing import Any
 
+from src.core.settings import get_settings
 from src.llm.router import ModelRouter, try_parse_json
+from src.llm.types import LlmCallResult
+from src.services.sql.columnar import result_rows
+
+SYNTHESIS_MAX_DIAGNOSTICS = 10
 
 
 def _first_numeric_key(row: dict[str, Any]) -> str | None:
@@ -33,12 +38,15 @@ def build_drivers(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]
     for result in executed_results:
         label = result.get("label", "").lower()
         if "decomposition" in label or "contribution" in label:
-            rows = result.get("rows", [])[:5]
+            rows = result_rows(result, limit=5)
             output = []
             for row in rows:
+                name = str(row.get("segment", row.get("name", "segment")))
+                if row.get("dimension"):
+                    name = f"{row['dimension']}={name}"
                 output.append(
                     {
-                        "name": str(row.get("segment", row.get("name", "segment"))),
+                        "name": name,
                         "contribution": float(
                             row.get("contribution", row.get("delta", 0.0)) or 0.0
                         ),
@@ -49,7 +57,7 @@ def build_drivers(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]
                 return output
 
     for result in executed_results:
-        rows = result.get("rows", [])[:5]
+        rows = result_rows(result, limit=5)
         if not rows:
             continue
         first = rows[0]
@@ -79,7 +87,7 @@ def build_charts(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]]
         if result.get("label") == "Trend series":
             points = [
                 {"x": row.get("x"), "y": float(row.get("y", 0.0) or 0.0)}
-                for row in result.get("rows", [])
+                for row in result_rows(result)
             ]
             if points:
                 charts.append(
@@ -94,7 +102,7 @@ def build_charts(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]]
         return charts
 
     for result in executed_results:
-        rows = result.get("rows", [])
+        rows = result_rows(result, limit=30)
         if not rows:
             continue
         first = rows[0]
@@ -120,7 +128,7 @@ def build_charts(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]]
                     "title": f"{result['label']} signal",
                     "data": [
                         {"x": row.get(x_key), "y": float(row.get(y_key, 0.0) or 0.0)}
-                        for row in rows[:30]
+                        for row in rows
                     ],
                 }
             )
@@ -128,42 +136,52 @@ def build_charts(executed_results: list[dict[str, Any]]) -> list[dict[str, Any]]
     return charts
 
 
-def synthesize_narrative(
-    *,
-    router: ModelRouter,
-    request_id: str,
+def _bounded_result(result: dict[str, Any], max_rows: int) -> dict[str, Any]:
+    """Label, columns and the first ``max_rows`` rows of a columnar result; the SQL is dropped."""
+    bounded = {
+        "label": result["label"],
+        "columns": result["columns"],
+        "values": [column[:max_rows] for column in result["values"]],
+        "row_count": result["row_count"],
+    }
+    if result["row_count"] > max_rows:
+        bounded["truncated"] = True
+    return bounded
+
+
+_SYNTHESIS_SYSTEM_PROMPT = (
+    "You are a data analyst assistant. Only summarize what is supported by SQL results. "
+    "If evidence is partial, say that explicitly. Return JSON with headline and narrative."
+)
+
+
+def _no_evidence() -> tuple[str, str, dict[str, int | float | str]]:
+    return (
+        "Insufficient evidence",
+        "No SQL query produced usable results. Upload a richer dataset or clarify metric/timeframe.",
+        {"model": "none", "prompt_tokens": 0, "completion_tokens": 0, "usd": 0.0},
+    )
+
+
+def _synthesis_prompt(
     question: str,
     executed_results: list[dict[str, Any]],
     diagnostics: list[dict[str, str]],
     confidence: dict[str, Any],
     context_citations: list[dict[str, Any]],
-) -> tuple[str, str, dict[str, int | float | str]]:
-    if not executed_results:
-        return (
-            "Insufficient evidence",
-            "No SQL query produced usable results. Upload a richer dataset or clarify metric/timeframe.",
-            {"model": "none", "prompt_tokens": 0, "completion_tokens": 0, "usd": 0.0},
-        )
-
+) -> str:
+    max_rows = get_settings().llm_synthesis_max_rows
     synthesis_input = {
         "question": question,
-        "top_results": executed_results[:3],
-        "diagnostics": diagnostics,
+        "top_results": [_bounded_result(result, max_rows) for result in executed_results[:3]],
+        "diagnostics": diagnostics[:SYNTHESIS_MAX_DIAGNOSTICS],
         "confidence": confidence,
         "context": context_citations[:3],
     }
+    return json.dumps(synthesis_input, separators=(",", ":"), default=str)
 
-    llm = router.call(
-        request_id=request_id,
-        app="data-ghost-api",
-        task="synthesize_explanation",
-        system_prompt=(
-            "You are a data analyst assistant. Only summarize what is supported by SQL results. "
-            "If evidence is partial, say that explicitly. Return JSON with headline and narrative."
-        ),
-        user_prompt=json.dumps(synthesis_input),
-        prefer_expensive=True,
-    )
+
+def _parse_narrative(llm: LlmCallResult) -> tuple[str, str, dict[str, int | float | str]]:
     parsed = try_parse_json(llm.text)
     headline = str(parsed.get("headline") or "Analysis summary")
     narrative = str(
@@ -182,3 +200,55 @@ def synthesize_narrative(
             "usd": llm.usd,
         },
     )
+
+
+def synthesize_narrative(
+    *,
+    router: ModelRouter,
+    request_id: str,
+    question: str,
+    executed_results: list[dict[str, Any]],
+    diagnostics: list[dict[str, str]],
+    confidence: dict[str, Any],
+    context_citations: list[dict[str, Any]],
+) -> tuple[str, str, dict[str, int | float | str]]:
+    if not executed_results:
+        return _no_evidence()
+
+    llm = router.call(
+        request_id=request_id,
+        app="data-ghost-api",
+        task="synthesize_explanation",
+        system_prompt=_SYNTHESIS_SYSTEM_PROMPT,
+        user_prompt=_synthesis_prompt(
+            question, executed_results, diagnostics, confidence, context_citations
+        ),
+        prefer_expensive=True,
+    )
+    return _parse_narrative(llm)
+
+
+async def asynthesize_narrative(
+    *,
+    router: ModelRouter,
+    request_id: str,
+    question: str,
+    executed_results: list[dict[str, Any]],
+    diagnostics: list[dict[str, str]],
+    confidence: dict[str, Any],
+    context_citations: list[dict[str, Any]],
+) -> tuple[str, str, dict[str, int | float | str]]:
+    if not executed_results:
+        return _no_evidence()
+
+    llm = await router.acall(
+        request_id=request_id,
+        app="data-ghost-api",
+        task="synthesize_explanation",
+        system_prompt=_SYNTHESIS_SYSTEM_PROMPT,
+        user_prompt=_synthesis_prompt(
+            question, executed_results, diagnostics, confidence, context_citations
+        ),
+        prefer_expensive=True,
+    )
+    return _parse_narrative(llm)
@@ -20,11 +20,13 @@ def build_ask_cache_key(
     question: str,
     dataset_id: str | None,
     clarifications: dict[str, Any] | None,
+    approximate: bool = False,
 ) -> str:
     payload = {
         "question": _normalize_question(question),
         "dataset_id": dataset_id or "",
         "clarifications": clarifications or {},
+        "approximate": approximate,
     }
     encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
     return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
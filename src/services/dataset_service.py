@@ -9,6 +9,31 @@ from typing import Any
 
 from src.core.settings import get_settings
 from src.db.session import get_connection
+from src.services.analytics.column_matcher import (
+    build_column_aliases,
+    get_column_matcher,
+)
+from src.services.duplicates_service import (
+    DUPLICATE_COUNT_COLUMN,
+    build_duplicate_index,
+    dataset_duplicates,
+    duplicates_table_name,
+    row_hash_table_name,
+)
+from src.services.rollup_service import (
+    build_rollup_cube,
+    cube_reference_tables,
+    cube_row_counts,
+    cube_table_name,
+)
+from src.services.sample_service import build_stratified_sample, sample_table_name
+from src.services.sketch_service import (
+    heavy_hitters_table_name,
+    sketch_reference_tables,
+    sketch_row_counts,
+    sketch_table_name,
+    update_column_sketches,
+)
 from src.storage.repositories import get_dataset_meta, upsert_dataset_meta
 from src.utils.strings import slugify_identifier
 from src.utils.time import utc_now_iso
@@ -26,6 +51,41 @@ class DatasetSummary:
     created_at: datetime
 
 
+def dataset_tables(table_name: str) -> list[str]:
+    """The dataset table plus the derived tables built from it at ingest."""
+    return [
+        table_name,
+        cube_table_name(table_name),
+        sample_table_name(table_name),
+        sketch_table_name(table_name),
+        heavy_hitters_table_name(table_name),
+        row_hash_table_name(table_name),
+        duplicates_table_name(table_name),
+    ]
+
+
+def derived_reference_tables(dataset_meta: dict[str, Any]) -> dict[str, list[str]]:
+    """Tables built from the dataset at ingest that planned SQL may read, with their columns."""
+    tables = {**cube_reference_tables(dataset_meta), **sketch_reference_tables(dataset_meta)}
+    duplicates = dataset_duplicates(dataset_meta)
+    if duplicates:
+        tables[duplicates["table"]] = [
+            *dataset_meta["columns"],
+            duplicates.get("count_column", DUPLICATE_COUNT_COLUMN),
+        ]
+        tables[duplicates["row_hash_table"]] = ["row_id", "row_hash"]
+    return tables
+
+
+def derived_row_counts(dataset_meta: dict[str, Any]) -> dict[str, int]:
+    counts = {**cube_row_counts(dataset_meta), **sketch_row_counts(dataset_meta)}
+    duplicates = dataset_duplicates(dataset_meta)
+    if duplicates:
+        counts[duplicates["table"]] = int(duplicates["duplicate_groups"])
+        counts[duplicates["row_hash_table"]] = int(dataset_meta.get("rows") or 0)
+    return counts
+
+
 def _infer_column_type(values: list[str]) -> str:
     non_empty = [v for v in values if v not in ("", None)]
     if not non_empty:
@@ -118,7 +178,8 @@ def ingest_csv(filename: str, content: bytes) -> DatasetSummary:
     previous = get_dataset_meta()
     with get_connection() as conn:
         if previous:
-            conn.execute(f'DROP TABLE IF EXISTS "{previous["table_name"]}"')
+            for previous_table in dataset_tables(previous["table_name"]):
+                conn.execute(f'DROP TABLE IF EXISTS "{previous_table}"')
 
         column_ddl = ", ".join(f'"{col}" {kind}' for col, kind in schema.items())
         conn.execute(f'CREATE TABLE "{table_name}" ({column_ddl})')
@@ -128,6 +189,30 @@ def ingest_csv(filename: str, content: bytes) -> DatasetSummary:
         insert_sql = f'INSERT INTO "{table_name}" ({quoted_columns}) VALUES ({placeholders})'
         conn.executemany(insert_sql, ([row.get(col) for col in columns] for row in normalized_rows))
 
+        profile: dict[str, Any] = {}
+        cube = build_rollup_cube(
+            conn, table_name=table_name, columns=columns, schema=schema, rows=normalized_rows
+        )
+        if cube is not None:
+            profile["cube"] = cube
+        sample = build_stratified_sample(
+            conn,
+            table_name=table_name,
+            columns=columns,
+            schema=schema,
+            rows=normalized_rows,
+            dimension=cube["dimensions"][0] if cube and cube["dimensions"] else None,
+        )
+        if sample is not None:
+            profile["sample"] = sample
+        profile["sketches"] = update_column_sketches(
+            conn, table_name=table_name, columns=columns, rows=normalized_rows
+        )
+        profile["column_aliases"] = build_column_aliases(columns)
+        profile["duplicates"] = build_duplicate_index(
+            conn, table_name=table_name, columns=columns, schema=schema, rows=normalized_rows
+        )
+
     created_at = utc_now_iso()
     upsert_dataset_meta(
         dataset_id=dataset_id,
@@ -137,7 +222,9 @@ def ingest_csv(filename: str, content: bytes) -> DatasetSummary:
         columns=columns,
         schema=schema,
         created_at=created_at,
+        profile=profile,
     )
+    get_column_matcher({"dataset_id": dataset_id, "columns": columns, "profile": profile})
 
     return DatasetSummary(
         dataset_id=dataset_id,
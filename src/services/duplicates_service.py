@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from typing import Any
+
+DUPLICATE_COUNT_COLUMN = "duplicate_count"
+
+
+def row_hash_table_name(table_name: str) -> str:
+    return f"{table_name}_row_hashes"
+
+
+def duplicates_table_name(table_name: str) -> str:
+    return f"{table_name}_duplicates"
+
+
+def dataset_duplicates(dataset_meta: dict[str, Any]) -> dict[str, Any] | None:
+    return (dataset_meta.get("profile") or {}).get("duplicates")
+
+
+def duplicate_count_column(columns: list[str]) -> str:
+    """Name for the duplicate count that does not shadow a dataset column."""
+    taken = {column.lower() for column in columns}
+    name = DUPLICATE_COUNT_COLUMN
+    while name in taken:
+        name = f"_{name}"
+    return name
+
+
+def _encode_row(values: list[Any]) -> bytes:
+    return json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def row_hash(values: list[Any]) -> int:
+    """Signed 64-bit hash of a normalized row, so it fits an SQLite INTEGER."""
+    digest = hashlib.blake2b(_encode_row(values), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def build_duplicate_index(
+    conn: sqlite3.Connection,
+    *,
+    table_name: str,
+    columns: list[str],
+    schema: dict[str, str],
+    rows: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Hash every full row into an indexed side table and precompute the duplicate summary.
+
+    ``<table>_row_hashes`` maps each dataset ``rowid`` to its hash. ``<table>_duplicates``
+    keeps one representative per repeated row with its count. Groups are keyed on the
+    encoded row values rather than the hash, so a hash collision cannot merge distinct
+    rows. Rows must be passed in insertion order, so row ``i`` has ``rowid`` ``i + 1``.
+    """
+    hash_table = row_hash_table_name(table_name)
+    summary_table = duplicates_table_name(table_name)
+    count_column = duplicate_count_column(columns)
+
+    counts: dict[bytes, list[int]] = {}
+    hashes: list[tuple[int, int]] = []
+    for row_id, row in enumerate(rows, start=1):
+        values = [row.get(column) for column in columns]
+        hashes.append((row_id, row_hash(values)))
+        entry = counts.setdefault(_encode_row(values), [0, row_id])
+        entry[0] += 1
+
+    conn.execute(f'DROP TABLE IF EXISTS "{hash_table}"')
+    conn.execute(
+        f'CREATE TABLE "{hash_table}" (row_id INTEGER PRIMARY KEY, row_hash INTEGER NOT NULL)'
+    )
+    conn.executemany(f'INSERT INTO "{hash_table}" VALUES (?, ?)', hashes)
+    conn.execute(f'CREATE INDEX "idx_{hash_table}_hash" ON "{hash_table}"(row_hash)')
+
+    repeated = sorted(
+        ((count, row_id) for count, row_id in counts.values() if count > 1), reverse=True
+    )
+    column_ddl = ", ".join(f'"{col}" {kind}' for col, kind in schema.items())
+    conn.execute(f'DROP TABLE IF EXISTS "{summary_table}"')
+    conn.execute(
+        f'CREATE TABLE "{summary_table}" ({column_ddl}, "{count_column}" INTEGER NOT NULL)'
+    )
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    conn.executemany(
+        f'INSERT INTO "{summary_table}" VALUES ({placeholders})',
+        (
+            [rows[row_id - 1].get(column) for column in columns] + [count]
+            for count, row_id in repeated
+        ),
+    )
+    conn.execute(
+        f'CREATE INDEX "idx_{summary_table}_count" ' f'ON "{summary_table}"("{count_column}" DESC)'
+    )
+
+    return {
+        "table": summary_table,
+        "row_hash_table": hash_table,
+        "count_column": count_column,
+        "duplicate_groups": len(repeated),
+        "duplicate_rows": sum(count - 1 for count, _ in repeated),
+    }
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from src.db.session import get_connection
+from src.services.analytics.intent_parser import KNOWN_WORDS, unexplained_tokens
+from src.services.rag.embedder import cosine_similarity, embed_text
+from src.utils.time import utc_now_iso
+
+# Stored SQL names the dataset table (and its derived ``<table>_*`` tables) through this.
+TABLE_PLACEHOLDER = "{{table}}"
+# Most recently used plans per schema compared against a paraphrased question.
+REUSE_CANDIDATES = 200
+
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+_STOPWORDS = frozenset(
+    {
+        "a", "an", "and", "are", "by", "can", "could", "did", "do", "does", "for", "from",
+        "has", "have", "in", "is", "it", "me", "my", "of", "on", "our", "show", "tell", "that",
+        "the", "there", "this", "to", "us", "was", "we", "were", "what", "which", "with", "you",
+    }
+)  # fmt: skip
+# Paraphrases collapse onto one canonical token before embedding.
+_SYNONYMS = {
+    "why": "cause",
+    "caused": "cause",
+    "causes": "cause",
+    "reason": "cause",
+    "reasons": "cause",
+    "driver": "cause",
+    "drivers": "cause",
+    "drove": "cause",
+    "explain": "cause",
+    "fall": "drop",
+    "fell": "drop",
+    "falling": "drop",
+    "decline": "drop",
+    "declined": "drop",
+    "decrease": "drop",
+    "decreased": "drop",
+    "dip": "drop",
+    "dropped": "drop",
+    "down": "drop",
+    "rise": "increase",
+    "rose": "increase",
+    "grow": "increase",
+    "grew": "increase",
+    "growth": "increase",
+    "increased": "increase",
+    "spike": "increase",
+    "up": "increase",
+    "total": "sum",
+    "overall": "sum",
+    "mean": "average",
+    "avg": "average",
+    "per": "by",
+    "across": "by",
+    "trends": "trend",
+    "trending": "trend",
+}
+
+# Tokens outside this vocabulary and the column names are literals: filter values, numbers.
+_REUSE_VOCABULARY = KNOWN_WORDS | _STOPWORDS | frozenset(_SYNONYMS.values())
+
+
+@dataclass(frozen=True)
+class CachedPlan:
+    queries: list[dict[str, str]]
+    question: str
+    similarity: float
+    exact: bool
+
+
+def schema_fingerprint(dataset_meta: dict[str, Any]) -> str:
+    """Hash of the ordered column names and types; identical re-uploads share it."""
+    schema = dataset_meta["schema"]
+    encoded = json.dumps([[column, schema.get(column)] for column in dataset_meta["columns"]])
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def normalize_plan_question(question: str) -> str:
+    return " ".join(_WORD_RE.findall(question.lower()))
+
+
+def canonical_plan_question(question: str) -> str:
+    """Stopword-free, synonym-folded tokens; ``why did revenue fall`` -> ``cause revenue drop``."""
+    tokens = (_SYNONYMS.get(token, token) for token in _WORD_RE.findall(question.lower()))
+    return " ".join(token for token in tokens if token not in _STOPWORDS)
+
+
+def plan_literal_tokens(question: str, columns: list[str]) -> frozenset[str]:
+    """Canonical tokens that are not vocabulary or column words, such as ``west`` or ``5``."""
+    tokens = tuple(canonical_plan_question(question).split())
+    return frozenset(
+        unexplained_tokens(tokens, columns, vocabulary=_REUSE_VOCABULARY, numbers=False)
+    )
+
+
+def _clarifications_json(clarifications: dict[str, Any]) -> str:
+    return json.dumps(clarifications, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _cache_key(fingerprint: str, question: str, clarifications: dict[str, Any]) -> str:
+    encoded = json.dumps(
+        {"schema": fingerprint, "question": normalize_plan_question(question), "c": clarifications},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _rebind(queries_json: str, table_name: str) -> list[dict[str, str]]:
+    return [
+        {**query, "sql": query["sql"].replace(TABLE_PLACEHOLDER, table_name)}
+        for query in json.loads(queries_json)
+    ]
+
+
+def _touch(conn: Any, key: str) -> None:
+    conn.execute(
+        "UPDATE llm_plan_cache SET hits = hits + 1, last_used_at = ? WHERE cache_key = ?",
+        (utc_now_iso(), key),
+    )
+
+
+def get_cached_plan(
+    *,
+    dataset_meta: dict[str, Any],
+    question: str,
+    clarifications: dict[str, Any],
+    ttl_seconds: int,
+    min_similarity: float = 1.0,
+) -> CachedPlan | None:
+    """Return stored LLM queries for this schema, rebound to this table.
+
+    An exact normalized-question match wins. Otherwise the nearest stored question with the
+    same schema and clarifications is reused when its canonical embedding is at least
+    ``min_similarity`` close and it names the same literals, so questions differing only in
+    a filter value or number never share SQL. Callers must re-validate the returned SQL.
+    """
+    if ttl_seconds <= 0:
+        return None
+    fingerprint = schema_fingerprint(dataset_meta)
+    key = _cache_key(fingerprint, question, clarifications)
+    table_name = dataset_meta["table_name"]
+    cutoff = time.time() - ttl_seconds
+    with get_connection() as conn:
+        conn.execute("DELETE FROM llm_plan_cache WHERE stored_at <= ?", (cutoff,))
+        row = conn.execute(
+            "SELECT question, queries_json FROM llm_plan_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            _touch(conn, key)
+            return CachedPlan(_rebind(row["queries_json"], table_name), row["question"], 1.0, True)
+        if min_similarity >= 1.0:
+            return None
+
+        candidates = conn.execute(
+            """
+            SELECT cache_key, question, queries_json, embedding_json
+            FROM llm_plan_cache
+            WHERE schema_fingerprint = ? AND clarifications_json = ? AND embedding_json IS NOT NULL
+            ORDER BY last_used_at DESC
+            LIMIT ?
+            """,
+            (fingerprint, _clarifications_json(clarifications), REUSE_CANDIDATES),
+        ).fetchall()
+        if not candidates:
+            return None
+        embedding = embed_text(canonical_plan_question(question))
+        literals = plan_literal_tokens(question, dataset_meta["columns"])
+        best, best_score = None, min_similarity
+        for candidate in candidates:
+            if plan_literal_tokens(candidate["question"], dataset_meta["columns"]) != literals:
+                continue
+            score = cosine_similarity(embedding, json.loads(candidate["embedding_json"]))
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return None
+        _touch(conn, best["cache_key"])
+    return CachedPlan(
+        _rebind(best["queries_json"], table_name), best["question"], best_score, False
+    )
+
+
+def store_plan(
+    *,
+    dataset_meta: dict[str, Any],
+    question: str,
+    clarifications: dict[str, Any],
+    queries: list[dict[str, Any]],
+) -> None:
+    fingerprint = schema_fingerprint(dataset_meta)
+    table_name = dataset_meta["table_name"]
+    templated = [
+        {
+            "label": query["label"],
+            "sql": query["sql"].replace(table_name, TABLE_PLACEHOLDER),
+            "pattern": query["pattern"],
+        }
+        for query in queries
+    ]
+    with get_connection() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO llm_plan_cache(
+                cache_key, schema_fingerprint, question, queries_json, hits, stored_at,
+                last_used_at, clarifications_json, embedding_json
+            )
+            VALUES(?, ?, ?, ?, 0, ?, ?, ?, ?)
+            """,
+            (
+                _cache_key(fingerprint, question, clarifications),
+                fingerprint,
+                normalize_plan_question(question),
+                json.dumps(templated),
+                time.time(),
+                utc_now_iso(),
+                _clarifications_json(clarifications),
+                json.dumps(embed_text(canonical_plan_question(question))),
+            ),
+        )
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import uuid
+from typing import Any, Final
+
+from src.core.logging import get_logger
+from src.core.settings import get_settings
+from src.storage.repositories import insert_query_stats, list_top_query_stats
+from src.utils.time import utc_now_iso
+
+logger = get_logger(__name__)
+
+_LOCK: Final = threading.Lock()
+_PENDING: list[dict[str, Any]] = []
+
+
+def clear_pending_query_stats() -> None:
+    with _LOCK:
+        _PENDING.clear()
+
+
+def flush_query_stats() -> None:
+    """Write this process's buffered stats now.
+
+    Called on a timer and at shutdown by the app lifespan, and before reads of the stats
+    table. Other worker processes keep their own buffers until their next flush.
+    """
+    with _LOCK:
+        batch = list(_PENDING)
+        _PENDING.clear()
+    if batch:
+        insert_query_stats(batch, max_rows=get_settings().query_stats_max_rows)
+
+
+def _sql_hash(sql: str) -> str:
+    normalized = " ".join(sql.split()).lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def record_query_execution(
+    *,
+    sql: str,
+    duration_ms: float,
+    row_count: int,
+    vm_steps: int,
+    status: str,
+    request_id: str | None = None,
+    pattern: str | None = None,
+    label: str | None = None,
+) -> None:
+    settings = get_settings()
+    if not settings.query_stats_enabled:
+        return
+
+    if duration_ms >= settings.query_slow_log_ms:
+        logger.warning(
+            "Slow query: %.1fms rows=%d vm_steps=%d status=%s pattern=%s label=%s",
+            duration_ms,
+            row_count,
+            vm_steps,
+            status,
+            pattern,
+            label,
+            extra={"request_id": request_id},
+        )
+
+    stat = {
+        "id": str(uuid.uuid4()),
+        "request_id": request_id,
+        "pattern": pattern,
+        "label": label,
+        "sql_hash": _sql_hash(sql),
+        "sql": sql,
+        "duration_ms": round(duration_ms, 3),
+        "row_count": row_count,
+        "vm_steps": vm_steps,
+        "status": status,
+        "created_at": utc_now_iso(),
+    }
+    # Stats are buffered and written in batches, so most queries do no stats I/O at all.
+    with _LOCK:
+        _PENDING.append(stat)
+        if len(_PENDING) < settings.query_stats_batch_size:
+            return
+        batch = list(_PENDING)
+        _PENDING.clear()
+    insert_query_stats(batch, max_rows=settings.query_stats_max_rows)
+
+
+def top_query_offenders(*, limit: int, order_by: str) -> list[dict[str, Any]]:
+    flush_query_stats()
+    return list_top_query_stats(limit=limit, order_by=order_by)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, timedelta
+from typing import Any
+
+from src.core.settings import get_settings
+from src.services.analytics.helpers import pick_time_column
+
+CUBE_GRAINS = ("day", "week", "month")
+CUBE_ALL = "(all)"
+CUBE_COLUMNS = [
+    "grain",
+    "bucket",
+    "dimension",
+    "segment",
+    "metric",
+    "row_count",
+    "metric_sum",
+    "metric_count",
+    "metric_min",
+    "metric_max",
+]
+
+
+def cube_table_name(table_name: str) -> str:
+    return f"{table_name}_cube"
+
+
+def dataset_cube(dataset_meta: dict[str, Any]) -> dict[str, Any] | None:
+    return (dataset_meta.get("profile") or {}).get("cube")
+
+
+def cube_reference_tables(dataset_meta: dict[str, Any]) -> dict[str, list[str]]:
+    """Derived tables queries may read besides the dataset table, with their columns."""
+    cube = dataset_cube(dataset_meta)
+    return {cube["table"]: list(CUBE_COLUMNS)} if cube else {}
+
+
+def cube_row_counts(dataset_meta: dict[str, Any]) -> dict[str, int]:
+    cube = dataset_cube(dataset_meta)
+    return {cube["table"]: int(cube.get("rows") or 0)} if cube else {}
+
+
+def _parse_day(value: Any) -> date | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def _buckets(day: date) -> tuple[tuple[str, str], ...]:
+    """Bucket start dates per grain; weeks are ISO weeks starting on Monday."""
+    return (
+        ("day", day.isoformat()),
+        ("week", (day - timedelta(days=day.weekday())).isoformat()),
+        ("month", day.replace(day=1).isoformat()),
+    )
+
+
+def _segment(value: Any) -> str:
+    return "(unknown)" if value is None else str(value)
+
+
+def build_rollup_cube(
+    conn: sqlite3.Connection,
+    *,
+    table_name: str,
+    columns: list[str],
+    schema: dict[str, str],
+    rows: list[dict[str, Any]],
+) -> dict[str, Any] | None:
+    """Materialize day/week/month rollups of every numeric column, overall and per dimension.
+
+    Dimensions are TEXT columns with at most ``cube_max_dimension_cardinality`` distinct
+    values; totals use dimension = segment = '(all)'. Returns the cube profile, or ``None``
+    when the dataset has no parseable time column or numeric metric.
+    """
+    time_col = pick_time_column(columns)
+    if time_col is None or schema.get(time_col) != "TEXT":
+        return None
+    metrics = [
+        column
+        for column, kind in schema.items()
+        if kind in {"INTEGER", "REAL"} and column != time_col
+    ]
+    if not metrics:
+        return None
+
+    max_cardinality = get_settings().cube_max_dimension_cardinality
+    dimensions = []
+    for column, kind in schema.items():
+        if kind != "TEXT" or column == time_col:
+            continue
+        distinct = {_segment(row.get(column)) for row in rows}
+        if 1 < len(distinct) <= max_cardinality:
+            dimensions.append(column)
+
+    # (grain, bucket, dimension, segment) -> [row_count, {metric: [sum, count, min, max]}]
+    groups: dict[tuple[str, str, str, str], list[Any]] = {}
+    for row in rows:
+        day = _parse_day(row.get(time_col))
+        if day is None:
+            continue
+        segments = [(CUBE_ALL, CUBE_ALL)] + [
+            (dimension, _segment(row.get(dimension))) for dimension in dimensions
+        ]
+        for grain, bucket in _buckets(day):
+            for dimension, segment in segments:
+                group = groups.setdefault((grain, bucket, dimension, segment), [0, {}])
+                group[0] += 1
+                for metric in metrics:
+                    value = row.get(metric)
+                    stats = group[1].setdefault(metric, [0.0, 0, None, None])
+                    if value is None:
+                        continue
+                    stats[0] += value
+                    stats[1] += 1
+                    stats[2] = value if stats[2] is None else min(stats[2], value)
+                    stats[3] = value if stats[3] is None else max(stats[3], value)
+
+    cube_table = cube_table_name(table_name)
+    conn.execute(f'DROP TABLE IF EXISTS "{cube_table}"')
+    conn.execute(
+        f"""
+        CREATE TABLE "{cube_table}" (
+            grain TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            dimension TEXT NOT NULL,
+            segment TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            metric_sum REAL,
+            metric_count INTEGER NOT NULL,
+            metric_min REAL,
+            metric_max REAL
+        )
+        """
+    )
+    conn.executemany(
+        f'INSERT INTO "{cube_table}" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (
+            (
+                grain,
+                bucket,
+                dimension,
+                segment,
+                metric,
+                row_count,
+                stats[0] if stats[1] else None,
+                stats[1],
+                stats[2],
+                stats[3],
+            )
+            for (grain, bucket, dimension, segment), (row_count, by_metric) in groups.items()
+            for metric, stats in by_metric.items()
+        ),
+    )
+    conn.execute(
+        f'CREATE INDEX "idx_{cube_table}_lookup" ON "{cube_table}"(metric, grain, dimension, bucket)'
+    )
+    cube_rows = sum(len(by_metric) for _, by_metric in groups.values())
+
+    return {
+        "table": cube_table,
+        "time_column": time_col,
+        "grains": list(CUBE_GRAINS),
+        "dimensions": dimensions,
+        "metrics": metrics,
+        "rows": cube_rows,
+    }
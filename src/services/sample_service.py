@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import math
+import random
+import sqlite3
+from typing import Any
+
+from src.core.settings import get_settings
+from src.services.analytics.helpers import pick_time_column
+from src.services.sql.validator import SqlParseError, parse_sql
+
+SAMPLE_WEIGHT_COLUMN = "_sample_weight"
+# Two-sided 95% normal quantile used for the reported error bounds.
+_Z_95 = 1.96
+
+
+def sample_table_name(table_name: str) -> str:
+    return f"{table_name}_sample"
+
+
+def dataset_sample(dataset_meta: dict[str, Any]) -> dict[str, Any] | None:
+    return (dataset_meta.get("profile") or {}).get("sample")
+
+
+def _stratum(row: dict[str, Any], time_col: str | None, dimension: str | None) -> tuple[str, str]:
+    bucket = row.get(time_col) if time_col else None
+    bucket = bucket[:7] if isinstance(bucket, str) else ""
+    segment = row.get(dimension) if dimension else None
+    return bucket, "" if segment is None else str(segment)
+
+
+def _relative_error(
+    strata: dict[tuple[str, str], list[dict[str, Any]]],
+    sizes: dict[tuple[str, str], int],
+    metric: str,
+) -> float | None:
+    """95% relative error of the stratified estimate of ``SUM(metric)``."""
+    total = 0.0
+    variance = 0.0
+    for key, sampled in strata.items():
+        values = [row[metric] for row in sampled if row.get(metric) is not None]
+        if not values:
+            continue
+        population, taken = sizes[key], len(sampled)
+        mean = sum(values) / len(values)
+        total += population * mean * len(values) / taken
+        if len(values) > 1:
+            spread = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+            variance += population**2 * (1 - taken / population) * spread / taken
+    if total == 0:
+        return None
+    return _Z_95 * math.sqrt(variance) / abs(total)
+
+
+def build_stratified_sample(
+    conn: sqlite3.Connection,
+    *,
+    table_name: str,
+    columns: list[str],
+    schema: dict[str, str],
+    rows: list[dict[str, Any]],
+    dimension: str | None = None,
+) -> dict[str, Any] | None:
+    """Keep a reservoir sample per (month, ``dimension``) stratum, sized proportionally.
+
+    Each sampled row carries ``_sample_weight`` = stratum rows / sampled rows, so weighted
+    SUM/COUNT over the sample estimate the full-table totals. Returns the sample profile, or
+    ``None`` when the dataset already fits in ``sample_target_rows``.
+    """
+    target = get_settings().sample_target_rows
+    if target <= 0 or len(rows) <= target:
+        return None
+    time_col = pick_time_column(columns)
+
+    sizes: dict[tuple[str, str], int] = {}
+    for row in rows:
+        key = _stratum(row, time_col, dimension)
+        sizes[key] = sizes.get(key, 0) + 1
+    capacity = {key: max(1, round(target * size / len(rows))) for key, size in sizes.items()}
+
+    rng = random.Random(table_name)
+    reservoirs: dict[tuple[str, str], list[dict[str, Any]]] = {key: [] for key in sizes}
+    seen: dict[tuple[str, str], int] = dict.fromkeys(sizes, 0)
+    for row in rows:
+        key = _stratum(row, time_col, dimension)
+        seen[key] += 1
+        reservoir = reservoirs[key]
+        if len(reservoir) < capacity[key]:
+            reservoir.append(row)
+        else:
+            slot = rng.randrange(seen[key])
+            if slot < capacity[key]:
+                reservoir[slot] = row
+
+    sample_table = sample_table_name(table_name)
+    conn.execute(f'DROP TABLE IF EXISTS "{sample_table}"')
+    column_ddl = ", ".join(f'"{col}" {kind}' for col, kind in schema.items())
+    conn.execute(f'CREATE TABLE "{sample_table}" ({column_ddl}, {SAMPLE_WEIGHT_COLUMN} REAL)')
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    conn.executemany(
+        f'INSERT INTO "{sample_table}" VALUES ({placeholders})',
+        (
+            [row.get(col) for col in columns] + [sizes[key] / len(reservoir)]
+            for key, reservoir in reservoirs.items()
+            for row in reservoir
+        ),
+    )
+
+    metrics = [column for column, kind in schema.items() if kind in {"INTEGER", "REAL"}]
+    return {
+        "table": sample_table,
+        "rows": sum(len(reservoir) for reservoir in reservoirs.values()),
+        "source_rows": len(rows),
+        "strata": len(sizes),
+        "stratified_by": [column for column in (time_col, dimension) if column],
+        "relative_error": {
+            metric: _relative_error(reservoirs, sizes, metric) for metric in metrics
+        },
+    }
+
+
+def reads_table(sql: str, table_name: str) -> bool:
+    """Whether ``sql`` reads ``table_name`` anywhere (unparsable SQL counts as not reading it)."""
+    try:
+        from sqlglot import exp
+
+        return any(table.name == table_name for table in parse_sql(sql).find_all(exp.Table))
+    except (ImportError, RuntimeError, SqlParseError):
+        return False
+
+
+def rewrite_for_sample(sql: str, *, table_name: str, sample_table: str) -> str | None:
+    """Point ``sql`` at the sample table and scale its aggregates by the sample weights.
+
+    Only aggregates whose SELECT reads the dataset table directly are scaled: SUM and COUNT
+    become weighted sums and AVG a weighted mean. MIN/MAX and DISTINCT aggregates cannot be
+    estimated from a sample, so such queries are not rewritten. Returns ``None`` when the
+    query cannot be rewritten and must run on the full table.
+    """
+    try:
+        from sqlglot import exp
+
+        tree = parse_sql(sql).copy()
+    except (ImportError, RuntimeError, SqlParseError):
+        return None
+
+    weight = exp.column(SAMPLE_WEIGHT_COLUMN)
+
+    def weighted_count(arg: Any) -> Any:
+        if arg is None or isinstance(arg, exp.Star):
+            return exp.Sum(this=weight.copy())
+        present = exp.Not(this=exp.Is(this=arg.copy(), expression=exp.Null()))
+        return exp.Sum(this=exp.Case().when(present, weight.copy()))
+
+    for select in list(tree.find_all(exp.Select)):
+        from_clause = select.args.get("from") or select.args.get("from_")
+        sources = [from_clause] + list(select.args.get("joins") or [])
+        reads_dataset = any(
+            isinstance(source.this, exp.Table) and source.this.name == table_name
+            for source in sources
+            if source is not None
+        )
+        if not reads_dataset:
+            continue
+        if select.args.get("joins"):
+            return None  # the weight column would be ambiguous across joined tables
+        if any(
+            isinstance(agg, (exp.Min, exp.Max)) or isinstance(agg.this, exp.Distinct)
+            for agg in select.find_all(exp.Min, exp.Max, exp.Count, exp.Sum, exp.Avg)
+            if agg.find_ancestor(exp.Select) is select
+        ):
+            return None
+
+        for agg in list(select.find_all(exp.Count, exp.Sum, exp.Avg)):
+            if agg.find_ancestor(exp.Select) is not select:
+                continue
+            arg = agg.this
+            if isinstance(agg, exp.Count):
+                agg.replace(weighted_count(arg))
+            elif isinstance(agg, exp.Sum):
+                agg.replace(
+                    exp.Sum(this=exp.Mul(this=exp.paren(arg.copy()), expression=weight.copy()))
+                )
+            else:
+                agg.replace(
+                    exp.Div(
+                        this=exp.Sum(
+                            this=exp.Mul(this=exp.paren(arg.copy()), expression=weight.copy())
+                        ),
+                        expression=exp.Nullif(
+                            this=weighted_count(arg), expression=exp.Literal.number(0)
+                        ),
+                    )
+                )
+
+    for table in tree.find_all(exp.Table):
+        if table.name == table_name:
+            table.set("this", exp.to_identifier(sample_table, quoted=True))
+    return tree.sql(dialect="sqlite")
+
+
+def is_scaled_sample_query(sql: str) -> bool:
+    """Whether rewritten ``sql`` aggregates with the sample weights rather than raw rows."""
+    return SAMPLE_WEIGHT_COLUMN in sql
+
+
+def sample_error_message(
+    sample: dict[str, Any], metric: str | None, *, scaled: int, unscaled: list[str]
+) -> str:
+    """Describe a sampled answer; the error bound only covers the ``scaled`` weighted totals.
+
+    ``unscaled`` labels results read straight off sample rows, which carry no bound.
+    """
+    share = 100 * sample["rows"] / max(sample["source_rows"], 1)
+    message = (
+        f"Approximate answer from a {sample['rows']:,}-row stratified sample "
+        f"({share:.1f}% of {sample['source_rows']:,} rows)"
+    )
+    error = (sample.get("relative_error") or {}).get(metric) if metric else None
+    if scaled and error is not None:
+        message += f"; totals of {metric} are within ±{100 * error:.1f}% at 95% confidence"
+    if unscaled:
+        message += f"; {', '.join(unscaled)}: raw sample values with no error bound"
+    return message + ". Ask again with approximate=false for exact results."
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import sqlite3
+from collections import Counter
+from typing import Any
+
+from src.core.settings import get_settings
+from src.db.session import get_read_only_connection
+
+NULL_VALUE = "(null)"
+HLL_PRECISION = 12
+SKETCH_COLUMNS = ["column_name", "row_count", "null_count", "distinct_estimate", "distinct_exact"]
+HEAVY_HITTER_COLUMNS = ["column_name", "value", "frequency", "max_error"]
+# Most frequent values per column kept in the profile, and their length cap.
+PROFILE_TOP_VALUES = 3
+PROFILE_VALUE_CHARS = 40
+
+
+def sketch_table_name(table_name: str) -> str:
+    return f"{table_name}_sketches"
+
+
+def heavy_hitters_table_name(table_name: str) -> str:
+    return f"{table_name}_heavy_hitters"
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct-count sketch with ``2**precision`` one-byte registers; merge is register max."""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: bytes | None = None) -> None:
+        self.precision = precision
+        self.registers = bytearray(registers or bytes(1 << precision))
+
+    def add(self, value: str) -> None:
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        self.registers[index] = max(self.registers[index], rank)
+
+    def merge(self, other: HyperLogLog) -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / sum(2.0**-register for register in self.registers)
+        empty = self.registers.count(0)
+        if raw <= 2.5 * size and empty:
+            # Linear counting is far more accurate while most registers are still empty.
+            raw = size * math.log(size / empty)
+        return round(raw)
+
+
+class MisraGries:
+    """Heavy-hitter sketch keeping at most ``capacity`` counters.
+
+    Counts are lower bounds that undercount by at most ``max_error``; until the first
+    eviction (``saturated`` is false) they are exact and cover every distinct value.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        counters: dict[str, int] | None = None,
+        *,
+        total: int = 0,
+        max_error: int = 0,
+        saturated: bool = False,
+    ) -> None:
+        self.capacity = capacity
+        self.counters = dict(counters or {})
+        self.total = total
+        self.max_error = max_error
+        self.saturated = saturated
+
+    @classmethod
+    def from_counts(cls, capacity: int, counts: dict[str, int]) -> MisraGries:
+        """Summarize exact batch counts; one shrink keeps the usual ``total / (k + 1)`` bound."""
+        sketch = cls(capacity, counts, total=sum(counts.values()))
+        sketch._shrink()
+        return sketch
+
+    def merge(self, other: MisraGries) -> None:
+        for value, count in other.counters.items():
+            self.counters[value] = self.counters.get(value, 0) + count
+        self.total += other.total
+        self.max_error += other.max_error
+        self.saturated = self.saturated or other.saturated
+        self._shrink()
+
+    def _shrink(self) -> None:
+        if len(self.counters) <= self.capacity:
+            return
+        cut = sorted(self.counters.values(), reverse=True)[self.capacity]
+        self.counters = {
+            value: count - cut for value, count in self.counters.items() if count > cut
+        }
+        self.max_error += cut
+        self.saturated = True
+
+    def top(self, limit: int | None = None) -> list[tuple[str, int]]:
+        ranked = sorted(self.counters.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if limit is None else ranked[:limit]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "capacity": self.capacity,
+                "counters": self.counters,
+                "total": self.total,
+                "max_error": self.max_error,
+                "saturated": self.saturated,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> MisraGries:
+        data = json.loads(payload)
+        return cls(
+            data["capacity"],
+            data["counters"],
+            total=data["total"],
+            max_error=data["max_error"],
+            saturated=data["saturated"],
+        )
+
+
+def _text_value(value: Any) -> str | None:
+    # Mirrors COALESCE(CAST(col AS TEXT), '(null)') in the exact frequency query.
+    return None if value is None else str(value)
+
+
+def _ensure_tables(conn: sqlite3.Connection, table_name: str) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS "{sketch_table_name(table_name)}" (
+            column_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL,
+            null_count INTEGER NOT NULL,
+            distinct_estimate INTEGER NOT NULL,
+            distinct_exact INTEGER NOT NULL,
+            hll BLOB NOT NULL,
+            heavy_hitters_json TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS "{heavy_hitters_table_name(table_name)}" (
+            column_name TEXT NOT NULL,
+            value TEXT NOT NULL,
+            frequency INTEGER NOT NULL,
+            max_error INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def update_column_sketches(
+    conn: sqlite3.Connection,
+    *,
+    table_name: str,
+    columns: list[str],
+    rows: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Fold ``rows`` into the stored per-column sketches, creating them on first use.
+
+    The new rows are sketched on their own and merged into what is stored, so appends only
+    pay for the appended rows. Returns the sketch profile kept in ``dataset_meta``, including
+    per-column distinct/null counts and the most frequent values for prompt building.
+    """
+    capacity = get_settings().sketch_heavy_hitters_capacity
+    sketch_table = sketch_table_name(table_name)
+    hitters_table = heavy_hitters_table_name(table_name)
+    _ensure_tables(conn, table_name)
+    stored = {
+        row[0]: row
+        for row in conn.execute(
+            f'SELECT column_name, row_count, null_count, hll, heavy_hitters_json FROM "{sketch_table}"'
+        )
+    }
+
+    column_stats: dict[str, dict[str, Any]] = {}
+    for column in columns:
+        counts = Counter(_text_value(row.get(column)) for row in rows)
+        nulls = counts.pop(None, 0)
+        hll = HyperLogLog()
+        for value in counts:
+            hll.add(value)
+        if nulls:
+            counts[NULL_VALUE] += nulls
+        heavy = MisraGries.from_counts(capacity, counts)
+
+        row_count = len(rows)
+        previous = stored.get(column)
+        if previous is not None:
+            row_count += previous[1]
+            nulls += previous[2]
+            hll.merge(HyperLogLog(registers=previous[3]))
+            merged = MisraGries.from_json(previous[4])
+            merged.merge(heavy)
+            heavy = merged
+
+        if heavy.saturated:
+            distinct, exact = hll.estimate(), 0
+        else:
+            distinct, exact = len(heavy.counters) - (1 if nulls else 0), 1
+        conn.execute(
+            f'INSERT OR REPLACE INTO "{sketch_table}" VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (column, row_count, nulls, distinct, exact, bytes(hll.registers), heavy.to_json()),
+        )
+        conn.execute(f'DELETE FROM "{hitters_table}" WHERE column_name = ?', (column,))
+        conn.executemany(
+            f'INSERT INTO "{hitters_table}" VALUES (?, ?, ?, ?)',
+            ((column, value, count, heavy.max_error) for value, count in heavy.top()),
+        )
+        column_stats[column] = {
+            "distinct": distinct,
+            "nulls": nulls,
+            "top_values": [
+                value[:PROFILE_VALUE_CHARS]
+                for value, _ in heavy.top(PROFILE_TOP_VALUES + 1)
+                if value != NULL_VALUE
+            ][:PROFILE_TOP_VALUES],
+        }
+
+    total_rows = conn.execute(f'SELECT MAX(row_count) FROM "{sketch_table}"').fetchone()[0]
+    return {
+        "table": sketch_table,
+        "heavy_hitters_table": hitters_table,
+        "capacity": capacity,
+        "columns": list(columns),
+        "rows": int(total_rows or 0),
+        "column_stats": column_stats,
+    }
+
+
+def dataset_sketches(dataset_meta: dict[str, Any]) -> dict[str, Any] | None:
+    return (dataset_meta.get("profile") or {}).get("sketches")
+
+
+def sketch_reference_tables(dataset_meta: dict[str, Any]) -> dict[str, list[str]]:
+    sketches = dataset_sketches(dataset_meta)
+    if not sketches:
+        return {}
+    return {
+        sketches["table"]: list(SKETCH_COLUMNS),
+        sketches["heavy_hitters_table"]: list(HEAVY_HITTER_COLUMNS),
+    }
+
+
+def sketch_row_counts(dataset_meta: dict[str, Any]) -> dict[str, int]:
+    sketches = dataset_sketches(dataset_meta)
+    if not sketches:
+        return {}
+    columns = len(sketches["columns"])
+    return {
+        sketches["table"]: columns,
+        sketches["heavy_hitters_table"]: columns * int(sketches["capacity"]),
+    }
+
+
+def match_frequent_values(
+    dataset_meta: dict[str, Any], phrases: list[str], columns: list[str]
+) -> dict[str, tuple[str, str]]:
+    """Map lowercase ``phrases`` to ``(column, stored value)`` via the heavy-hitter table.
+
+    Only the tracked most frequent values of ``columns`` can match, and a phrase found in
+    more than one column is left out as ambiguous.
+    """
+    sketches = dataset_sketches(dataset_meta)
+    if not sketches or not phrases or not columns:
+        return {}
+    phrase_marks = ", ".join("?" for _ in phrases)
+    column_marks = ", ".join("?" for _ in columns)
+    with get_read_only_connection() as conn:
+        rows = conn.execute(
+            f'SELECT column_name, value FROM "{sketches["heavy_hitters_table"]}" '
+            f"WHERE LOWER(value) IN ({phrase_marks}) AND column_name IN ({column_marks})",
+            (*phrases, *columns),
+        ).fetchall()
+    matches: dict[str, list[tuple[str, str]]] = {}
+    for column, value in rows:
+        matches.setdefault(value.lower(), []).append((column, value))
+    return {phrase: found[0] for phrase, found in matches.items() if len(found) == 1}
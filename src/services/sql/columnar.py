@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, TypedDict
+
+
+class ColumnarResult(TypedDict):
+    columns: list[str]
+    values: list[list[Any]]
+    row_count: int
+
+
+def columnar_from_tuples(columns: list[str], rows: Sequence[Sequence[Any]]) -> ColumnarResult:
+    if rows:
+        values = [list(column_values) for column_values in zip(*rows, strict=True)]
+    else:
+        values = [[] for _ in columns]
+    return {"columns": columns, "values": values, "row_count": len(rows)}
+
+
+def result_rows(result: dict[str, Any], limit: int | None = None) -> list[dict[str, Any]]:
+    """Build row dicts from a columnar result; only call this at the API/answer edge."""
+    columns = result.get("columns") or []
+    values = result.get("values") or []
+    count = int(result.get("row_count") or 0)
+    if limit is not None:
+        count = min(count, limit)
+    return [
+        {column: values[idx][row_idx] for idx, column in enumerate(columns)}
+        for row_idx in range(count)
+    ]
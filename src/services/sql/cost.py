@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.db.session import get_connection
+from src.services.sql.validator import SqlParseError, parse_sql
+
+_ONCE_PREFIXES = (
+    "MATERIALIZE ",
+    "CO-ROUTINE ",
+    "SCALAR SUBQUERY",
+    "LIST SUBQUERY",
+    "COMPOUND QUERY",
+    "LEFT-MOST SUBQUERY",
+    "UNION ",
+    "MERGE ",
+)
+
+
+@dataclass
+class QueryCostEstimate:
+    cost: float | None
+    plan: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class _PlanNode:
+    detail: str
+    children: list[_PlanNode] = field(default_factory=list)
+
+
+def _build_plan_tree(rows: list[tuple[int, int, str]]) -> list[_PlanNode]:
+    nodes: dict[int, _PlanNode] = {}
+    roots: list[_PlanNode] = []
+    for node_id, parent_id, detail in rows:
+        node = _PlanNode(detail=detail)
+        nodes[node_id] = node
+        parent = nodes.get(parent_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+    return roots
+
+
+def _loop_target(detail: str) -> str:
+    name = detail.split(" ", 1)[1] if " " in detail else ""
+    if name.startswith("("):
+        return name.split(")", 1)[0] + ")"
+    return name.split(" ", 1)[0]
+
+
+def _estimate_select_rows(select: Any, known: dict[str, float], fallback: float) -> float:
+    from sqlglot import exp
+
+    if not isinstance(select, exp.Select):
+        return fallback
+
+    sources: list[Any] = []
+    from_clause = select.args.get("from") or select.args.get("from_")
+    if from_clause is not None and from_clause.this is not None:
+        sources.append(from_clause.this)
+    sources.extend(join.this for join in select.args.get("joins") or [])
+
+    rows = 1.0
+    for source in sources:
+        if isinstance(source, exp.Table):
+            rows *= known.get(source.name, fallback)
+        elif isinstance(source, exp.Subquery):
+            rows *= _estimate_select_rows(source.this, known, fallback)
+        else:
+            rows *= fallback
+
+    aggregated = any(
+        isinstance(node, exp.AggFunc) and node.find_ancestor(exp.Window) is None
+        for expression in select.expressions
+        for node in expression.walk()
+    )
+    if aggregated and not select.args.get("group"):
+        rows = 1.0
+
+    limit = select.args.get("limit")
+    limit_value = getattr(limit, "expression", None) if limit is not None else None
+    if isinstance(limit_value, exp.Literal) and limit_value.is_int:
+        rows = min(rows, float(limit_value.this))
+    return max(rows, 1.0)
+
+
+def _relation_row_estimates(sql: str, row_counts: dict[str, int]) -> dict[str, float]:
+    """Map every table alias and CTE name in ``sql`` to an upper-bound row estimate.
+
+    Base tables use their known row counts. CTEs are estimated from their own FROM/JOIN
+    sources, collapsing to one row for ungrouped aggregates and capping at literal LIMITs.
+    """
+    known: dict[str, float] = {name: float(count) for name, count in row_counts.items()}
+    try:
+        from sqlglot import exp
+    except ImportError:
+        return known
+
+    try:
+        parsed = parse_sql(sql.strip().rstrip(";"))
+    except SqlParseError:
+        return known
+
+    fallback = max(known.values(), default=1.0)
+    for cte in parsed.find_all(exp.CTE):
+        known[cte.alias] = _estimate_select_rows(cte.this, known, fallback)
+
+    for table in parsed.find_all(exp.Table):
+        if table.alias and table.name in known:
+            known[table.alias] = known[table.name]
+    return known
+
+
+def _search_fanout(detail: str, rows: float) -> float:
+    upper = detail.upper()
+    if "USING" not in upper:
+        return 1.0
+    if "ROWID=" in upper or "INTEGER PRIMARY KEY" in upper:
+        return 1.0
+    if "<" in upper or ">" in upper:
+        return max(rows / 3.0, 1.0)
+    return max(math.sqrt(rows), 1.0)
+
+
+def _plan_cost(
+    nodes: list[_PlanNode], *, outer_rows: float, relations: dict[str, float], fallback: float
+) -> float:
+    loop_rows = outer_rows
+    total = 0.0
+    for node in nodes:
+        detail = node.detail
+        if detail.startswith("SCAN "):
+            target = _loop_target(detail)
+            rows = 1.0 if target == "CONSTANT" else relations.get(target, fallback)
+            loop_rows *= rows
+            total += loop_rows
+        elif detail.startswith("SEARCH "):
+            rows = relations.get(_loop_target(detail), fallback)
+            if "AUTOMATIC" in detail.upper():
+                total += rows * math.log2(rows + 1)
+            fanout = _search_fanout(detail, rows)
+            total += loop_rows * (math.log2(rows + 1) + fanout)
+            loop_rows *= fanout
+        elif detail.startswith("CORRELATED "):
+            total += _plan_cost(
+                node.children, outer_rows=loop_rows, relations=relations, fallback=fallback
+            )
+        elif detail.startswith("USE TEMP B-TREE"):
+            total += loop_rows * math.log2(loop_rows + 1)
+        elif detail.startswith(_ONCE_PREFIXES) or node.children:
+            total += _plan_cost(
+                node.children, outer_rows=1.0, relations=relations, fallback=fallback
+            )
+    return total
+
+
+def estimate_query_cost(
+    sql: str,
+    *,
+    row_counts: dict[str, int],
+    params: dict[str, Any] | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> QueryCostEstimate:
+    """Estimate the number of row visits ``sql`` needs from its EXPLAIN QUERY PLAN.
+
+    Nested SCAN/SEARCH loops multiply, correlated subqueries run once per outer row and
+    materialized CTEs or scalar subqueries are charged once. Plans SQLite refuses to
+    explain return ``cost=None`` so execution can surface the real error.
+    """
+    try:
+        if conn is None:
+            with get_connection() as owned:
+                raw_rows = owned.execute(f"EXPLAIN QUERY PLAN {sql}", params or {}).fetchall()
+        else:
+            raw_rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or {}).fetchall()
+    except sqlite3.Error as exc:
+        return QueryCostEstimate(cost=None, error=str(exc))
+
+    plan_rows = [(int(row[0]), int(row[1]), str(row[3])) for row in raw_rows]
+    relations = _relation_row_estimates(sql, row_counts)
+    fallback = max((float(count) for count in row_counts.values()), default=1.0)
+    cost = _plan_cost(
+        _build_plan_tree(plan_rows), outer_rows=1.0, relations=relations, fallback=fallback
+    )
+    return QueryCostEstimate(cost=round(cost, 2), plan=[row[2] for row in plan_rows])
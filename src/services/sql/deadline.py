@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Final
+
+
+class QueryDeadline:
+    """Time budget shared by every query of one request, cancellable from another thread."""
+
+    def __init__(self, timeout_seconds: float) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.expires_at: float | None = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._connections: set[sqlite3.Connection] = set()
+        self._linked: list[QueryDeadline] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.expires_at is None:
+                self.expires_at = time.monotonic() + self.timeout_seconds
+
+    def remaining(self) -> float:
+        self.start()
+        return max(0.0, (self.expires_at or 0.0) - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        with self._lock:
+            connections = list(self._connections)
+            linked = list(self._linked)
+        for conn in connections:
+            conn.interrupt()
+        for deadline in linked:
+            deadline.cancel()
+
+    def link(self, other: QueryDeadline) -> None:
+        """Cancel ``other`` along with this deadline; its time budget stays its own."""
+        with self._lock:
+            self._linked.append(other)
+        if self.cancelled:
+            other.cancel()
+
+    @contextmanager
+    def track(self, conn: sqlite3.Connection) -> Iterator[None]:
+        with self._lock:
+            self._connections.add(conn)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+
+
+_LOCK: Final = threading.Lock()
+_DEADLINES: dict[str, QueryDeadline] = {}
+
+
+def start_request_deadline(request_id: str, timeout_seconds: float) -> QueryDeadline:
+    deadline = QueryDeadline(timeout_seconds)
+    with _LOCK:
+        _DEADLINES[request_id] = deadline
+    return deadline
+
+
+def get_request_deadline(request_id: str) -> QueryDeadline | None:
+    with _LOCK:
+        return _DEADLINES.get(request_id)
+
+
+def cancel_request_deadline(request_id: str) -> None:
+    with _LOCK:
+        deadline = _DEADLINES.get(request_id)
+    if deadline is not None:
+        deadline.cancel()
+
+
+def release_request_deadline(request_id: str) -> None:
+    with _LOCK:
+        _DEADLINES.pop(request_id, None)
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import sqlite3
 import time
+from contextlib import nullcontext
 from dataclasses import dataclass
 from typing import Any
 
 from src.core.settings import get_settings
-from src.db.session import get_connection
+from src.db.session import get_read_only_connection
+from src.services.query_stats_service import record_query_execution
+from src.services.sql.columnar import ColumnarResult, columnar_from_tuples
+from src.services.sql.deadline import QueryDeadline
 from src.services.sql.validator import validate_safe_select
 
 
@@ -20,6 +24,9 @@ class SqlExecutionError(Exception):
     pass
 
 
+_PROGRESS_HANDLER_STEPS = 1000
+
+
 def _enforce_limit(sql: str, limit: int) -> str:
     cleaned = sql.strip().rstrip(";")
     if "LIMIT" in cleaned.upper():
@@ -27,35 +34,138 @@ def _enforce_limit(sql: str, limit: int) -> str:
     return f"{cleaned} LIMIT {limit}"
 
 
-def execute_safe_query(sql: str) -> list[dict[str, Any]]:
+def execute_safe_query(
+    sql: str,
+    *,
+    deadline: QueryDeadline | None = None,
+    request_id: str | None = None,
+    pattern: str | None = None,
+    label: str | None = None,
+    trusted: bool = False,
+    params: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    columns, rows = _execute_bounded(
+        sql,
+        params=params,
+        deadline=deadline,
+        request_id=request_id,
+        pattern=pattern,
+        label=label,
+        trusted=trusted,
+    )
+    return [dict(zip(columns, row, strict=True)) for row in rows]
+
+
+def execute_safe_query_columnar(
+    sql: str,
+    *,
+    deadline: QueryDeadline | None = None,
+    request_id: str | None = None,
+    pattern: str | None = None,
+    label: str | None = None,
+    trusted: bool = False,
+    params: dict[str, Any] | None = None,
+) -> ColumnarResult:
+    columns, rows = _execute_bounded(
+        sql,
+        params=params,
+        deadline=deadline,
+        request_id=request_id,
+        pattern=pattern,
+        label=label,
+        trusted=trusted,
+    )
+    return columnar_from_tuples(columns, rows)
+
+
+def _execute_bounded(
+    sql: str,
+    *,
+    params: dict[str, Any] | None,
+    deadline: QueryDeadline | None,
+    request_id: str | None,
+    pattern: str | None,
+    label: str | None,
+    trusted: bool,
+) -> tuple[list[str], list[tuple[Any, ...]]]:
+    """Run ``sql`` on a read-only connection whose authorizer rejects anything but reads.
+
+    ``trusted`` SQL (built by our own patterns from slugified identifiers) skips the parser-based
+    check; the engine-level authorizer still applies to every query.
+    """
     settings = get_settings()
-    validation = validate_safe_select(sql)
-    if not validation.is_valid:
-        raise SqlExecutionError(validation.reason or "Unsafe SQL")
+    if not trusted:
+        validation = validate_safe_select(sql)
+        if not validation.is_valid:
+            raise SqlExecutionError(validation.reason or "Unsafe SQL")
 
     bounded_sql = _enforce_limit(sql, settings.query_max_rows)
 
-    with get_connection() as conn:
+    timeout_seconds = settings.query_timeout_seconds
+    if deadline is not None:
+        if deadline.cancelled:
+            raise SqlExecutionError("Query cancelled")
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise SqlExecutionError("Request query deadline exceeded")
+        timeout_seconds = min(timeout_seconds, remaining)
+
+    columns: list[str] = []
+    rows: list[tuple[Any, ...]] = []
+    status = "ok"
+    error: SqlExecutionError | None = None
+    progress_calls = 0
+
+    with get_read_only_connection() as conn:
         start = time.monotonic()
 
         def progress_handler() -> int:
+            nonlocal progress_calls
+            progress_calls += 1
+            if deadline is not None and deadline.cancelled:
+                return 1
             elapsed = time.monotonic() - start
-            if elapsed > settings.query_timeout_seconds:
+            if elapsed > timeout_seconds:
                 return 1
             return 0
 
-        conn.set_progress_handler(progress_handler, 1000)
+        conn.row_factory = None
+        conn.set_progress_handler(progress_handler, _PROGRESS_HANDLER_STEPS)
         try:
-            cursor = conn.execute(bounded_sql)
-            rows = cursor.fetchall()
-        except sqlite3.OperationalError as exc:
+            with deadline.track(conn) if deadline is not None else nullcontext():
+                cursor = conn.execute(bounded_sql, params or {})
+                rows = cursor.fetchall()
+                columns = [description[0] for description in cursor.description or []]
+        except sqlite3.DatabaseError as exc:
             if "interrupted" in str(exc).lower():
-                raise SqlExecutionError("Query timed out") from exc
-            raise SqlExecutionError(str(exc)) from exc
+                cancelled = deadline is not None and deadline.cancelled
+                status = "cancelled" if cancelled else "timeout"
+                error = SqlExecutionError("Query cancelled" if cancelled else "Query timed out")
+            elif "not authorized" in str(exc).lower():
+                status = "denied"
+                error = SqlExecutionError(f"Query rejected by read-only guard: {exc}")
+            else:
+                status = "error"
+                error = SqlExecutionError(str(exc))
+            error.__cause__ = exc
         finally:
             conn.set_progress_handler(None, 0)
-
-    return [dict(row) for row in rows]
+        duration_ms = (time.monotonic() - start) * 1000
+
+    record_query_execution(
+        sql=bounded_sql,
+        duration_ms=duration_ms,
+        row_count=len(rows),
+        vm_steps=progress_calls * _PROGRESS_HANDLER_STEPS,
+        status=status,
+        request_id=request_id,
+        pattern=pattern,
+        label=label,
+    )
+    if error is not None:
+        raise error
+
+    return columns, rows
 
 
 def execute_query_plan(plan: list[dict[str, str]]) -> list[QueryExecution]:
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from src.core.settings import get_settings
+from src.services.sql.columnar import ColumnarResult
+from src.services.sql.deadline import QueryDeadline, get_request_deadline
+from src.services.sql.executor import execute_safe_query_columnar
+
+
+@dataclass
+class _Speculation:
+    # Separate from the request deadline, so LLM latency does not eat the query budget, but
+    # linked to it so a client disconnect still interrupts speculative SQL.
+    deadline: QueryDeadline
+    futures: dict[str, Future[ColumnarResult]] = field(default_factory=dict)
+
+
+_LOCK: Final = threading.Lock()
+_POOL: ThreadPoolExecutor | None = None
+_SPECULATIONS: dict[str, _Speculation] = {}
+
+
+def _pool() -> ThreadPoolExecutor | None:
+    global _POOL
+    workers = get_settings().query_speculative_workers
+    if workers <= 0:
+        return None
+    with _LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculative-sql")
+        return _POOL
+
+
+def speculation_key(sql: str, params: dict[str, Any] | None) -> str:
+    return json.dumps([sql, params or {}], sort_keys=True, default=str)
+
+
+def start_speculative_queries(request_id: str, queries: list[dict[str, Any]]) -> int:
+    """Start executing trusted queries in the background while the request keeps planning.
+
+    Results are claimed with :func:`take_speculative_result` by the SQL text and params the
+    executor later sees; anything never claimed is dropped by :func:`release_speculative_queries`.
+    """
+    pool = _pool()
+    if pool is None:
+        return 0
+    started = 0
+    with _LOCK:
+        speculation = _SPECULATIONS.get(request_id)
+        if speculation is None:
+            deadline = QueryDeadline(get_settings().query_request_timeout_seconds)
+            speculation = _SPECULATIONS[request_id] = _Speculation(deadline)
+            request_deadline = get_request_deadline(request_id)
+            if request_deadline is not None:
+                request_deadline.link(deadline)
+        for query in queries:
+            key = speculation_key(query["sql"], query.get("params"))
+            if not query.get("trusted") or key in speculation.futures:
+                continue
+            speculation.futures[key] = pool.submit(
+                execute_safe_query_columnar,
+                query["sql"],
+                deadline=speculation.deadline,
+                request_id=request_id,
+                pattern=query.get("pattern"),
+                label=query.get("label"),
+                trusted=True,
+                params=query.get("params"),
+            )
+            started += 1
+    return started
+
+
+def take_speculative_result(
+    request_id: str, sql: str, params: dict[str, Any] | None
+) -> Future[ColumnarResult] | None:
+    with _LOCK:
+        speculation = _SPECULATIONS.get(request_id)
+        if speculation is None:
+            return None
+        return speculation.futures.pop(speculation_key(sql, params), None)
+
+
+def release_speculative_queries(request_id: str) -> None:
+    """Cancel unclaimed speculative work and interrupt any of it still running."""
+    with _LOCK:
+        speculation = _SPECULATIONS.pop(request_id, None)
+    if speculation is None:
+        return
+    for future in speculation.futures.values():
+        future.cancel()
+    if speculation.futures:
+        speculation.deadline.cancel()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import re
+from typing import Any
 
 FORBIDDEN_KEYWORDS = {
     "DROP",
@@ -18,6 +20,12 @@ FORBIDDEN_KEYWORDS = {
     "INSERT",
 }
 
+# Fallback scanner: string literals and quoted identifiers are consumed whole, so only bare
+# words (keywords and unquoted identifiers) and semicolons are inspected.
+_FALLBACK_TOKEN_RE = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|(?P<word>[A-Za-z_][A-Za-z0-9_]*)|(?P<semi>;)|(?P<paren>\()"
+)
+
 
 @dataclass
 class ValidationResult:
@@ -25,38 +33,143 @@ class ValidationResult:
     reason: str | None = None
 
 
-def _contains_forbidden_keyword(sql: str) -> str | None:
-    upper = sql.upper()
-    for keyword in FORBIDDEN_KEYWORDS:
-        if keyword in upper:
-            return keyword
+class SqlParseError(ValueError):
+    """SQL that sqlglot cannot tokenize or parse as one statement."""
+
+
+@dataclass(frozen=True)
+class _Token:
+    text: str
+    kind: str  # "word", "semicolon", "open_paren" or "other"
+
+
+@lru_cache(maxsize=1)
+def _sqlite_dialect() -> Any | None:
+    try:
+        from sqlglot.dialects.dialect import Dialect
+    except ImportError:
+        return None
+    return Dialect.get_or_raise("sqlite")
+
+
+@lru_cache(maxsize=512)
+def _sqlglot_tokens(sql: str) -> tuple[Any, ...]:
+    dialect = _sqlite_dialect()
+    if dialect is None:
+        raise RuntimeError("sqlglot is not available")
+    from sqlglot.errors import SqlglotError
+
+    try:
+        return tuple(dialect.tokenize(sql))
+    except SqlglotError as exc:
+        raise SqlParseError(str(exc)) from exc
+
+
+def _scan_tokens(sql: str) -> list[_Token]:
+    """Single pass over ``sql`` yielding the tokens the safety checks care about.
+
+    Strings and quoted identifiers never surface as words, so ``"update"`` or ``'drop'``
+    are not mistaken for keywords, and ``created_at`` is one word rather than ``CREATE``.
+    """
+    try:
+        raw_tokens = _sqlglot_tokens(sql)
+    except RuntimeError:
+        raw_tokens = None
+
+    if raw_tokens is None:
+        tokens: list[_Token] = []
+        for match in _FALLBACK_TOKEN_RE.finditer(sql):
+            if match.group("word"):
+                tokens.append(_Token(match.group("word"), "word"))
+            elif match.group("semi"):
+                tokens.append(_Token(";", "semicolon"))
+            elif match.group("paren"):
+                tokens.append(_Token("(", "open_paren"))
+            else:
+                tokens.append(_Token(match.group(0), "other"))
+        return tokens
+
+    from sqlglot.tokens import TokenType
+
+    output: list[_Token] = []
+    for token in raw_tokens:
+        if token.token_type == TokenType.SEMICOLON:
+            output.append(_Token(";", "semicolon"))
+        elif token.token_type == TokenType.L_PAREN:
+            output.append(_Token("(", "open_paren"))
+        elif token.token_type in {TokenType.STRING, TokenType.IDENTIFIER}:
+            output.append(_Token(token.text, "other"))
+        else:
+            output.append(_Token(token.text, "word"))
+    return output
+
+
+def _forbidden_keyword(tokens: list[_Token]) -> str | None:
+    for idx, token in enumerate(tokens):
+        if token.kind != "word":
+            continue
+        keyword = token.text.upper()
+        if keyword not in FORBIDDEN_KEYWORDS:
+            continue
+        # REPLACE(x, 'a', 'b') is a scalar function; REPLACE INTO is a statement.
+        next_token = tokens[idx + 1] if idx + 1 < len(tokens) else None
+        if keyword == "REPLACE" and next_token is not None and next_token.kind == "open_paren":
+            continue
+        return keyword
     return None
 
 
+@lru_cache(maxsize=512)
+def parse_sql(sql: str) -> Any:
+    """Parse ``sql`` as SQLite, reusing the token stream from the safety scan.
+
+    Results are cached and shared between validators and the cost estimator; callers must
+    treat the returned expression as read-only. Raises :class:`SqlParseError` for SQL that
+    does not parse and ``RuntimeError`` without sqlglot.
+    """
+    dialect = _sqlite_dialect()
+    if dialect is None:
+        raise RuntimeError("sqlglot is not available")
+    from sqlglot.errors import SqlglotError
+
+    try:
+        statements = [
+            node for node in dialect.parser().parse(list(_sqlglot_tokens(sql)), sql) if node
+        ]
+    except SqlglotError as exc:
+        raise SqlParseError(str(exc)) from exc
+    if len(statements) != 1:
+        raise SqlParseError("Expected exactly one SQL statement")
+    return statements[0]
+
+
 def validate_safe_select(sql: str) -> ValidationResult:
     stripped = sql.strip().rstrip(";")
     if not stripped:
         return ValidationResult(is_valid=False, reason="Empty SQL")
 
-    if ";" in stripped:
+    try:
+        tokens = _scan_tokens(stripped)
+    except SqlParseError as exc:
+        return ValidationResult(is_valid=False, reason=f"Invalid SQL: {exc}")
+
+    if any(token.kind == "semicolon" for token in tokens):
         return ValidationResult(is_valid=False, reason="Multiple statements are not allowed")
 
-    forbidden = _contains_forbidden_keyword(stripped)
+    forbidden = _forbidden_keyword(tokens)
     if forbidden:
         return ValidationResult(is_valid=False, reason=f"Forbidden keyword detected: {forbidden}")
 
-    upper = stripped.upper()
-    if not (upper.startswith("SELECT") or upper.startswith("WITH")):
+    first = tokens[0].text.upper() if tokens and tokens[0].kind == "word" else ""
+    if first not in {"SELECT", "WITH"}:
         return ValidationResult(is_valid=False, reason="Only SELECT statements are allowed")
 
-    try:
-        import sqlglot
-        from sqlglot import exp
-    except Exception:
+    if _sqlite_dialect() is None:
         return ValidationResult(is_valid=True)
+    from sqlglot import exp
 
     try:
-        parsed = sqlglot.parse_one(stripped, read="sqlite")
+        parsed = parse_sql(stripped)
     except Exception as exc:
         return ValidationResult(is_valid=False, reason=f"Invalid SQL: {exc}")
 
@@ -73,16 +186,24 @@ def validate_safe_select(sql: str) -> ValidationResult:
 
 
 def validate_sql_references(
-    sql: str, *, table_name: str, allowed_columns: list[str]
+    sql: str,
+    *,
+    table_name: str,
+    allowed_columns: list[str],
+    extra_tables: dict[str, list[str]] | None = None,
 ) -> ValidationResult:
+    """Check that ``sql`` only reads the dataset table (or ``extra_tables``) and known columns."""
     stripped = sql.strip()
     if not stripped:
         return ValidationResult(is_valid=False, reason="Empty SQL")
 
-    allowed_set = set(allowed_columns)
+    table_columns = {table_name: set(allowed_columns)}
+    for extra_table, extra_columns in (extra_tables or {}).items():
+        table_columns[extra_table] = set(extra_columns)
+    allowed_tables = set(table_columns)
+    allowed_set = set().union(*table_columns.values())
 
     try:
-        import sqlglot
         from sqlglot import exp
     except Exception:
         # Best-effort fallback without sqlglot: ensure the expected table appears in FROM/JOIN.
@@ -100,17 +221,22 @@ def validate_sql_references(
         return ValidationResult(is_valid=True)
 
     try:
-        parsed = sqlglot.parse_one(stripped, read="sqlite")
+        parsed = parse_sql(stripped.rstrip(";"))
     except Exception as exc:
         return ValidationResult(is_valid=False, reason=f"Invalid SQL: {exc}")
 
-    table_refs = {table.name for table in parsed.find_all(exp.Table) if table.name}
+    cte_names = {cte.alias_or_name for cte in parsed.find_all(exp.CTE)}
+    table_refs = {
+        table.name
+        for table in parsed.find_all(exp.Table)
+        if table.name and table.name not in cte_names
+    }
     if not table_refs:
         return ValidationResult(
             is_valid=False,
             reason=f'Query must reference dataset table "{table_name}".',
         )
-    invalid_tables = [name for name in table_refs if name != table_name]
+    invalid_tables = [name for name in table_refs if name not in allowed_tables]
     if invalid_tables:
         return ValidationResult(
             is_valid=False,
@@ -136,4 +262,59 @@ def validate_sql_references(
             reason=f"Query references unknown column(s): {', '.join(unknown_columns)}",
         )
 
+    misplaced = _misplaced_columns(parsed, table_columns, alias_names)
+    if misplaced:
+        return ValidationResult(
+            is_valid=False,
+            reason=f"Query references column(s) missing from their table: {', '.join(misplaced)}",
+        )
+
     return ValidationResult(is_valid=True)
+
+
+def _misplaced_columns(
+    parsed: Any, table_columns: dict[str, set[str]], alias_names: set[str]
+) -> list[str]:
+    """Columns that exist somewhere but not in the table they resolve to.
+
+    Qualified columns are checked against the table their qualifier names in the enclosing
+    scopes. Unqualified columns are checked when every source of their scope is a known table;
+    reads of CTEs and subqueries are covered by the global column check.
+    """
+    from sqlglot import exp
+    from sqlglot.optimizer.scope import traverse_scope
+
+    def table_of(source: Any) -> str | None:
+        node = source[1] if isinstance(source, tuple) else source
+        if isinstance(node, exp.Table) and node.name in table_columns:
+            return node.name
+        return None
+
+    misplaced: set[str] = set()
+    for scope in traverse_scope(parsed):
+        own_tables = [table_of(source) for source in scope.selected_sources.values()]
+        visible: set[str] = set(alias_names)
+        if own_tables and all(own_tables):
+            ancestor = scope
+            while ancestor is not None:
+                for source in ancestor.selected_sources.values():
+                    name = table_of(source)
+                    visible |= table_columns[name] if name else set()
+                ancestor = ancestor.parent
+        else:
+            visible = set()
+
+        for column in scope.columns:
+            if not column.name or column.name == "*":
+                continue
+            if not column.table:
+                if visible and column.name not in visible:
+                    misplaced.add(column.name)
+                continue
+            ancestor = scope
+            while ancestor is not None and column.table not in ancestor.selected_sources:
+                ancestor = ancestor.parent
+            name = table_of(ancestor.selected_sources[column.table]) if ancestor else None
+            if name is not None and column.name not in table_columns[name]:
+                misplaced.add(f"{column.table}.{column.name}")
+    return sorted(misplaced)
@@ -16,13 +16,14 @@ def upsert_dataset_meta(
     columns: list[str],
     schema: dict[str, str],
     created_at: str,
+    profile: dict[str, Any] | None = None,
 ) -> None:
     with get_connection() as conn:
         conn.execute("DELETE FROM dataset_meta")
         conn.execute(
             """
-            INSERT INTO dataset_meta(dataset_id, name, table_name, rows, columns_json, schema_json, created_at)
-            VALUES(?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO dataset_meta(dataset_id, name, table_name, rows, columns_json, schema_json, created_at, profile_json)
+            VALUES(?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 dataset_id,
@@ -32,6 +33,7 @@ def upsert_dataset_meta(
                 json.dumps(columns),
                 json.dumps(schema),
                 created_at,
+                json.dumps(profile or {}),
             ),
         )
 
@@ -39,7 +41,7 @@ def upsert_dataset_meta(
 def get_dataset_meta() -> dict[str, Any] | None:
     with get_connection() as conn:
         row = conn.execute(
-            "SELECT dataset_id, name, table_name, rows, columns_json, schema_json, created_at FROM dataset_meta LIMIT 1"
+            "SELECT dataset_id, name, table_name, rows, columns_json, schema_json, created_at, profile_json FROM dataset_meta LIMIT 1"
         ).fetchone()
         if row is None:
             return None
@@ -52,6 +54,7 @@ def get_dataset_meta() -> dict[str, Any] | None:
             "columns": json.loads(row["columns_json"]),
             "schema": json.loads(row["schema_json"]),
             "created_at": datetime.fromisoformat(row["created_at"]),
+            "profile": json.loads(row["profile_json"] or "{}"),
         }
 
 
@@ -212,3 +215,63 @@ def get_global_spend_usd_since(created_at_iso: str) -> float:
     if row is None:
         return 0.0
     return float(row["total_usd"] or 0.0)
+
+
+def insert_query_stats(stats: list[dict[str, Any]], *, max_rows: int) -> None:
+    """Insert a batch of query stats, then keep only the newest ``max_rows`` rows."""
+    with get_connection() as conn:
+        conn.executemany(
+            """
+            INSERT INTO query_stats(
+                id, request_id, pattern, label, sql_hash, sql, duration_ms,
+                row_count, vm_steps, status, created_at
+            ) VALUES(
+                :id, :request_id, :pattern, :label, :sql_hash, :sql, :duration_ms,
+                :row_count, :vm_steps, :status, :created_at
+            )
+            """,
+            stats,
+        )
+        # Rowids only grow, so this drops the oldest rows through the rowid b-tree.
+        conn.execute(
+            "DELETE FROM query_stats WHERE rowid <= (SELECT MAX(rowid) FROM query_stats) - ?",
+            (max(max_rows, 0),),
+        )
+
+
+QUERY_STAT_ORDERINGS = {
+    "total_duration_ms": "total_duration_ms",
+    "max_duration_ms": "max_duration_ms",
+    "avg_duration_ms": "avg_duration_ms",
+    "max_vm_steps": "max_vm_steps",
+    "executions": "executions",
+}
+
+
+def list_top_query_stats(*, limit: int, order_by: str) -> list[dict[str, Any]]:
+    ordering = QUERY_STAT_ORDERINGS[order_by]
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT
+                sql_hash,
+                MAX(pattern) AS pattern,
+                MAX(label) AS label,
+                MAX(sql) AS sql,
+                COUNT(*) AS executions,
+                SUM(CASE WHEN status != 'ok' THEN 1 ELSE 0 END) AS failures,
+                SUM(duration_ms) AS total_duration_ms,
+                AVG(duration_ms) AS avg_duration_ms,
+                MAX(duration_ms) AS max_duration_ms,
+                AVG(row_count) AS avg_row_count,
+                MAX(vm_steps) AS max_vm_steps,
+                MAX(created_at) AS last_seen_at
+            FROM query_stats
+            GROUP BY sql_hash
+            ORDER BY {ordering} DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+    return [dict(row) for row in rows]
@@ -31,24 +31,38 @@ def _init_test_environment() -> None:
 def _reset_database_state() -> None:
     from src.core.settings import get_settings
     from src.db.session import get_connection
+    from src.llm.providers import clear_provider_pool
+    from src.services.analytics.column_matcher import clear_column_matchers
+    from src.services.analytics.numpy_engine import clear_column_cache
+    from src.services.analytics.planner import clear_pattern_templates
     from src.services.ask_cache_service import clear_ask_cache
+    from src.services.dataset_service import dataset_tables
+    from src.services.query_stats_service import clear_pending_query_stats
     from src.services.rate_limit_service import clear_rate_limit_state
     from src.services.voice_cache_service import clear_voice_cache
 
     get_settings.cache_clear()
     clear_ask_cache()
+    clear_pattern_templates()
+    clear_column_cache()
+    clear_column_matchers()
+    clear_provider_pool()
+    clear_pending_query_stats()
     clear_rate_limit_state()
     clear_voice_cache()
 
     with get_connection() as conn:
-        dataset_tables = conn.execute("SELECT table_name FROM dataset_meta").fetchall()
-        for row in dataset_tables:
-            conn.execute(f'DROP TABLE IF EXISTS "{row["table_name"]}"')
+        dataset_rows = conn.execute("SELECT table_name FROM dataset_meta").fetchall()
+        for row in dataset_rows:
+            for table in dataset_tables(row["table_name"]):
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
 
         conn.execute("DELETE FROM vector_chunks")
         conn.execute("DELETE FROM docs_meta")
         conn.execute("DELETE FROM requests")
         conn.execute("DELETE FROM cost_ledger")
+        conn.execute("DELETE FROM query_stats")
+        conn.execute("DELETE FROM llm_plan_cache")
         conn.execute("DELETE FROM dataset_meta")
 
     get_settings.cache_clear()
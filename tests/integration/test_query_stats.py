@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.settings import get_settings
+from src.db.session import get_connection
+from src.main import app
+from src.services.query_stats_service import flush_query_stats
+
+client = TestClient(app)
+
+
+def _upload_and_ask() -> None:
+    csv_content = "date,revenue\n2025-01-01,100\n2025-01-02,120\n"
+    upload = client.post(
+        "/upload/dataset",
+        files={"file": ("sample.csv", csv_content, "text/csv")},
+    )
+    assert upload.status_code == 200
+
+    ask = client.post("/ask", json={"question": "How many rows are in this dataset?"})
+    assert ask.status_code == 200
+
+
+def test_executed_queries_are_recorded_with_pattern_and_steps() -> None:
+    _upload_and_ask()
+    flush_query_stats()
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT pattern, label, row_count, vm_steps, status FROM query_stats"
+        ).fetchall()
+
+    assert len(rows) == 1
+    assert rows[0]["pattern"] == "heuristic_count"
+    assert rows[0]["label"] == "Row count"
+    assert rows[0]["row_count"] == 1
+    assert rows[0]["status"] == "ok"
+
+
+def test_slow_queries_are_logged_above_threshold(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setenv("QUERY_SLOW_LOG_MS", "0")
+    get_settings.cache_clear()
+
+    with caplog.at_level(logging.WARNING, logger="src.services.query_stats_service"):
+        _upload_and_ask()
+
+    assert any("Slow query" in record.getMessage() for record in caplog.records)
+
+
+def test_admin_query_stats_requires_configured_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert client.get("/admin/query-stats").status_code == 404
+
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret-token")
+    get_settings.cache_clear()
+    assert client.get("/admin/query-stats").status_code == 401
+    assert client.get("/admin/query-stats", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+
+def test_admin_query_stats_returns_top_offenders(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret-token")
+    get_settings.cache_clear()
+    _upload_and_ask()
+
+    response = client.get(
+        "/admin/query-stats",
+        params={"limit": 5, "order_by": "max_duration_ms"},
+        headers={"X-Admin-Token": "secret-token"},
+    )
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["order_by"] == "max_duration_ms"
+    assert len(body["queries"]) == 1
+    assert body["queries"][0]["pattern"] == "heuristic_count"
+    assert body["queries"][0]["executions"] == 1
+
+    bad_order = client.get(
+        "/admin/query-stats",
+        params={"order_by": "sql"},
+        headers={"X-Admin-Token": "secret-token"},
+    )
+    assert bad_order.status_code == 400
+
+
+def test_query_stats_are_batched_and_capped(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.services.query_stats_service import record_query_execution
+
+    monkeypatch.setenv("QUERY_STATS_BATCH_SIZE", "3")
+    monkeypatch.setenv("QUERY_STATS_MAX_ROWS", "4")
+    get_settings.cache_clear()
+
+    def _count() -> int:
+        with get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM query_stats").fetchone()[0]
+
+    for index in range(2):
+        record_query_execution(
+            sql=f"SELECT {index}", duration_ms=1.0, row_count=1, vm_steps=1, status="ok"
+        )
+    assert _count() == 0
+
+    for index in range(2, 7):
+        record_query_execution(
+            sql=f"SELECT {index}", duration_ms=1.0, row_count=1, vm_steps=1, status="ok"
+        )
+    assert _count() == 4  # two batches of 3 written, the oldest 2 pruned
+
+    flush_query_stats()
+    with get_connection() as conn:
+        kept = [row["sql"] for row in conn.execute("SELECT sql FROM query_stats ORDER BY rowid")]
+    assert kept == ["SELECT 3", "SELECT 4", "SELECT 5", "SELECT 6"]
+
+
+def test_buffered_stats_are_flushed_on_a_timer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("QUERY_STATS_FLUSH_SECONDS", "0.05")
+    get_settings.cache_clear()
+
+    with TestClient(app) as running:
+        running.post(
+            "/upload/dataset",
+            files={"file": ("sample.csv", "date,revenue\n2025-01-01,100\n", "text/csv")},
+        )
+        assert running.post("/ask", json={"question": "How many rows?"}).status_code == 200
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with get_connection() as conn:
+                count = conn.execute("SELECT COUNT(*) FROM query_stats").fetchone()[0]
+            if count:
+                break
+            time.sleep(0.05)
+
+    assert count == 1
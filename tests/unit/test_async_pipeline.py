@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any
+
+from src.agents import ask_graph
+from src.llm.router import ModelRouter
+from src.llm.types import LlmCallResult
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_request_spend_usd
+
+
+def _upload() -> None:
+    rows = ["order_date,region,revenue"] + [
+        f"2025-01-{day:02d},{region},{day * 5 + len(region)}"
+        for day in range(1, 29)
+        for region in ("north", "south")
+    ]
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+
+
+def test_async_pipeline_matches_the_sync_pipeline() -> None:
+    _upload()
+    question = "Revenue by region"
+
+    sync_result = ask_graph.run_ask_pipeline(question, None, {}, request_id="sync-req")
+    async_result = asyncio.run(
+        ask_graph.arun_ask_pipeline(question, None, {}, request_id="async-req")
+    )
+
+    assert async_result["request_id"] == "async-req"
+    assert async_result["executed_results"] == sync_result["executed_results"]
+    assert async_result["answer"]["sql"] == sync_result["answer"]["sql"]
+    assert async_result["cost_trace"]["models"] == sync_result["cost_trace"]["models"]
+
+
+class _BarrierRouter:
+    """Synthesis only returns once every concurrent ask is waiting on the model at once."""
+
+    barrier: asyncio.Barrier
+
+    async def acall(self, **kwargs: Any) -> LlmCallResult:
+        if kwargs["task"] == "synthesize_explanation":
+            await asyncio.wait_for(_BarrierRouter.barrier.wait(), timeout=5)
+        return LlmCallResult(
+            text='{"headline": "h", "narrative": "n"}',
+            model="fake",
+            provider="fake",
+            prompt_tokens=1,
+            completion_tokens=1,
+            usd=0.0,
+        )
+
+
+def test_concurrent_asks_overlap_their_model_calls(monkeypatch) -> None:
+    _upload()
+    monkeypatch.setattr(ask_graph, "ModelRouter", _BarrierRouter)
+
+    async def _ask_many(count: int) -> list[Any]:
+        _BarrierRouter.barrier = asyncio.Barrier(count)
+        return await asyncio.gather(
+            *(
+                ask_graph.arun_ask_pipeline("Revenue by region", None, {}, request_id=f"req-{n}")
+                for n in range(count)
+            )
+        )
+
+    results = asyncio.run(_ask_many(4))
+    assert [result["answer"]["headline"] for result in results] == ["h"] * 4
+
+
+def test_router_acall_records_spend_in_the_ledger() -> None:
+    result = asyncio.run(
+        ModelRouter().acall(
+            request_id="acall-req",
+            app="test",
+            task="parse_intent",
+            system_prompt="s",
+            user_prompt="how many rows",
+        )
+    )
+    assert result.provider == "mock"
+    assert get_request_spend_usd("acall-req") == result.usd > 0
@@ -0,0 +1,102 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from src.services.analytics.changepoint import (
+    change_points_from_series,
+    detect_change_points,
+)
+from src.services.analytics.numpy_engine import compute_pattern_result
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+np = pytest.importorskip("numpy")
+
+
+def test_binary_segmentation_finds_level_and_slope_breaks() -> None:
+    rng = np.random.default_rng(7)
+    x = np.arange(900, dtype=float)
+    y = 100 + 0.05 * x + rng.normal(0, 2, x.size)
+    y[300:] += 30
+    y[650:] -= 0.5 * (x[650:] - 650)
+
+    breaks = detect_change_points(x, y)
+
+    assert 300 in breaks
+    assert any(abs(split - 650) <= 10 for split in breaks)
+    assert detect_change_points(x, 100 + 0.2 * x + rng.normal(0, 2, x.size)) == []
+
+
+def test_multi_year_daily_series_stays_fast() -> None:
+    rng = np.random.default_rng(3)
+    y = rng.normal(50, 5, 20 * 365)
+    y[4000:] += 15
+    x = np.arange(y.size, dtype=float)
+
+    started = time.perf_counter()
+    breaks = detect_change_points(x, y)
+    assert time.perf_counter() - started < 1.0
+    assert breaks == [4000]
+
+
+def test_changepoint_mode_reports_every_break_with_its_magnitude(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from src.core.settings import get_settings
+
+    monkeypatch.setenv("TREND_BREAK_MODE", "changepoint")
+    get_settings.cache_clear()
+    start = date(2024, 1, 1)
+    rows = ["date,revenue"]
+    for offset in range(150):
+        level = 100 if offset < 50 else 160 if offset < 110 else 90
+        rows.append(f"{(start + timedelta(days=offset)).isoformat()},{level + offset % 3}")
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+
+    planned, _, _ = plan_analyses(meta, {"metric": "revenue", "time_column": "date"})
+    labels = [item["label"] for item in planned]
+    assert "Trend change points" in labels
+    assert "Trend break detection" not in labels
+    item = planned[labels.index("Trend change points")]
+
+    result = change_points_from_series(execute_safe_query_columnar(item["sql"]))
+    assert result["values"][0] == ["2024-02-20", "2024-04-20"]
+    assert result["values"][3] == [pytest.approx(60, abs=2), pytest.approx(-70, abs=2)]
+
+    in_process = compute_pattern_result(
+        meta,
+        pattern="trend_break_detection",
+        label="Trend change points",
+        binding=item["binding"],
+    )
+    assert in_process == result
+
+
+def test_non_iso_series_is_reported_as_an_execution_error() -> None:
+    from src.agents import ask_graph
+
+    state = {
+        "request_id": "non-iso-req",
+        "dataset_meta": {},
+        "intent": {},
+        "diagnostics": [],
+        "planned_analyses": [
+            {
+                "name": "trend_break_detection",
+                "description": "Trend change points",
+                "sql_label": "Trend change points",
+                "sql": "SELECT 'week 1' AS dt, 1.0 AS metric_value",
+                "trusted": True,
+            }
+        ],
+    }
+    state = ask_graph.execute_queries_node(state)  # type: ignore[arg-type]
+
+    assert state["executed_results"] == []
+    assert state["execution_errors"][0]["code"] == "SQL_EXECUTION_ERROR"
+    assert "post-processed" in state["execution_errors"][0]["message"]
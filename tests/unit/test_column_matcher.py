@@ -0,0 +1,54 @@
+from src.agents.ask_graph import decide_need_clarification_node
+from src.services.analytics.column_matcher import (
+    ColumnMatcher,
+    build_column_aliases,
+    get_column_matcher,
+)
+from src.services.analytics.dynamic_planner import (
+    _question_needs_advanced_planning,
+    build_heuristic_queries,
+)
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_dataset_meta
+
+
+def test_matcher_finds_deslugified_aliases_on_token_boundaries() -> None:
+    matcher = ColumnMatcher(build_column_aliases(["order", "order_value", "date", "region"]))
+
+    scan = matcher.scan("Did the Order Value by region change since the update?")
+    assert scan.mentions == ("order_value", "region")
+
+    assert matcher.scan("order_value vs order, then order again").mentions == (
+        "order_value",
+        "order",
+    )
+    assert matcher.scan("updated dates").mentions == ()
+
+
+def test_advanced_planning_markers_are_matched_as_tokens() -> None:
+    assert _question_needs_advanced_planning(("revenue", "trends", "by", "region"))
+    assert not _question_needs_advanced_planning(("bypass", "the", "overview"))
+
+
+def test_ingest_stores_aliases_and_the_pipeline_uses_them() -> None:
+    csv = "order_date,region,order_value,items\n2025-01-01,north,10.5,2\n2025-01-02,south,7,1\n"
+    ingest_csv("orders.csv", csv.encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    assert meta["profile"]["column_aliases"]["order value"] == "order_value"
+    assert get_column_matcher(meta) is get_column_matcher(meta)
+
+    state = decide_need_clarification_node(
+        {
+            "question": "What is the average order value per region?",
+            "dataset_meta": meta,
+            "clarifications": {},
+            "intent": {},
+        }
+    )
+    assert state["needs_clarification"] is False
+    assert state["intent"]["metric"] == "order_value"
+    assert state["intent"]["column_mention"] == "order_value"
+
+    planned = build_heuristic_queries("What is the average order value?", meta)
+    assert planned[0]["label"] == "AVG for order_value"
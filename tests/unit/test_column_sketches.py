@@ -0,0 +1,83 @@
+from collections import Counter
+
+from src.db.session import get_connection
+from src.services.analytics.dynamic_planner import (
+    _build_frequency_query,
+    build_heuristic_queries,
+)
+from src.services.dataset_service import ingest_csv
+from src.services.sketch_service import HyperLogLog, MisraGries, update_column_sketches
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+
+def test_hyperloglog_estimates_and_merges_distinct_counts() -> None:
+    left, right = HyperLogLog(), HyperLogLog()
+    for idx in range(30_000):
+        left.add(f"user-{idx}")
+    for idx in range(20_000, 50_000):
+        right.add(f"user-{idx}")
+
+    assert abs(left.estimate() - 30_000) / 30_000 < 0.05
+    left.merge(right)
+    assert abs(left.estimate() - 50_000) / 50_000 < 0.05
+
+
+def test_misra_gries_keeps_heavy_hitters_within_the_error_bound() -> None:
+    stream = ["a"] * 400 + ["b"] * 250 + [f"noise-{idx}" for idx in range(350)]
+    first = MisraGries.from_counts(10, Counter(stream[::2]))
+    second = MisraGries.from_counts(10, Counter(stream[1::2]))
+    first.merge(second)
+
+    assert first.total == 1000
+    assert first.saturated
+    assert first.max_error <= first.total / 10
+    counts = dict(first.top(2))
+    assert list(counts) == ["a", "b"]
+    assert 400 - first.max_error <= counts["a"] <= 400
+    assert 250 - first.max_error <= counts["b"] <= 250
+
+
+def _upload() -> dict:
+    rows = ["city,amount"]
+    for idx in range(300):
+        city = ["paris", "rome", "oslo", "lima", ""][idx % 7 % 5]
+        rows.append(f"{city},{idx % 13}")
+    ingest_csv("orders.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_frequency_questions_read_the_heavy_hitters_sketch() -> None:
+    meta = _upload()
+    planned = build_heuristic_queries("What is the most common city?", meta)
+
+    assert len(planned) == 1
+    assert meta["profile"]["sketches"]["heavy_hitters_table"] in planned[0]["sql"]
+    sketched = execute_safe_query_columnar(planned[0]["sql"])
+    exact = execute_safe_query_columnar(_build_frequency_query(meta["table_name"], "city")["sql"])
+    assert sketched["values"][:2] == exact["values"]
+    assert set(sketched["values"][2]) == {0}
+
+
+def test_distinct_questions_read_the_sketch_and_appends_merge() -> None:
+    meta = _upload()
+    planned = build_heuristic_queries("How many distinct amount values are there?", meta)
+    assert planned[0]["pattern"] == "heuristic_distinct"
+    result = execute_safe_query_columnar(planned[0]["sql"])
+    assert result["values"] == [[13], [1]]
+
+    with get_connection() as conn:
+        update_column_sketches(
+            conn,
+            table_name=meta["table_name"],
+            columns=meta["columns"],
+            rows=[{"city": "kyiv", "amount": 99}] * 3,
+        )
+    result = execute_safe_query_columnar(planned[0]["sql"])
+    assert result["values"] == [[14], [1]]
+    frequency = execute_safe_query_columnar(
+        build_heuristic_queries("most common city", meta)[0]["sql"]
+    )
+    assert frequency["values"][1][frequency["values"][0].index("kyiv")] == 3
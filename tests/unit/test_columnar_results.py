@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from src.services.answer_service import build_charts, build_drivers
+from src.services.sql.columnar import columnar_from_tuples, result_rows
+from src.services.sql.executor import execute_safe_query_columnar
+
+
+def test_columnar_round_trip_builds_rows_only_on_demand() -> None:
+    result = columnar_from_tuples(["segment", "delta"], [("A", 5.0), ("B", -2.0), ("C", 1.0)])
+
+    assert result == {
+        "columns": ["segment", "delta"],
+        "values": [["A", "B", "C"], [5.0, -2.0, 1.0]],
+        "row_count": 3,
+    }
+    assert result_rows(result, limit=2) == [
+        {"segment": "A", "delta": 5.0},
+        {"segment": "B", "delta": -2.0},
+    ]
+
+
+def test_empty_result_keeps_column_names() -> None:
+    result = columnar_from_tuples(["value", "frequency"], [])
+    assert result == {"columns": ["value", "frequency"], "values": [[], []], "row_count": 0}
+    assert result_rows(result) == []
+
+
+def test_execute_safe_query_columnar_returns_column_arrays() -> None:
+    result = execute_safe_query_columnar("SELECT 1 AS a, 'x' AS b")
+    assert result["columns"] == ["a", "b"]
+    assert result["values"] == [[1], ["x"]]
+    assert result["row_count"] == 1
+
+
+def test_drivers_and_charts_read_columnar_results() -> None:
+    executed = [
+        {
+            "label": "Segment contribution analysis",
+            "sql": "SELECT 1",
+            **columnar_from_tuples(
+                ["segment", "delta", "contribution_share"], [("A", 4.0, 0.8), ("B", 1.0, 0.2)]
+            ),
+        },
+        {
+            "label": "Trend series",
+            "sql": "SELECT 1",
+            **columnar_from_tuples(["x", "y"], [("2025-01-02", 3.0), ("2025-01-01", 2.0)]),
+        },
+    ]
+
+    drivers = build_drivers(executed)
+    assert [driver["name"] for driver in drivers] == ["A", "B"]
+    assert drivers[0]["evidence"] == {"segment": "A", "delta": 4.0, "contribution_share": 0.8}
+
+    charts = build_charts(executed)
+    assert charts[0]["data"] == [{"x": "2025-01-01", "y": 2.0}, {"x": "2025-01-02", "y": 3.0}]
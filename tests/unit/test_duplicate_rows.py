@@ -0,0 +1,83 @@
+from src.db.session import get_connection
+from src.services import duplicates_service
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.services.duplicates_service import row_hash
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload() -> dict:
+    rows = [
+        "order_id,city,amount",
+        "1,paris,10",
+        "1,paris,10",
+        "1,paris,10",
+        "2,rome,5",
+        "2,rome,6",
+        "3,oslo,7",
+        "3,oslo,7",
+    ]
+    ingest_csv("orders.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_ingest_hashes_full_rows_and_summarizes_duplicates() -> None:
+    meta = _upload()
+    duplicates = meta["profile"]["duplicates"]
+    assert duplicates["duplicate_groups"] == 2
+    assert duplicates["duplicate_rows"] == 3
+
+    with get_connection() as conn:
+        matches = conn.execute(
+            f'SELECT row_id FROM "{duplicates["row_hash_table"]}" WHERE row_hash = ?',
+            (row_hash([3, "oslo", 7]),),
+        ).fetchall()
+        plan = conn.execute(
+            f'EXPLAIN QUERY PLAN SELECT row_id FROM "{duplicates["row_hash_table"]}" '
+            "WHERE row_hash = 1"
+        ).fetchall()
+    assert [row[0] for row in matches] == [6, 7]
+    assert "USING COVERING INDEX" in plan[0]["detail"]
+
+
+def test_duplicate_check_reads_the_precomputed_summary() -> None:
+    meta = _upload()
+    planned, diagnostics, _ = plan_analyses(meta, {"raw_question": "any duplicate rows?"})
+    assert not [item for item in diagnostics if item["code"] == "INVALID_PATTERN_SQL"]
+    query = next(item for item in planned if item["label"] == "Data quality duplicate rows")
+    assert meta["profile"]["duplicates"]["table"] in query["sql"]
+    assert f'FROM "{meta["table_name"]}"' not in query["sql"]
+
+    result = execute_safe_query_columnar(query["sql"])
+    assert result["columns"] == ["order_id", "city", "amount", "duplicate_count"]
+    assert result["values"] == [[1, 3], ["paris", "oslo"], [10, 7], [3, 2]]
+
+    with get_connection() as conn:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query['sql']}").fetchall()
+    assert not any("USE TEMP B-TREE" in row["detail"] for row in plan)
+
+
+def test_hash_collisions_do_not_merge_distinct_rows(monkeypatch) -> None:
+    monkeypatch.setattr(duplicates_service, "row_hash", lambda values: 7)
+    meta = _upload()
+    duplicates = meta["profile"]["duplicates"]
+    assert duplicates["duplicate_groups"] == 2
+    assert duplicates["duplicate_rows"] == 3
+
+
+def test_dataset_column_named_like_the_count_column_is_kept() -> None:
+    rows = ["city,duplicate_count", "paris,1", "paris,1", "rome,2"]
+    ingest_csv("counts.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    assert meta["profile"]["duplicates"]["count_column"] == "_duplicate_count"
+
+    planned, diagnostics, _ = plan_analyses(meta, {"raw_question": "any duplicate rows?"})
+    assert not [item for item in diagnostics if item["code"] == "INVALID_PATTERN_SQL"]
+    query = next(item for item in planned if item["label"] == "Data quality duplicate rows")
+    result = execute_safe_query_columnar(query["sql"])
+    assert result["columns"] == ["city", "duplicate_count", "_duplicate_count"]
+    assert result["values"] == [["paris"], [1], [2]]
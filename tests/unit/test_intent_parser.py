@@ -0,0 +1,70 @@
+from src.agents import ask_graph
+from src.services.analytics.column_matcher import get_column_matcher
+from src.services.analytics.intent_parser import parse_intent_rules
+
+META = {
+    "dataset_id": "intent-test",
+    "table_name": "data_intent",
+    "columns": ["order_date", "region", "channel", "revenue", "units"],
+    "schema": {
+        "order_date": "TEXT",
+        "region": "TEXT",
+        "channel": "TEXT",
+        "revenue": "REAL",
+        "units": "INTEGER",
+    },
+    "profile": {},
+}
+
+
+def _parse(question: str) -> tuple[dict, float]:
+    return parse_intent_rules(question, META, get_column_matcher(META).scan(question))
+
+
+def test_rules_extract_metric_timeframe_dimensions_and_top_n() -> None:
+    intent, confidence = _parse("Top 5 regions by total revenue over the past 30 days")
+    assert intent["metric"] == "revenue"
+    assert intent["timeframe"] == {
+        "text": "past 30 days",
+        "anchor": "last",
+        "unit": "day",
+        "count": 30,
+    }
+    assert intent["top_n"] == 5
+    assert confidence == 1.0
+
+    intent, confidence = _parse("What was the average revenue per region last week?")
+    assert intent["timeframe"]["unit"] == "week"
+    assert intent["timeframe"]["count"] == 1
+    assert intent["dimensions"] == ["region"]
+    assert "top_n" not in intent
+    assert confidence == 1.0
+
+
+def test_unresolved_metric_or_unknown_words_lower_confidence() -> None:
+    _, confidence = _parse("How are we doing?")
+    assert confidence <= 0.5
+
+    _, confidence = _parse("Which coupon campaigns cannibalized revenue among churned cohorts?")
+    assert confidence < 0.8
+
+
+def test_confident_rules_skip_the_intent_model_call(monkeypatch) -> None:
+    def _no_router() -> None:
+        raise AssertionError("parse_intent should not call the model")
+
+    monkeypatch.setattr(ask_graph, "ModelRouter", _no_router)
+    state = ask_graph.parse_intent_node(
+        {
+            "request_id": "req",
+            "question": "Total units by channel this month",
+            "dataset_meta": META,
+            "intent": {"time_column": "order_date"},
+            "diagnostics": [],
+        }
+    )
+    assert state["intent"]["metric"] == "units"
+    assert state["intent"]["dimensions"] == ["channel"]
+    assert state["intent"]["time_column"] == "order_date"
+    assert state["intent"]["timeframe"]["anchor"] == "current"
+    assert state["diagnostics"][0]["code"] == "INTENT_PARSED_BY_RULES"
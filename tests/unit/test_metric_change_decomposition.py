@@ -1,8 +1,17 @@
 import sqlite3
 
+import pytest
+
+from src.services.analytics.fusion import split_fused_result
+from src.services.analytics.numpy_engine import compute_pattern_result
 from src.services.analytics.patterns.metric_change_decomposition import (
     build_metric_change_decomposition,
 )
+from src.services.analytics.patterns.shared import pick_change_dimensions
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
 
 
 def test_metric_change_decomposition_query_executes() -> None:
@@ -15,6 +24,7 @@ def test_metric_change_decomposition_query_executes() -> None:
 
     assert len(plan.queries) == 1
     sql = plan.queries[0]["query"]
+    assert plan.queries[0]["params"] == {"top_n": 3}
 
     conn = sqlite3.connect(":memory:")
     conn.row_factory = sqlite3.Row
@@ -31,7 +41,96 @@ def test_metric_change_decomposition_query_executes() -> None:
         ],
     )
 
-    rows = conn.execute(sql).fetchall()
+    rows = conn.execute(sql, plan.queries[0]["params"]).fetchall()
     assert len(rows) > 0
     assert "segment" in rows[0].keys()
     assert "contribution" in rows[0].keys()
+
+
+def test_decomposition_ranks_drivers_across_dimensions_in_one_scan() -> None:
+    plan = build_metric_change_decomposition(
+        table_name="dataset",
+        columns=["date", "region", "channel", "revenue"],
+        schema={"date": "TEXT", "region": "TEXT", "channel": "TEXT", "revenue": "REAL"},
+        intent={"metric": "revenue", "time_column": "date", "top_n": 3},
+    )
+    query = plan.queries[0]
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE dataset (date TEXT, region TEXT, channel TEXT, revenue REAL)")
+    rows = []
+    for day in range(1, 15):
+        for region in ("north", "south"):
+            for channel in ("web", "store"):
+                surge = 30 if day > 8 and channel == "web" else 0
+                rows.append((f"2025-01-{day:02d}", region, channel, 10 + surge))
+    conn.executemany("INSERT INTO dataset VALUES (?, ?, ?, ?)", rows)
+
+    plan_lines = [
+        row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query['query']}", query["params"])
+    ]
+    assert sum(line.startswith("SCAN dataset") for line in plan_lines) == 1
+    assert "MATERIALIZE windowed" in plan_lines
+
+    result = [dict(row) for row in conn.execute(query["query"], query["params"]).fetchall()]
+    assert (result[0]["dimension"], result[0]["segment"]) == ("channel", "web")
+    assert result[0]["contribution"] == 340.0  # 6 current days at 40 vs 7 prior days at 10, x2
+    power = {row["dimension"]: row["dimension_power"] for row in result}
+    assert power["channel"] > power["region"]  # change sits in channel=web, not in one region
+    # Ranked by contribution: region=north (+170) outranks channel=store (no change).
+    assert [row["dimension"] for row in result] == ["channel", "region", "region"]
+
+
+def test_change_window_combines_low_cardinality_dimensions() -> None:
+    dimensions = ["region", "customer_id", "channel", "sku", "tier", "city"]
+    distinct = {
+        "region": 4,
+        "customer_id": 50_000,
+        "channel": 3,
+        "sku": 900,
+        "tier": 5,
+        "city": 40,
+    }
+    # The primary dimension stays; then the cheapest ones while groups stay <= 10,000.
+    assert pick_change_dimensions(dimensions, distinct) == ["region", "channel", "tier", "city"]
+    assert pick_change_dimensions(["customer_id", "sku"], distinct) == ["customer_id"]
+    assert pick_change_dimensions(dimensions, {}) == dimensions[:4]
+
+
+def test_large_dispersed_driver_beats_a_small_concentrated_one() -> None:
+    pytest.importorskip("numpy")
+    rows = [
+        "date,product,channel,revenue",
+        "2025-01-05,p1,store,400",
+        "2025-01-14,p1,store,0",
+        "2025-01-14,p2,store,400",
+        "2025-01-14,p2,web,20",
+    ]
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    planned, _, _ = plan_analyses(meta, {"metric": "revenue", "time_column": "date"})
+    item = next(
+        item
+        for item in planned
+        if "metric_change_decomposition"
+        in [output["pattern"] for output in item.get("outputs") or [item]]
+    )
+    outputs = item.get("outputs") or [{"label": item["label"], "pattern": item["pattern"]}]
+    sql_result = execute_safe_query_columnar(item["sql"], params=item["params"])
+    sql_parts = split_fused_result(sql_result, outputs) if item.get("outputs") else [sql_result]
+    index = [output["pattern"] for output in outputs].index("metric_change_decomposition")
+    numpy_result = compute_pattern_result(
+        meta,
+        pattern="metric_change_decomposition",
+        label=outputs[index]["label"],
+        binding=item["binding"],
+        params=item["params"],
+    )
+
+    for result in (sql_parts[index], numpy_result):
+        assert result is not None
+        ranked = list(zip(result["values"][0], result["values"][1], strict=True))
+        # channel=web (+20) is all of channel's change but small; product moved 820 in total.
+        assert ranked[:3] == [("product", "p2"), ("product", "p1"), ("channel", "web")]
@@ -0,0 +1,123 @@
+import pytest
+
+from src.services.analytics.fusion import split_fused_result
+from src.services.analytics.numpy_engine import compute_pattern_result
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+pytest.importorskip("numpy")
+
+
+def _upload() -> dict:
+    rows = ["date,region,channel,revenue"]
+    for day in range(1, 41):
+        stamp = f"2025-01-{day:02d}" if day <= 31 else f"2025-02-{day - 31:02d}"
+        for idx, region in enumerate(["north", "south", "east", ""]):
+            channel = ["web", "store", "partner"][(day * 7 + idx) % 3]
+            revenue = "" if (day + idx) % 11 == 0 else str(day * (idx + 1) + idx * 3.5 + day % 5)
+            rows.append(f"{stamp},{region},{channel},{revenue}")
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def _normalize(result: dict) -> dict:
+    return {
+        "columns": result["columns"],
+        "values": [
+            [pytest.approx(value) if isinstance(value, float) else value for value in column]
+            for column in result["values"]
+        ],
+        "row_count": result["row_count"],
+    }
+
+
+def test_numpy_engine_matches_sql_for_every_supported_pattern() -> None:
+    meta = _upload()
+    planned, _, _ = plan_analyses(meta, {"metric": "revenue", "time_column": "date", "top_n": 3})
+
+    compared = 0
+    for item in planned:
+        sql_result = execute_safe_query_columnar(item["sql"], params=item["params"])
+        outputs = item.get("outputs") or [{"label": item["label"], "pattern": item["pattern"]}]
+        sql_parts = split_fused_result(sql_result, outputs) if item.get("outputs") else [sql_result]
+        for output, sql_part in zip(outputs, sql_parts, strict=True):
+            numpy_part = compute_pattern_result(
+                meta,
+                pattern=output["pattern"],
+                label=output["label"],
+                binding=item["binding"],
+                params=item["params"],
+            )
+            if numpy_part is None:
+                continue
+            assert numpy_part == _normalize(sql_part), output["label"]
+            compared += 1
+
+    assert compared == 5
+
+
+def test_numeric_time_columns_fall_back_to_sql() -> None:
+    ingest_csv("years.csv", b"year,region,revenue\n2024,a,1\n2025,b,2\n")
+    meta = get_dataset_meta()
+    assert meta is not None
+    binding = {"metric": "revenue", "time_column": "year", "dimension": "region"}
+
+    result = compute_pattern_result(
+        meta, pattern="trend_break_detection", label="Trend series", binding=binding
+    )
+    assert result is None
+
+
+def test_ask_pipeline_uses_numpy_engine_when_configured(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.agents.ask_graph import run_ask_pipeline
+    from src.core.settings import get_settings
+    from src.services.analytics import numpy_engine
+
+    _upload()
+    monkeypatch.setenv("ANALYTICS_ENGINE", "numpy")
+    get_settings.cache_clear()
+    calls: list[str] = []
+    original = numpy_engine._PATTERNS[("segment_contribution", "Segment contribution analysis")]
+
+    def _tracking(*args):
+        calls.append("segment_contribution")
+        return original[0](*args)
+
+    monkeypatch.setitem(
+        numpy_engine._PATTERNS,
+        ("segment_contribution", "Segment contribution analysis"),
+        (_tracking, original[1]),
+    )
+
+    result = run_ask_pipeline("Why did revenue change?", None, {"metric": "revenue"})
+
+    assert calls == ["segment_contribution"]
+    labels = [item["label"] for item in result["executed_results"]]
+    assert "Segment contribution analysis" in labels
+    assert result["answer"]["drivers"]
+
+
+def test_numpy_engine_failure_falls_back_to_sql(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.agents.ask_graph import run_ask_pipeline
+    from src.core.settings import get_settings
+    from src.services.analytics import numpy_engine
+
+    _upload()
+    monkeypatch.setenv("ANALYTICS_ENGINE", "numpy")
+    get_settings.cache_clear()
+    key = ("segment_contribution", "Segment contribution analysis")
+
+    def _broken(*args):
+        raise TypeError("unsupported column type")
+
+    monkeypatch.setitem(numpy_engine._PATTERNS, key, (_broken, numpy_engine._PATTERNS[key][1]))
+
+    result = run_ask_pipeline("Why did revenue change?", None, {"metric": "revenue"})
+
+    labels = [item["label"] for item in result["executed_results"]]
+    assert "Segment contribution analysis" in labels
+    assert not result.get("execution_errors")
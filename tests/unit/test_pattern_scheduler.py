@@ -0,0 +1,74 @@
+from dataclasses import replace
+
+import pytest
+
+from src.services.analytics import planner
+from src.services.analytics.patterns.registry import PATTERN_REGISTRY, schedule_queries
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload(header: str, rows: list[str]) -> dict:
+    ingest_csv("sales.csv", "\n".join([header, *rows]).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_patterns_missing_required_columns_are_never_built(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def _fail(**_kwargs):
+        raise AssertionError("builder should not run without a dimension")
+
+    registry = tuple(
+        replace(spec, build=_fail) if "dimension" in spec.requires else spec
+        for spec in PATTERN_REGISTRY
+    )
+    monkeypatch.setattr(planner, "PATTERN_REGISTRY", registry)
+    meta = _upload("date,revenue", [f"2025-01-{day:02d},{day}" for day in range(1, 15)])
+
+    queries, diagnostics, patterns = plan_analyses(meta, {"metric": "revenue"})
+
+    assert [item["code"] for item in diagnostics] == ["MISSING_DIMENSION", "MISSING_DIMENSION"]
+    assert "metric_change_decomposition" not in patterns
+    assert {"anomaly_noise_check", "trend_break_detection"} <= set(patterns)
+    assert queries
+
+
+def test_scheduler_prefers_value_per_cost_within_budgets() -> None:
+    queries = [
+        {"label": "quality", "pattern": "data_quality_checks", "estimated_cost": 10.0},
+        {"label": "drivers", "pattern": "metric_change_decomposition", "estimated_cost": 50.0},
+        {"label": "trend", "pattern": "trend_break_detection", "estimated_cost": 400.0},
+    ]
+
+    selected, deferred = schedule_queries(
+        queries, question="why did revenue drop?", max_queries=2, max_cost=100.0
+    )
+    assert [query["label"] for query in selected] == ["quality", "drivers"]
+    assert [query["label"] for query in deferred] == ["trend"]
+
+    selected, _ = schedule_queries(
+        queries, question="why did revenue drop?", max_queries=1, max_cost=1000.0
+    )
+    assert [query["label"] for query in selected] == ["drivers"]
+
+
+def test_plan_reports_deferred_patterns_when_over_budget() -> None:
+    rows = [
+        f"2025-01-{day:02d},{region},{day * (idx + 1)}"
+        for day in range(1, 22)
+        for idx, region in enumerate(["north", "south"])
+    ]
+    meta = _upload("date,region,revenue", rows)
+    intent = {"metric": "revenue", "raw_question": "why did revenue drop by region?"}
+
+    queries, diagnostics, patterns = plan_analyses(meta, intent, max_queries=1)
+
+    assert len(queries) == 1
+    assert "metric_change_decomposition" in patterns
+    deferred = [item for item in diagnostics if item["code"] == "PATTERNS_DEFERRED"]
+    assert len(deferred) == 1
+    assert "Data quality missingness" in deferred[0]["message"]
@@ -0,0 +1,49 @@
+import pytest
+
+from src.services.analytics import planner
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload(name: str = "sales.csv") -> dict:
+    rows = ["date,segment,revenue"] + [
+        f"2025-01-{day:02d},{segment},{day * 10}" for day in range(1, 15) for segment in "AB"
+    ]
+    ingest_csv(name, "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_templates_compile_once_per_binding(monkeypatch: pytest.MonkeyPatch) -> None:
+    meta = _upload()
+    compiled_calls: list[tuple] = []
+    original = planner._compile_patterns
+
+    def _counting_compile(*args, **kwargs):
+        compiled_calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(planner, "_compile_patterns", _counting_compile)
+
+    first, _, _ = plan_analyses(meta, {"metric": "revenue", "top_n": 3})
+    second, _, _ = plan_analyses(meta, {"metric": "revenue", "top_n": 7})
+
+    assert len(compiled_calls) == 1
+    assert all(query["prevalidated"] for query in first)
+    assert [query["sql"] for query in first] == [query["sql"] for query in second]
+
+    fused = next(query for query in second if query.get("outputs"))
+    assert ":top_n" in fused["sql"]
+    assert fused["params"] == {"top_n": 7}
+    assert next(query for query in first if query.get("outputs"))["params"] == {"top_n": 3}
+
+
+def test_new_dataset_version_evicts_previous_templates() -> None:
+    first_meta = _upload("first.csv")
+    plan_analyses(first_meta, {"metric": "revenue"})
+    second_meta = _upload("second.csv")
+    plan_analyses(second_meta, {"metric": "revenue"})
+
+    assert {key[0] for key in planner._TEMPLATES} == {second_meta["dataset_id"]}
@@ -0,0 +1,103 @@
+import json
+from typing import Any
+
+from src.llm.types import LlmCallResult
+from src.services.analytics.dynamic_planner import build_hybrid_query_plan
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_dataset_meta
+
+QUESTION = "Why did revenue trend down by region?"
+
+
+class _PlanningRouter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def call(self, **kwargs: Any) -> LlmCallResult:
+        self.calls += 1
+        table = json.loads(kwargs["user_prompt"])["table_name"]
+        sql = f'SELECT "region", SUM("revenue") AS total FROM "{table}" GROUP BY "region"'
+        return LlmCallResult(
+            text=json.dumps({"queries": [{"label": "Revenue by region", "sql": sql}]}),
+            model="fake",
+            provider="fake",
+            prompt_tokens=10,
+            completion_tokens=10,
+            usd=0.0,
+        )
+
+
+def _upload(header: str = "date,region,revenue") -> dict:
+    csv = f"{header}\n2025-01-01,north,10\n2025-01-02,south,7\n"
+    ingest_csv("sales.csv", csv.encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def _plan(
+    router: _PlanningRouter, meta: dict, question: str = QUESTION
+) -> tuple[list[dict], list[dict]]:
+    planned, diagnostics, _ = build_hybrid_query_plan(
+        router=router,  # type: ignore[arg-type]
+        request_id="req",
+        question=question,
+        dataset_meta=meta,
+        clarifications={},
+        intent={},
+        max_queries=20,
+    )
+    return planned, diagnostics
+
+
+def test_reupload_with_same_schema_reuses_the_llm_plan() -> None:
+    router = _PlanningRouter()
+    first_meta = _upload()
+    first, diagnostics = _plan(router, first_meta)
+    assert router.calls == 1
+    assert not [item for item in diagnostics if item["code"] == "PLAN_CACHE_HIT"]
+    assert any(query["label"] == "Revenue by region" for query in first)
+
+    second_meta = _upload()
+    assert second_meta["table_name"] != first_meta["table_name"]
+    second, diagnostics = _plan(router, second_meta)
+    assert router.calls == 1
+    assert [item for item in diagnostics if item["code"] == "PLAN_CACHE_HIT"]
+    cached = next(query for query in second if query["label"] == "Revenue by region")
+    assert f'FROM "{second_meta["table_name"]}"' in cached["sql"]
+
+
+def test_schema_change_misses_the_plan_cache() -> None:
+    router = _PlanningRouter()
+    _plan(router, _upload())
+    _plan(router, _upload("day,region,revenue"))
+    assert router.calls == 2
+
+
+def test_paraphrased_question_reuses_the_nearest_plan() -> None:
+    router = _PlanningRouter()
+    meta = _upload()
+    _plan(router, meta, "Why did revenue fall by region?")
+
+    planned, diagnostics = _plan(router, meta, "What caused the revenue drop by region?")
+    assert router.calls == 1
+    reused = [item for item in diagnostics if item["code"] == "PLAN_REUSED"]
+    assert reused and "why did revenue fall by region" in reused[0]["message"]
+    assert any(query["label"] == "Revenue by region" for query in planned)
+
+    _plan(router, meta, "How many rows are missing a date by region?")
+    assert router.calls == 2
+
+
+def test_questions_differing_only_by_a_value_do_not_share_a_plan(monkeypatch) -> None:
+    # Both pairs embed at least this close; only the literal check keeps them apart.
+    monkeypatch.setenv("PLAN_REUSE_MIN_SIMILARITY", "0.75")
+    router = _PlanningRouter()
+    meta = _upload()
+    _plan(router, meta, "Revenue in the north region last month")
+    _plan(router, meta, "Revenue in the south region last month")
+    assert router.calls == 2
+
+    _plan(router, meta, "Why did revenue fall by region for orders above 100?")
+    _plan(router, meta, "Why did revenue fall by region for orders above 500?")
+    assert router.calls == 4
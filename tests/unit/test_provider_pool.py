@@ -0,0 +1,48 @@
+from src.core.settings import get_settings
+from src.llm.providers import (
+    MockProvider,
+    OpenAIProvider,
+    get_provider,
+    prebuild_provider_clients,
+)
+from src.llm.router import ModelRouter
+
+
+def test_routers_share_one_provider_per_backend_and_key(monkeypatch) -> None:
+    first, second = ModelRouter(), ModelRouter()
+    for router in (first, second):
+        router.call(
+            request_id="req",
+            app="test",
+            task="parse_intent",
+            system_prompt="s",
+            user_prompt="u",
+        )
+    assert isinstance(first.provider, MockProvider)
+    assert first.provider is second.provider is get_provider()
+
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    get_settings.cache_clear()
+    openai = get_provider()
+    assert isinstance(openai, OpenAIProvider)
+    assert get_provider() is openai
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-rotated")
+    get_settings.cache_clear()
+    assert get_provider() is not openai
+
+
+def test_startup_builds_each_model_client_once(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("LLM_CHEAP_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("LLM_DEFAULT_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("LLM_EXPENSIVE_MODEL", "gpt-4o")
+    get_settings.cache_clear()
+
+    prebuild_provider_clients()
+    provider = get_provider()
+    assert set(provider._clients) == {"gpt-4o-mini", "gpt-4o"}
+    client = provider._client("gpt-4o")
+    assert provider._client("gpt-4o") is client
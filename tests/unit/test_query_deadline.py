@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from src.services.sql.deadline import QueryDeadline
+from src.services.sql.executor import SqlExecutionError, execute_safe_query
+
+_SLOW_SQL = (
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter "
+    "WHERE x < 500000000) SELECT COUNT(*) AS n FROM counter"
+)
+
+
+def test_expired_deadline_rejects_query_before_execution() -> None:
+    deadline = QueryDeadline(0.0)
+    with pytest.raises(SqlExecutionError, match="deadline exceeded"):
+        execute_safe_query("SELECT 1", deadline=deadline)
+
+
+def test_cancel_interrupts_running_query() -> None:
+    deadline = QueryDeadline(60.0)
+    errors: list[Exception] = []
+
+    def _run() -> None:
+        try:
+            execute_safe_query(_SLOW_SQL, deadline=deadline)
+        except SqlExecutionError as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=_run)
+    started = time.monotonic()
+    worker.start()
+    time.sleep(0.2)
+    deadline.cancel()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    assert time.monotonic() - started < 3
+    assert len(errors) == 1
+    assert "cancelled" in str(errors[0]).lower()
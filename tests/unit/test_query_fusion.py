@@ -0,0 +1,93 @@
+import sqlite3
+
+from src.services.analytics.fusion import split_fused_result
+from src.services.analytics.patterns.metric_change_decomposition import (
+    build_metric_change_decomposition,
+)
+from src.services.analytics.patterns.segment_contribution import (
+    build_segment_contribution,
+)
+from src.services.analytics.planner import plan_analyses
+from src.services.sql.columnar import columnar_from_tuples
+from src.services.sql.validator import validate_safe_select, validate_sql_references
+
+COLUMNS = ["date", "segment", "revenue"]
+SCHEMA = {"date": "TEXT", "segment": "TEXT", "revenue": "REAL"}
+INTENT = {"metric": "revenue", "time_column": "date", "top_n": 3}
+
+
+def _connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE dataset (date TEXT, segment TEXT, revenue REAL)")
+    conn.executemany(
+        "INSERT INTO dataset(date, segment, revenue) VALUES (?, ?, ?)",
+        [
+            ("2025-01-01", "A", 10),
+            ("2025-01-02", "A", 10),
+            ("2025-01-08", "A", 20),
+            ("2025-01-09", "A", 20),
+            ("2025-01-01", "B", 50),
+            ("2025-01-08", "B", 40),
+            ("2025-01-09", "C", 5),
+        ],
+    )
+    return conn
+
+
+def _run(conn: sqlite3.Connection, sql: str, params: dict | None = None):
+    cursor = conn.execute(sql, params or {"top_n": 3})
+    columns = [item[0] for item in cursor.description]
+    return columnar_from_tuples(columns, cursor.fetchall())
+
+
+def test_change_patterns_are_fused_into_one_query() -> None:
+    planned, _, _ = plan_analyses(
+        {"table_name": "dataset", "columns": COLUMNS, "schema": SCHEMA}, INTENT
+    )
+
+    fused = [query for query in planned if query.get("outputs")]
+    assert len(fused) == 1
+    assert [output["label"] for output in fused[0]["outputs"]] == [
+        "Metric change decomposition",
+        "Segment contribution analysis",
+    ]
+    assert fused[0]["sql"].count('FROM "dataset"') == 2  # max_date + windowed, once each
+    assert not any(
+        query["label"] in {"Metric change decomposition", "Segment contribution analysis"}
+        for query in planned
+        if not query.get("outputs")
+    )
+
+
+def test_fused_query_splits_into_the_standalone_results() -> None:
+    planned, _, _ = plan_analyses(
+        {"table_name": "dataset", "columns": COLUMNS, "schema": SCHEMA}, INTENT
+    )
+    fused = next(query for query in planned if query.get("outputs"))
+    assert validate_safe_select(fused["sql"]).is_valid
+    assert validate_sql_references(fused["sql"], table_name="dataset", allowed_columns=COLUMNS)
+
+    conn = _connection()
+    raw = _run(conn, fused["sql"], fused["params"])
+    assert "ROW_NUMBER() OVER (ORDER BY ABS(delta) DESC" in fused["sql"]
+    assert raw["values"][raw["columns"].index("output_rank")][:3] == [1, 2, 3]
+
+    # Rows arriving out of order are put back in rank order.
+    shuffled = {**raw, "values": [column[::-1] for column in raw["values"]]}
+    assert split_fused_result(shuffled, fused["outputs"]) == split_fused_result(
+        raw, fused["outputs"]
+    )
+    parts = split_fused_result(raw, fused["outputs"])
+    assert all("output_rank" not in part["columns"] for part in parts)
+
+    standalone = [
+        build_metric_change_decomposition("dataset", COLUMNS, SCHEMA, INTENT).queries[0]["query"],
+        build_segment_contribution("dataset", COLUMNS, SCHEMA, INTENT).queries[0]["query"],
+    ]
+    assert parts == [_run(conn, sql) for sql in standalone]
+    assert parts[0]["row_count"] == 3
+
+
+def test_reference_validation_accepts_cte_names() -> None:
+    sql = build_segment_contribution("dataset", COLUMNS, SCHEMA, INTENT).queries[0]["query"]
+    assert validate_sql_references(sql, table_name="dataset", allowed_columns=COLUMNS).is_valid
@@ -0,0 +1,105 @@
+from src.db.init_db import init_db
+from src.db.session import get_connection
+from src.services.analytics.dynamic_planner import _validate_queries
+from src.services.analytics.planner import plan_analyses
+from src.services.dataset_service import ingest_csv
+from src.services.rollup_service import cube_reference_tables, cube_table_name
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload() -> dict:
+    rows = ["date,region,revenue"]
+    for day in range(1, 29):
+        for region, scale in (("north", 1), ("south", 2)):
+            rows.append(f"2025-01-{day:02d},{region},{day * scale}")
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_cube_holds_day_week_month_rollups_per_dimension() -> None:
+    meta = _upload()
+    cube = meta["profile"]["cube"]
+    assert cube["table"] == cube_table_name(meta["table_name"])
+    assert cube["dimensions"] == ["region"]
+    assert cube["metrics"] == ["revenue"]
+
+    with get_connection() as conn:
+        week = conn.execute(
+            f'SELECT bucket, row_count, metric_sum FROM "{cube["table"]}" '
+            "WHERE grain = 'week' AND dimension = 'region' AND segment = 'south' "
+            "ORDER BY bucket LIMIT 2"
+        ).fetchall()
+        month = conn.execute(
+            f'SELECT metric_sum, metric_min, metric_max FROM "{cube["table"]}" '
+            "WHERE grain = 'month' AND dimension = '(all)'"
+        ).fetchone()
+
+    # 2025-01-01 is a Wednesday, so the first ISO week starts on 2024-12-30.
+    assert [tuple(row) for row in week] == [("2024-12-30", 5, 30.0), ("2025-01-06", 7, 126.0)]
+    assert tuple(month) == (3 * sum(range(1, 29)), 1.0, 56.0)
+
+
+def test_init_db_migrates_dataset_meta_without_profile_column() -> None:
+    with get_connection() as conn:
+        conn.execute("DROP TABLE dataset_meta")
+        conn.execute(
+            """
+            CREATE TABLE dataset_meta (
+                dataset_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                columns_json TEXT NOT NULL,
+                schema_json TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+    init_db()
+
+    meta = _upload()
+    assert meta["profile"]["cube"]["rows"] > 0
+
+
+def test_time_series_patterns_read_the_cube_at_the_requested_grain() -> None:
+    meta = _upload()
+    cube_table = meta["profile"]["cube"]["table"]
+    intent = {"metric": "revenue", "time_column": "date", "raw_question": "weekly revenue trend"}
+    planned, diagnostics, _ = plan_analyses(meta, intent)
+
+    assert not [item for item in diagnostics if item["code"] == "INVALID_PATTERN_SQL"]
+    trend = next(item for item in planned if "Trend series" in item["label"])
+    assert cube_table in trend["sql"]
+    assert trend["binding"]["grain"] == "week"
+
+    result = execute_safe_query_columnar(trend["sql"], params=trend["params"])
+    assert result["values"][0][0] == "2025-01-27"
+    assert result["values"][1][0] == 3 * (27 + 28)
+
+
+def test_generated_sql_may_read_the_cube() -> None:
+    meta = _upload()
+    cube_table = meta["profile"]["cube"]["table"]
+    queries = [
+        {
+            "label": "Monthly revenue",
+            "sql": (
+                f'SELECT bucket, metric_sum FROM "{cube_table}" '
+                "WHERE grain = 'month' AND dimension = '(all)' AND metric = 'revenue'"
+            ),
+        }
+    ]
+
+    valid, diagnostics = _validate_queries(
+        queries,
+        table_name=meta["table_name"],
+        columns=meta["columns"],
+        row_counts={meta["table_name"]: meta["rows"]},
+        extra_tables=cube_reference_tables(meta),
+    )
+
+    assert diagnostics == []
+    assert [item["label"] for item in valid] == ["Monthly revenue"]
@@ -0,0 +1,170 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.db.session import get_connection
+from src.main import app
+from src.services.dataset_service import ingest_csv
+from src.services.sample_service import SAMPLE_WEIGHT_COLUMN, rewrite_for_sample
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _small_sample(monkeypatch: pytest.MonkeyPatch) -> None:
+    from src.core.settings import get_settings
+
+    monkeypatch.setenv("SAMPLE_TARGET_ROWS", "300")
+    get_settings.cache_clear()
+
+
+def _csv() -> str:
+    rows = ["date,region,revenue"]
+    for idx in range(1500):
+        month = 1 + idx % 3
+        region = ["north", "south", "east"][idx % 7 % 3]
+        rows.append(f"2025-{month:02d}-{1 + idx % 28:02d},{region},{100 + (idx * 37) % 50}")
+    return "\n".join(rows)
+
+
+def _upload() -> dict:
+    ingest_csv("sales.csv", _csv().encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_ingest_keeps_a_weighted_stratified_sample() -> None:
+    meta = _upload()
+    sample = meta["profile"]["sample"]
+    assert sample["stratified_by"] == ["date", "region"]
+    assert sample["strata"] == 9
+    assert 290 <= sample["rows"] <= 310
+
+    with get_connection() as conn:
+        total_weight = conn.execute(
+            f'SELECT SUM({SAMPLE_WEIGHT_COLUMN}) FROM "{sample["table"]}"'
+        ).fetchone()[0]
+    assert total_weight == pytest.approx(1500)
+
+
+def test_rewritten_aggregates_estimate_full_table_totals() -> None:
+    meta = _upload()
+    sample = meta["profile"]["sample"]
+    sql = (
+        f"SELECT region, COUNT(*) AS n, SUM(revenue) AS total, AVG(revenue) AS mean "
+        f'FROM "{meta["table_name"]}" GROUP BY region ORDER BY region'
+    )
+    rewritten = rewrite_for_sample(sql, table_name=meta["table_name"], sample_table=sample["table"])
+    assert rewritten is not None
+    assert sample["table"] in rewritten
+    assert meta["table_name"] + '"' not in rewritten
+
+    exact = execute_safe_query_columnar(sql)
+    approx = execute_safe_query_columnar(rewritten)
+    assert approx["values"][0] == exact["values"][0]
+    assert approx["values"][1] == pytest.approx(exact["values"][1])
+    bound = sample["relative_error"]["revenue"]
+    assert bound is not None and bound < 0.1
+    for estimate, actual in zip(approx["values"][2], exact["values"][2], strict=True):
+        assert estimate == pytest.approx(actual, rel=0.1)
+    for estimate, actual in zip(approx["values"][3], exact["values"][3], strict=True):
+        assert estimate == pytest.approx(actual, rel=0.05)
+
+
+def test_rewrite_leaves_queries_over_other_tables_alone() -> None:
+    sql = "SELECT COUNT(*) FROM other"
+    assert rewrite_for_sample(sql, table_name="data_x", sample_table="data_x_sample") == (
+        "SELECT COUNT(*) FROM other"
+    )
+
+
+def test_queries_off_the_dataset_table_are_not_reported_as_approximate() -> None:
+    from src.agents.ask_graph import execute_queries_node
+
+    meta = _upload()
+    sketch_table = meta["profile"]["sketches"]["table"]
+    state = {
+        "request_id": "sketch-only-req",
+        "approximate": True,
+        "dataset_meta": meta,
+        "intent": {"metric": "revenue"},
+        "diagnostics": [],
+        "planned_analyses": [
+            {
+                "name": "heuristic_distinct_count",
+                "description": "Distinct regions",
+                "sql_label": "Distinct regions",
+                "sql": f"SELECT distinct_estimate FROM \"{sketch_table}\" WHERE column_name = 'region'",
+                "trusted": True,
+            }
+        ],
+    }
+    state = execute_queries_node(state)  # type: ignore[arg-type]
+
+    assert state["executed_results"][0]["sql"].startswith("SELECT distinct_estimate")
+    assert not any(item["code"] == "APPROXIMATE_RESULT" for item in state["diagnostics"])
+
+
+def test_ask_approximate_runs_on_the_sample_and_reports_bounds() -> None:
+    upload = client.post("/upload/dataset", files={"file": ("sales.csv", _csv(), "text/csv")})
+    assert upload.status_code == 200
+    question = {"question": "Why did revenue change this week?", "approximate": True}
+
+    approximate = client.post("/ask", json=question)
+    assert approximate.status_code == 200
+    answer = approximate.json()["answer"]
+    assert answer["approximate"] is True
+    messages = [item["message"] for item in answer["diagnostics"]]
+    assert any("stratified sample" in message and "revenue" in message for message in messages)
+    assert any("_sample" in item["query"] for item in answer["sql"])
+
+    exact = client.post("/ask", json={**question, "approximate": False})
+    assert exact.status_code == 200
+    assert exact.json()["answer"]["approximate"] is False
+
+
+def test_min_max_and_distinct_aggregates_run_on_the_full_table() -> None:
+    for aggregate in ("MIN(revenue)", "MAX(revenue)", "COUNT(DISTINCT region)"):
+        sql = f"SELECT {aggregate} AS value FROM data_x"
+        assert rewrite_for_sample(sql, table_name="data_x", sample_table="data_x_sample") is None
+
+
+def test_error_bound_is_only_claimed_for_scaled_totals() -> None:
+    from src.agents.ask_graph import execute_queries_node
+
+    meta = _upload()
+    table = meta["table_name"]
+    state = {
+        "request_id": "unscaled-req",
+        "approximate": True,
+        "dataset_meta": meta,
+        "intent": {"metric": "revenue"},
+        "diagnostics": [],
+        "planned_analyses": [
+            {
+                "name": "adhoc",
+                "description": "Sample rows",
+                "sql_label": "Sample rows",
+                "sql": f'SELECT region, revenue FROM "{table}" LIMIT 5',
+                "trusted": True,
+            },
+            {
+                "name": "adhoc",
+                "description": "Peak revenue",
+                "sql_label": "Peak revenue",
+                "sql": f'SELECT MAX(revenue) AS peak FROM "{table}"',
+                "trusted": True,
+            },
+        ],
+    }
+    state = execute_queries_node(state)  # type: ignore[arg-type]
+
+    peak = next(item for item in state["executed_results"] if item["label"] == "Peak revenue")
+    assert f'FROM "{table}"' in peak["sql"]
+    message = next(
+        item["message"] for item in state["diagnostics"] if item["code"] == "APPROXIMATE_RESULT"
+    )
+    assert "within ±" not in message
+    assert "Sample rows: raw sample values with no error bound" in message
@@ -0,0 +1,75 @@
+import json
+from typing import Any, ClassVar
+
+from src.core.settings import get_settings
+from src.llm.types import LlmCallResult
+from src.services.analytics.dynamic_planner import _build_llm_prompt_payload
+from src.services.answer_service import synthesize_narrative
+from src.services.dataset_service import ingest_csv
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload_wide() -> dict:
+    filler = [f"note_{index}" for index in range(30)]
+    header = ["order_id", "order_date", "region", "revenue", *filler]
+    rows = [",".join(header)]
+    for row in range(60):
+        region = ("north", "south", "east")[row % 3]
+        notes = [f"text{row}-{index}" for index in range(30)]
+        rows.append(f"A{row},2025-01-{row % 28 + 1:02d},{region},{row * 2},{','.join(notes)}")
+    ingest_csv("wide.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def test_prompt_sends_ranked_typed_columns_once(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_PROMPT_MAX_COLUMNS", "4")
+    get_settings.cache_clear()
+    meta = _upload_wide()
+
+    payload = _build_llm_prompt_payload("Revenue by region over time?", meta, {})
+    assert "columns" not in payload
+    assert list(payload["schema"]) == ["revenue", "region", "order_date", "order_id"]
+    assert payload["schema"]["region"] == "TEXT e.g. east|north|south"
+    assert payload["schema"]["order_id"] == "TEXT"
+    assert payload["omitted_columns"] == 30
+
+
+class _CapturingRouter:
+    prompt: ClassVar[dict[str, Any]] = {}
+
+    def call(self, **kwargs: Any) -> LlmCallResult:
+        _CapturingRouter.prompt = json.loads(kwargs["user_prompt"])
+        return LlmCallResult(
+            text='{"headline": "h", "narrative": "n"}',
+            model="fake",
+            provider="fake",
+            prompt_tokens=1,
+            completion_tokens=1,
+            usd=0.0,
+        )
+
+
+def test_synthesis_payload_is_bounded() -> None:
+    result = {
+        "label": "Revenue by day",
+        "sql": "SELECT 1",
+        "columns": ["day", "revenue"],
+        "values": [[f"d{index}" for index in range(500)], list(range(500))],
+        "row_count": 500,
+    }
+    synthesize_narrative(
+        router=_CapturingRouter(),  # type: ignore[arg-type]
+        request_id="req",
+        question="q",
+        executed_results=[result],
+        diagnostics=[{"code": "X", "message": "m"}] * 50,
+        confidence={},
+        context_citations=[],
+    )
+    sent = _CapturingRouter.prompt["top_results"][0]
+    assert len(sent["values"][0]) == 20
+    assert sent["truncated"] is True
+    assert "sql" not in sent
+    assert len(_CapturingRouter.prompt["diagnostics"]) == 10
@@ -0,0 +1,180 @@
+import time
+from concurrent.futures import wait
+from typing import Any
+
+import pytest
+
+from src.agents import ask_graph
+from src.llm.types import LlmCallResult
+from src.services.dataset_service import ingest_csv
+from src.services.sql import speculative
+from src.services.sql.deadline import (
+    cancel_request_deadline,
+    release_request_deadline,
+    start_request_deadline,
+)
+from src.services.sql.executor import SqlExecutionError
+from src.storage.repositories import get_dataset_meta
+
+
+class _WaitingRouter:
+    """Planner stand-in that only answers once the speculative SQL has finished."""
+
+    speculated = 0
+
+    def call(self, **kwargs: Any) -> LlmCallResult:
+        futures = list(speculative._SPECULATIONS[kwargs["request_id"]].futures.values())
+        wait(futures)
+        _WaitingRouter.speculated = len(futures)
+        return LlmCallResult(
+            text='{"queries": []}',
+            model="fake",
+            provider="fake",
+            prompt_tokens=1,
+            completion_tokens=1,
+            usd=0.0,
+        )
+
+
+def test_deterministic_sql_runs_while_the_llm_plans(monkeypatch) -> None:
+    rows = ["date,region,revenue"] + [
+        f"2025-01-{day:02d},{region},{day * 3 + len(region)}"
+        for day in range(1, 29)
+        for region in ("north", "south")
+    ]
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+
+    monkeypatch.setattr(ask_graph, "ModelRouter", _WaitingRouter)
+    state: Any = {
+        "request_id": "speculative-req",
+        "question": "Why did revenue trend down by region?",
+        "dataset_meta": meta,
+        "clarifications": {},
+        "intent": {"metric": "revenue", "time_column": "date"},
+        "diagnostics": [],
+        "cost_trace": ask_graph._base_cost_trace(),
+    }
+    state = ask_graph.plan_analyses_node(state)
+    assert _WaitingRouter.speculated > 0
+
+    direct_calls: list[str] = []
+    original = ask_graph.execute_safe_query_columnar
+
+    def _counting(sql: str, **kwargs: Any):
+        direct_calls.append(sql)
+        return original(sql, **kwargs)
+
+    monkeypatch.setattr(ask_graph, "execute_safe_query_columnar", _counting)
+    state = ask_graph.execute_queries_node(state)
+
+    assert state["executed_results"]
+    assert not state.get("execution_errors")
+    assert direct_calls == []
+    assert "speculative-req" not in speculative._SPECULATIONS
+
+
+class _RecordingRouter:
+    speculated: int | None = None
+
+    def call(self, **kwargs: Any) -> LlmCallResult:
+        speculation = speculative._SPECULATIONS.get(kwargs["request_id"])
+        _RecordingRouter.speculated = len(speculation.futures) if speculation else 0
+        return LlmCallResult(
+            text='{"queries": []}',
+            model="fake",
+            provider="fake",
+            prompt_tokens=1,
+            completion_tokens=1,
+            usd=0.0,
+        )
+
+
+def test_queries_over_the_cost_budget_are_not_speculated(monkeypatch) -> None:
+    from src.core.settings import get_settings
+
+    rows = ["date,region,revenue"] + [
+        f"2025-01-{day:02d},{region},{day * 3}" for day in range(1, 29) for region in ("n", "s")
+    ]
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    monkeypatch.setenv("QUERY_MAX_ESTIMATED_COST", "1")
+    get_settings.cache_clear()
+
+    monkeypatch.setattr(ask_graph, "ModelRouter", _RecordingRouter)
+    state: Any = {
+        "request_id": "over-budget-req",
+        "question": "Why did revenue trend down by region?",
+        "dataset_meta": meta,
+        "clarifications": {},
+        "intent": {"metric": "revenue", "time_column": "date"},
+        "diagnostics": [],
+        "cost_trace": ask_graph._base_cost_trace(),
+    }
+    state = ask_graph.plan_analyses_node(state)
+    speculative.release_speculative_queries("over-budget-req")
+
+    survivors = state["planned_analyses"]
+    assert all(item["estimated_cost"] <= 1 for item in survivors)
+    assert _RecordingRouter.speculated == len(survivors)
+    assert any(item["code"] == "QUERY_COST_EXCEEDED" for item in state["diagnostics"])
+
+
+def test_speculation_is_released_when_execution_fails(monkeypatch) -> None:
+    rows = ["date,region,revenue"] + [
+        f"2025-01-{day:02d},{region},{day * 3}" for day in range(1, 29) for region in ("n", "s")
+    ]
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    speculative.start_speculative_queries(
+        "failing-req", [{"sql": f'SELECT COUNT(*) FROM "{meta["table_name"]}"', "trusted": True}]
+    )
+
+    def _boom(label: str, result: Any) -> Any:
+        raise RuntimeError("post-processing failed")
+
+    monkeypatch.setattr(ask_graph, "_reduce_series", _boom)
+    state: Any = {
+        "request_id": "failing-req",
+        "dataset_meta": meta,
+        "intent": {},
+        "diagnostics": [],
+        "planned_analyses": [
+            {
+                "name": "adhoc",
+                "description": "Rows",
+                "sql_label": "Rows",
+                "sql": f'SELECT COUNT(*) FROM "{meta["table_name"]}"',
+                "trusted": True,
+            }
+        ],
+    }
+    with pytest.raises(RuntimeError):
+        ask_graph.execute_queries_node(state)
+    assert "failing-req" not in speculative._SPECULATIONS
+
+
+def test_cancelling_the_request_interrupts_speculative_queries() -> None:
+    slow_sql = (
+        "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter "
+        "WHERE x < 500000000) SELECT COUNT(*) AS n FROM counter"
+    )
+    start_request_deadline("disconnect-req", 60.0)
+    try:
+        speculative.start_speculative_queries(
+            "disconnect-req", [{"sql": slow_sql, "trusted": True}]
+        )
+        future = speculative.take_speculative_result("disconnect-req", slow_sql, None)
+        assert future is not None
+        time.sleep(0.2)
+        started = time.monotonic()
+        cancel_request_deadline("disconnect-req")
+        with pytest.raises(SqlExecutionError, match="cancelled"):
+            future.result(timeout=5)
+        assert time.monotonic() - started < 3
+    finally:
+        speculative.release_speculative_queries("disconnect-req")
+        release_request_deadline("disconnect-req")
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from src.core.settings import get_settings
+from src.db.session import get_connection
+from src.services.analytics.dynamic_planner import _validate_queries
+from src.services.sql.cost import estimate_query_cost
+
+
+def _connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE dataset (date TEXT, segment TEXT, revenue REAL)")
+    return conn
+
+
+def test_correlated_subquery_costs_more_than_single_scan() -> None:
+    conn = _connection()
+    row_counts = {"dataset": 10_000}
+
+    scan = estimate_query_cost("SELECT COUNT(*) FROM dataset", row_counts=row_counts, conn=conn)
+    correlated = estimate_query_cost(
+        "SELECT a.date, (SELECT SUM(b.revenue) FROM dataset b WHERE b.date <= a.date) "
+        "FROM dataset a",
+        row_counts=row_counts,
+        conn=conn,
+    )
+
+    assert scan.cost == pytest.approx(10_000)
+    assert correlated.cost is not None
+    assert correlated.cost >= 10_000 * 10_000
+
+
+def test_ungrouped_aggregate_cte_counts_as_single_row() -> None:
+    conn = _connection()
+    sql = """
+WITH tot AS (SELECT SUM(revenue) AS total FROM dataset)
+SELECT dataset.segment, dataset.revenue / tot.total AS share FROM dataset, tot
+""".strip()
+
+    estimate = estimate_query_cost(sql, row_counts={"dataset": 10_000}, conn=conn)
+
+    assert estimate.cost is not None
+    assert estimate.cost < 100_000
+
+
+def test_unexplainable_sql_returns_no_cost() -> None:
+    estimate = estimate_query_cost(
+        "SELECT missing FROM dataset", row_counts={"dataset": 1}, conn=_connection()
+    )
+    assert estimate.cost is None
+    assert "missing" in (estimate.error or "")
+
+
+def test_validate_queries_rejects_plans_over_cost_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("QUERY_MAX_ESTIMATED_COST", "1000000")
+    get_settings.cache_clear()
+    with get_connection() as conn:
+        conn.execute('CREATE TABLE "data_costgate" (date TEXT, revenue REAL)')
+
+    queries = [
+        {"label": "Cheap", "sql": 'SELECT COUNT(*) AS n FROM "data_costgate"', "pattern": "x"},
+        {
+            "label": "Self join",
+            "sql": 'SELECT COUNT(*) AS n FROM "data_costgate" a, "data_costgate" b',
+            "pattern": "x",
+        },
+    ]
+    try:
+        valid, diagnostics = _validate_queries(
+            queries,
+            table_name="data_costgate",
+            columns=["date", "revenue"],
+            row_counts={"data_costgate": 5_000},
+        )
+    finally:
+        with get_connection() as conn:
+            conn.execute('DROP TABLE IF EXISTS "data_costgate"')
+
+    assert [query["label"] for query in valid] == ["Cheap"]
+    assert valid[0]["estimated_cost"] == pytest.approx(5_000)
+    assert diagnostics[0]["code"] == "QUERY_COST_EXCEEDED"
@@ -5,6 +5,8 @@ import sqlite3
 
 import pytest
 
+from src.db.session import get_read_only_connection
+
 from src.services.sql.executor import (
     SqlExecutionError,
     _enforce_limit,
@@ -34,14 +36,38 @@ def test_execute_safe_query_maps_interrupted_to_timeout(monkeypatch: pytest.Monk
         def set_progress_handler(self, *_args, **_kwargs) -> None:
             return None
 
-        def execute(self, _sql: str):
+        def execute(self, _sql: str, *_args):
             raise sqlite3.OperationalError("interrupted")
 
     @contextmanager
     def _fake_connection():
         yield _InterruptedConnection()
 
-    monkeypatch.setattr("src.services.sql.executor.get_connection", _fake_connection)
+    monkeypatch.setattr("src.services.sql.executor.get_read_only_connection", _fake_connection)
 
     with pytest.raises(SqlExecutionError, match="Query timed out"):
         execute_safe_query("SELECT 1")
+
+
+def test_trusted_query_skips_parser_but_not_read_only_guard() -> None:
+    assert execute_safe_query("SELECT 1 AS one", trusted=True) == [{"one": 1}]
+
+    with pytest.raises(SqlExecutionError, match="read-only guard"):
+        execute_safe_query("DELETE FROM dataset_meta", trusted=True)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "PRAGMA table_info(dataset_meta)",
+        "ATTACH DATABASE ':memory:' AS scratch",
+        "CREATE TEMP TABLE scratch(a)",
+        "SELECT load_extension('x')",
+    ],
+)
+def test_read_only_connection_denies_non_select_actions(sql: str) -> None:
+    with (
+        get_read_only_connection() as conn,
+        pytest.raises(sqlite3.DatabaseError, match="not authorized"),
+    ):
+        conn.execute(sql)
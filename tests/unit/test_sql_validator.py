@@ -1,4 +1,7 @@
-from src.services.sql.validator import validate_safe_select
+import pytest
+
+from src.services.sql import validator
+from src.services.sql.validator import validate_safe_select, validate_sql_references
 
 
 def test_validator_allows_select() -> None:
@@ -15,3 +18,48 @@ def test_validator_blocks_drop() -> None:
 def test_validator_blocks_multiple_statements() -> None:
     result = validate_safe_select("SELECT 1; SELECT 2")
     assert result.is_valid is False
+
+
+def test_validator_allows_keyword_substrings_in_identifiers() -> None:
+    sql = "SELECT created_at, last_updated, \"drop\" FROM dataset WHERE note = 'DELETE me'"
+    assert validate_safe_select(sql).is_valid is True
+
+
+def test_validator_allows_replace_function_but_not_replace_statement() -> None:
+    assert validate_safe_select("SELECT REPLACE(name, 'a', 'b') FROM dataset").is_valid is True
+    result = validate_safe_select("REPLACE INTO dataset VALUES (1)")
+    assert result.is_valid is False
+    assert result.reason == "Forbidden keyword detected: REPLACE"
+
+
+def test_validator_ignores_semicolons_inside_string_literals() -> None:
+    assert validate_safe_select("SELECT ';' AS sep FROM dataset").is_valid is True
+    assert validate_safe_select("SELECT 1; DELETE FROM dataset").is_valid is False
+
+
+def test_fallback_scanner_matches_tokenizer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(validator, "_sqlite_dialect", lambda: None)
+    validator._sqlglot_tokens.cache_clear()
+
+    assert validate_safe_select("SELECT created_at FROM dataset").is_valid is True
+    assert validate_safe_select("SELECT 'x;y' FROM dataset").is_valid is True
+    assert validate_safe_select("SELECT 1 FROM t WHERE UPDATE = 1").is_valid is False
+
+
+def test_reference_validation_checks_columns_per_table() -> None:
+    extra = {"rollup": ["bucket", "metric_sum"]}
+
+    def valid(sql: str) -> bool:
+        return validate_sql_references(
+            sql, table_name="sales", allowed_columns=["region", "revenue"], extra_tables=extra
+        ).is_valid
+
+    assert valid('SELECT region, SUM(revenue) AS total FROM "sales" GROUP BY region ORDER BY total')
+    assert valid("SELECT r.bucket, SUM(r.metric_sum) FROM rollup r GROUP BY r.bucket")
+    assert valid("SELECT s.region, r.bucket FROM sales s JOIN rollup r ON r.bucket = s.region")
+    assert valid("WITH w AS (SELECT region FROM sales) SELECT w.region FROM w")
+
+    assert not valid("SELECT s.metric_sum FROM sales s")
+    assert not valid("SELECT metric_sum FROM sales")
+    assert not valid("SELECT rollup.revenue FROM rollup")
+    assert not valid("SELECT region FROM rollup WHERE bucket IN (SELECT revenue FROM rollup)")
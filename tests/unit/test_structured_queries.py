@@ -0,0 +1,97 @@
+from typing import Any
+
+from src.services.analytics.dynamic_planner import build_hybrid_query_plan
+from src.services.analytics.structured_queries import build_structured_query
+from src.services.dataset_service import ingest_csv
+from src.services.sql.executor import execute_safe_query_columnar
+from src.storage.repositories import get_dataset_meta
+
+
+def _upload() -> dict:
+    rows = ["order_date,region,channel,revenue,units"]
+    for day in range(1, 41):
+        region = ("north", "south", "east")[day % 3]
+        channel = ("online", "store")[day % 2]
+        rows.append(f"2025-01-{day % 28 + 1:02d},{region},{channel},{day * 10},{day % 4 + 1}")
+    ingest_csv("sales.csv", "\n".join(rows).encode("utf-8"))
+    meta = get_dataset_meta()
+    assert meta is not None
+    return meta
+
+
+def _run(query: dict[str, Any]) -> dict[str, Any]:
+    return execute_safe_query_columnar(query["sql"], params=query.get("params"))
+
+
+def test_group_by_and_top_n_questions_compile_to_sql() -> None:
+    meta = _upload()
+
+    query = build_structured_query("Revenue by region", meta)
+    assert query is not None and query["pattern"] == "heuristic_group_by"
+    result = _run(query)
+    assert result["columns"] == ["region", "value"]
+    assert result["values"][1] == sorted(result["values"][1], reverse=True)
+    assert sum(result["values"][1]) == sum(day * 10 for day in range(1, 41))
+
+    query = build_structured_query("Top 2 regions by average units", meta)
+    assert query is not None and query["label"].startswith("Top 2: AVG of units by region")
+    assert _run(query)["row_count"] == 2
+
+
+def test_time_series_and_filtered_aggregates() -> None:
+    meta = _upload()
+
+    query = build_structured_query("Monthly revenue", meta)
+    assert query is not None and query["pattern"] == "heuristic_time_series"
+    result = _run(query)
+    assert result["values"][0] == ["2025-01-01"]
+
+    query = build_structured_query("Total revenue for North", meta)
+    assert query is not None and query["pattern"] == "heuristic_filtered_aggregate"
+    assert query["params"] == {"filter_0": "north"}
+    expected = sum(day * 10 for day in range(1, 41) if day % 3 == 0)
+    assert _run(query)["values"] == [[expected]]
+
+    query = build_structured_query("How many rows per region for online", meta)
+    assert query is not None and query["params"] == {"filter_0": "online"}
+    assert sum(_run(query)["values"][1]) == 20
+
+
+def test_unhandled_wording_is_left_to_the_llm() -> None:
+    meta = _upload()
+    assert build_structured_query("Why did revenue drop by region?", meta) is None
+    assert build_structured_query("Revenue by region last week", meta) is None
+    assert build_structured_query("Revenue by region for the marketing launch", meta) is None
+    assert build_structured_query("Average revenue", meta) is None
+
+
+def test_unused_numbers_are_not_dropped() -> None:
+    meta = _upload()
+    assert build_structured_query("Revenue by region in 2024", meta) is None
+    assert build_structured_query("Total revenue by region for 2023", meta) is None
+    assert build_structured_query("revenue by region over 1000", meta) is None
+    assert build_structured_query("Top 2 regions by revenue in 2024", meta) is None
+
+    query = build_structured_query("Top two regions by revenue", meta)
+    assert query is not None and query["label"].startswith("Top 2:")
+
+
+class _ForbiddenRouter:
+    def call(self, **kwargs: Any) -> None:
+        raise AssertionError("structured questions should not call the LLM planner")
+
+
+def test_structured_questions_skip_llm_planning() -> None:
+    meta = _upload()
+    planned, _, planner_cost = build_hybrid_query_plan(
+        router=_ForbiddenRouter(),  # type: ignore[arg-type]
+        request_id="req",
+        question="Revenue by region over time",
+        dataset_meta=meta,
+        clarifications={},
+        intent={},
+        max_queries=10,
+    )
+    assert planner_cost is None
+    assert planned[0]["pattern"] == "heuristic_time_series"
+    assert planned[0]["label"] == "SUM of revenue by region per day"